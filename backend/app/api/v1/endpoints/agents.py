@@ -1,18 +1,31 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Body
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import Dict, Any, Optional
+from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Body, Query, Response
+from typing import Dict, Any, Optional, List
 import tempfile
 import os
-import ast
-import inspect
 from pathlib import Path
 import gradio as gr
 from pydantic import BaseModel
 import time
 import json
+import asyncio
+
+from app.api.v1.endpoints.auth import get_current_user
+from app.schemas.user import User
+from app.core.agent_manager import get_agent_manager, lookup_agent_metadata
+from app.core.config import settings
+from app.core.deploy_queue import DeployQueueFull
+from app.core.agent_proxy import get_agent_proxy, AgentProxyError
+from app.core.batching import get_micro_batcher
+from app.core.result_cache import get_result_cache, result_version
+from app.core.admission import get_admission_controller, AdmissionRejected, Admission
+from app.core.prediction_jobs import get_prediction_jobs, JobQueueFull, CallbackRejected
+from app.core.catalog import get_agent_catalog, SORT_FIELDS
+from app.core.search import get_search_index
+from app.core.uploads import receive_upload, UploadTooLarge
+from app.core.validation import get_validation_pipeline
+from app.core.agent_loader import get_agent_loader
 
 router = APIRouter()
-security = HTTPBearer()
 
 class AgentMetadata(BaseModel):
     name: str
@@ -23,35 +36,15 @@ class AgentMetadata(BaseModel):
     output_type: str = "text"
     is_public: bool = True
     token_price: float = 1.0
-
-def validate_gradio_code(code_content: str) -> bool:
-    """
-    Validate if the code contains a valid Gradio interface
-    """
-    try:
-        tree = ast.parse(code_content)
-        has_gradio_import = False
-        has_interface = False
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for name in node.names:
-                    if name.name == 'gradio':
-                        has_gradio_import = True
-            elif isinstance(node, ast.ImportFrom):
-                if node.module == 'gradio':
-                    has_gradio_import = True
-            elif isinstance(node, ast.Call):
-                if isinstance(node.func, ast.Attribute):
-                    if node.func.attr == 'Interface':
-                        has_interface = True
-                elif isinstance(node.func, ast.Name):
-                    if node.func.id == 'Interface':
-                        has_interface = True
-        
-        return has_gradio_import and has_interface
-    except:
-        return False
+    requirements: List[str] = []
+    max_batch_size: int = 1
+    max_batch_wait_ms: int = 10
+    cacheable: bool = True
+    tags: List[str] = []
+    min_replicas: int = 1
+    max_replicas: int = 1
+    memory_mb: Optional[int] = None
+    cpus: Optional[float] = None
 
 def generate_gradio_wrapper(original_code: str, metadata: AgentMetadata) -> str:
     """
@@ -59,7 +52,10 @@ def generate_gradio_wrapper(original_code: str, metadata: AgentMetadata) -> str:
     """
     wrapper_template = f'''
 import gradio as gr
+import os
 import time
+import uvicorn
+from fastapi import FastAPI, Body
 from typing import Dict, Any, List
 
 # Original code
@@ -68,29 +64,73 @@ from typing import Dict, Any, List
 def api_wrapper(input_data: List[str]) -> Dict[str, Any]:
     """
     API wrapper for the agent
+
+    Returns one result per input, in input order. Uses predict_batch when the
+    agent defines it and falls back to calling predict per item otherwise;
+    failed items get None in "data" and an entry in "errors".
     """
     start_time = time.time()
-    try:
-        # Get the main function from the original code
-        result = predict(input_data[0])  # Assuming single input for now
-        
-        return {{
-            "data": [result],
-            "status": "success",
-            "duration": float(f"{{time.time() - start_time:.3f}}")
-        }}
-    except Exception as e:
-        return {{
-            "error": {{
-                "message": str(e),
-                "code": "PROCESSING_ERROR"
-            }},
-            "status": "error"
+    if isinstance(input_data, str):
+        input_data = [input_data]
+    input_data = list(input_data)
+    results = [None] * len(input_data)
+    errors = []
+
+    batch_fn = globals().get("predict_batch")
+    if batch_fn is not None and input_data:
+        try:
+            batch_results = list(batch_fn(input_data))
+            if len(batch_results) != len(input_data):
+                raise ValueError(
+                    f"predict_batch returned {{len(batch_results)}} results for {{len(input_data)}} inputs"
+                )
+            results = batch_results
+        except Exception:
+            # Retry item by item so each error is reported against its input
+            batch_fn = None
+    if batch_fn is None:
+        for index, item in enumerate(input_data):
+            try:
+                results[index] = predict(item)
+            except Exception as e:
+                errors.append({{
+                    "index": index,
+                    "message": str(e),
+                    "code": "PROCESSING_ERROR"
+                }})
+
+    if not errors:
+        status = "success"
+    elif len(errors) == len(input_data):
+        status = "error"
+    else:
+        status = "partial"
+    response = {{
+        "data": results,
+        "status": status,
+        "duration": float(f"{{time.time() - start_time:.3f}}")
+    }}
+    if errors:
+        response["errors"] = errors
+    if status == "error":
+        response["error"] = {{
+            "message": errors[0]["message"],
+            "code": "PROCESSING_ERROR"
         }}
+    return response
+
+def ui_wrapper(text: str) -> str:
+    """
+    Single-input adapter for the Gradio UI
+    """
+    response = api_wrapper([text])
+    if response["status"] == "success":
+        return str(response["data"][0])
+    return response["errors"][0]["message"]
 
 # Create Gradio interface
 demo = gr.Interface(
-    fn=api_wrapper,
+    fn=ui_wrapper,
     inputs=gr.Textbox(
         placeholder="Enter input...",
         label="{metadata.name}",
@@ -106,33 +146,131 @@ demo = gr.Interface(
     cache_examples=True
 )
 
+# JSON API next to the UI; the platform proxy forwards /predict calls here
+api_app = FastAPI()
+
+@api_app.post("/predict")
+def _predict_route(payload: Dict[str, Any] = Body(...)) -> Dict[str, Any]:
+    return api_wrapper(payload.get("data", []))
+
+_warmed_up = False
+
+@api_app.get("/ready")
+def _ready_route() -> Dict[str, Any]:
+    """
+    Readiness probe: answers once a warm-up prediction has gone through
+    """
+    global _warmed_up
+    if not _warmed_up:
+        api_wrapper(["Example input here"])
+        _warmed_up = True
+    return {{"ready": True}}
+
+api_app = gr.mount_gradio_app(api_app, demo, path="/")
+
 if __name__ == "__main__":
-    demo.launch()
+    uvicorn.run(
+        api_app,
+        host=os.environ.get("GRADIO_SERVER_NAME", "127.0.0.1"),
+        port=int(os.environ.get("GRADIO_SERVER_PORT", "7860"))
+    )
 '''
     return wrapper_template
 
+def _is_same_artifact(existing: Dict[str, Any], incoming: Dict[str, Any]) -> bool:
+    """
+    True when the generated agent would be identical: same code, name and description
+    """
+    return all(existing.get(key) == incoming.get(key) for key in ("content_hash", "name", "description"))
+
 @router.post("/upload")
 async def upload_agent(
     file: UploadFile = File(...),
     metadata: AgentMetadata = Body(...),
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    current_user: User = Depends(get_current_user)
 ) -> Dict[str, Any]:
     """
     Upload and deploy a new AI agent
+
+    The file is streamed to disk in chunks and hashed as it arrives. A
+    re-upload of identical code for an agent that is already deployed reuses
+    the existing artifact instead of regenerating and relaunching it.
+    Validation runs off the event loop and the response reports how long
+    each stage took, in milliseconds.
     """
+    agent_id = metadata.name.lower().replace(" ", "_")
+    timings: Dict[str, float] = {}
+    stage_started = time.perf_counter()
+
+    def finish_stage(stage: str) -> None:
+        nonlocal stage_started
+        now = time.perf_counter()
+        timings[stage] = round((now - stage_started) * 1000, 3)
+        stage_started = now
+
     try:
-        # Read and validate the code
-        content = await file.read()
-        code_content = content.decode()
-        
-        if not validate_gradio_code(code_content):
+        try:
+            upload = await receive_upload(
+                file.file,
+                Path("agents") / ".uploads",
+                settings.AGENT_MAX_UPLOAD_BYTES,
+                settings.AGENT_UPLOAD_CHUNK_SIZE
+            )
+        except UploadTooLarge as e:
+            raise HTTPException(
+                status_code=413,
+                detail={
+                    "error": {
+                        "message": str(e),
+                        "code": "UPLOAD_TOO_LARGE"
+                    },
+                    "status": "error"
+                }
+            )
+
+        try:
+            agent_dir = Path("agents") / agent_id
+            stored_metadata = {**metadata.dict(), "content_hash": upload.sha256}
+
+            existing = get_agent_catalog().get(agent_id)
+            if existing is not None and _is_same_artifact(existing.metadata, stored_metadata) \
+                    and agent_id in get_agent_loader():
+                if existing.metadata != stored_metadata:
+                    with open(agent_dir / "metadata.json", "w") as f:
+                        json.dump(stored_metadata, f, indent=2)
+                    get_agent_catalog().upsert(agent_id, stored_metadata)
+                finish_stage("receive_ms")
+                return {
+                    "status": "success",
+                    "message": "Identical agent already deployed, reusing it",
+                    "agent_id": agent_id,
+                    "api_endpoint": f"/api/v1/agents/{agent_id}/predict",
+                    "ui_url": get_agent_loader().get(agent_id).url,
+                    "content_hash": upload.sha256,
+                    "reused": True,
+                    "timings": timings
+                }
+
+            code_content = (await asyncio.to_thread(upload.path.read_bytes)).decode()
+        finally:
+            upload.path.unlink(missing_ok=True)
+        finish_stage("receive_ms")
+
+        report, memoized = await get_validation_pipeline().validate(
+            code_content,
+            upload.sha256,
+            metadata.requirements
+        )
+        finish_stage("validate_ms")
+        if not report.valid:
             raise HTTPException(
                 status_code=400,
                 detail={
                     "error": {
-                        "message": "Invalid code: Must contain a valid Gradio interface",
+                        "message": f"Invalid code: {'; '.join(report.errors)}",
                         "code": "INVALID_CODE"
                     },
+                    "validation": report.to_dict(),
                     "status": "error"
                 }
             )
@@ -141,7 +279,6 @@ async def upload_agent(
         wrapped_code = generate_gradio_wrapper(code_content, metadata)
         
         # Create temporary directory for the agent
-        agent_dir = Path("agents") / metadata.name.lower().replace(" ", "_")
         agent_dir.mkdir(parents=True, exist_ok=True)
         
         # Save the wrapped code
@@ -151,20 +288,28 @@ async def upload_agent(
         
         # Save metadata
         with open(agent_dir / "metadata.json", "w") as f:
-            json.dump(metadata.dict(), f, indent=2)
+            json.dump(stored_metadata, f, indent=2)
+        get_agent_catalog().upsert(agent_id, stored_metadata)
+        get_result_cache().invalidate(agent_id)
+        finish_stage("generate_ms")
         
-        # Launch Gradio app (in development - would be containerized in production)
-        import sys
-        sys.path.append(str(agent_dir))
-        from agent import demo
-        app = demo.launch(prevent_thread_lock=True, server_port=0)  # Use random port
+        # Load into this process (in development - would be containerized in production)
+        loaded = await get_agent_loader().load(agent_id, agent_file, upload.sha256)
+        finish_stage("launch_ms")
+        timings["total_ms"] = round(sum(timings.values()), 3)
         
         return {
             "status": "success",
             "message": "Agent uploaded and deployed successfully",
-            "agent_id": metadata.name.lower().replace(" ", "_"),
-            "api_endpoint": f"/api/v1/agents/{metadata.name.lower().replace(' ', '_')}/predict",
-            "ui_url": app.url
+            "agent_id": agent_id,
+            "api_endpoint": f"/api/v1/agents/{agent_id}/predict",
+            "ui_url": loaded.url,
+            "content_hash": upload.sha256,
+            "reused": False,
+            "memory_bytes": loaded.memory_bytes,
+            "entry_points": report.entry_points,
+            "validation_cached": memoized,
+            "timings": timings
         }
         
     except HTTPException as he:
@@ -183,32 +328,47 @@ async def upload_agent(
 
 @router.get("/list")
 async def list_agents(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    model_type: Optional[str] = None,
+    tags: Optional[List[str]] = Query(None),
+    is_public: Optional[bool] = None,
+    sort_by: Optional[str] = None,
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    current_user: User = Depends(get_current_user)
 ) -> Dict[str, Any]:
     """
-    List all available agents
+    List available agents from the in-memory catalog, filtered and paginated
     """
+    if sort_by is not None and sort_by not in SORT_FIELDS:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": {
+                    "message": f"sort_by must be one of: {', '.join(SORT_FIELDS)}",
+                    "code": "INVALID_INPUT"
+                },
+                "status": "error"
+            }
+        )
+
     try:
-        agents_dir = Path("agents")
-        if not agents_dir.exists():
-            return {"agents": []}
-        
-        agents = []
-        for agent_dir in agents_dir.iterdir():
-            if agent_dir.is_dir():
-                metadata_file = agent_dir / "metadata.json"
-                if metadata_file.exists():
-                    with open(metadata_file, "r") as f:
-                        metadata = json.load(f)
-                        agents.append({
-                            "id": agent_dir.name,
-                            "metadata": metadata,
-                            "api_endpoint": f"/api/v1/agents/{agent_dir.name}/predict"
-                        })
-        
+        total, entries = get_agent_catalog().query(
+            model_type=model_type,
+            tags=tags,
+            is_public=is_public,
+            sort_by=sort_by,
+            descending=order == "desc",
+            offset=offset,
+            limit=limit
+        )
+
         return {
             "status": "success",
-            "agents": agents
+            "agents": [entry.to_dict() for entry in entries],
+            "total": total,
+            "offset": offset,
+            "limit": limit
         }
         
     except Exception as e:
@@ -221,4 +381,562 @@ async def list_agents(
                 },
                 "status": "error"
             }
-        ) 
\ No newline at end of file
+        )
+
+@router.get("/search")
+async def search_agents(
+    q: str = Query(..., min_length=1, max_length=200),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Ranked full-text search over agent name, description and tags
+
+    The last word of the query also matches as a prefix, for typeahead.
+    """
+    total, matches = get_search_index().search(q, offset=offset, limit=limit)
+    catalog = get_agent_catalog()
+    agents = []
+    for agent_id, score in matches:
+        entry = catalog.get(agent_id)
+        if entry is not None:
+            agents.append({**entry.to_dict(), "score": float(f"{score:.4f}")})
+
+    return {
+        "status": "success",
+        "agents": agents,
+        "total": total,
+        "offset": offset,
+        "limit": limit
+    }
+
+@router.post("/{agent_id}/deploy", status_code=202)
+async def deploy_agent(
+    agent_id: str,
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Queue a containerized deploy of an uploaded agent and return the job id
+    """
+    agent_file = Path("agents") / agent_id / "agent.py"
+    entry = get_agent_catalog().get(agent_id)
+    if entry is None or not agent_file.exists():
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": {
+                    "message": f"Agent '{agent_id}' not found",
+                    "code": "AGENT_NOT_FOUND"
+                },
+                "status": "error"
+            }
+        )
+
+    try:
+        manager = get_agent_manager()
+        deployed = manager.get_agent_metadata(agent_id)
+        if deployed is not None and _is_same_artifact(deployed, entry.metadata):
+            return {
+                "status": "success",
+                "message": "Identical agent already deployed, reusing it",
+                "agent_id": agent_id,
+                "reused": True
+            }
+        job = manager.submit_deploy(agent_id, agent_file, entry.metadata)
+    except DeployQueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "error": {
+                    "message": str(e),
+                    "code": "DEPLOY_QUEUE_FULL"
+                },
+                "status": "error"
+            }
+        )
+
+    return {
+        "status": "accepted",
+        "job_id": job.job_id,
+        "agent_id": agent_id,
+        "status_endpoint": f"/api/v1/agents/deployments/{job.job_id}"
+    }
+
+@router.get("/deployments/{job_id}")
+async def get_deploy_status(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Report the stages of a deploy job and how long each took
+    """
+    job = get_agent_manager().get_deploy_job(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": {
+                    "message": f"Deploy job '{job_id}' not found",
+                    "code": "JOB_NOT_FOUND"
+                },
+                "status": "error"
+            }
+        )
+
+    return {
+        "status": "success",
+        "job": job.to_dict()
+    }
+
+@router.get("/build-cache/stats")
+async def get_build_cache_stats(
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Dependency-layer cache hit/miss counts and build times
+    """
+    return {
+        "status": "success",
+        "stats": get_agent_manager().build_cache.stats()
+    }
+
+@router.get("/running")
+async def list_running_agents(
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Deployed agents with their cached container status
+    """
+    return {
+        "status": "success",
+        **(await get_agent_manager().list_running_agents())
+    }
+
+@router.get("/{agent_id}/status")
+async def get_agent_status(
+    agent_id: str,
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Container status of a deployed agent, served from the status cache
+    """
+    status = await get_agent_manager().get_agent_status(agent_id)
+    if status is None:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": {
+                    "message": f"Agent {agent_id} is not deployed",
+                    "code": "AGENT_NOT_DEPLOYED"
+                },
+                "status": "error"
+            }
+        )
+    return {
+        "status": "success",
+        "agent_id": agent_id,
+        "agent": status
+    }
+
+@router.get("/{agent_id}/replicas")
+async def get_agent_replicas(
+    agent_id: str,
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Replica count, bounds and per-replica in-flight requests for a deployed agent
+    """
+    status = await get_agent_manager().get_agent_status(agent_id)
+    if status is None:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": {
+                    "message": f"Agent {agent_id} is not deployed",
+                    "code": "AGENT_NOT_DEPLOYED"
+                },
+                "status": "error"
+            }
+        )
+    return {
+        "status": "success",
+        "agent_id": agent_id,
+        "replicas": status["replicas"]
+    }
+
+@router.get("/{agent_id}/usage")
+async def get_agent_usage(
+    agent_id: str,
+    series: bool = False,
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Measured CPU, RSS and network usage of a deployed agent with recommended limits
+    """
+    usage = get_agent_manager().get_agent_usage(agent_id, include_series=series)
+    if usage is None:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": {
+                    "message": f"Agent {agent_id} is not deployed",
+                    "code": "AGENT_NOT_DEPLOYED"
+                },
+                "status": "error"
+            }
+        )
+    return {
+        "status": "success",
+        "usage": usage
+    }
+
+@router.get("/usage/recommendations")
+async def get_limit_recommendations(
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Right-sized memory and CPU limits for every running agent
+    """
+    return {
+        "status": "success",
+        "stats": get_agent_manager().limit_recommendations()
+    }
+
+@router.get("/images/stats")
+async def get_image_gc_stats(
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Image store budget, evictions and bytes reclaimed per docker host
+    """
+    return {
+        "status": "success",
+        "stats": get_agent_manager().image_gc.stats()
+    }
+
+@router.post("/images/gc")
+async def collect_images(
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Run an image garbage collection pass on every host now
+    """
+    return {
+        "status": "success",
+        "hosts": await get_agent_manager().image_gc.collect()
+    }
+
+@router.get("/hosts")
+async def list_hosts(
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Docker hosts with their reserved and total memory and CPU
+    """
+    return {
+        "status": "success",
+        "stats": get_agent_manager().scheduler.stats()
+    }
+
+def _require_host(host_name: str) -> None:
+    if host_name not in get_agent_manager().scheduler.hosts:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": {
+                    "message": f"Host {host_name} not found",
+                    "code": "HOST_NOT_FOUND"
+                },
+                "status": "error"
+            }
+        )
+
+@router.post("/hosts/{host_name}/drain")
+async def drain_host(
+    host_name: str,
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Stop placing agents on a host and move its containers to the others
+    """
+    _require_host(host_name)
+    return {
+        "status": "success",
+        "host": host_name,
+        "drain": await get_agent_manager().drain_host(host_name)
+    }
+
+@router.post("/hosts/{host_name}/undrain")
+async def undrain_host(
+    host_name: str,
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Make a drained host schedulable again
+    """
+    _require_host(host_name)
+    get_agent_manager().undrain_host(host_name)
+    return {
+        "status": "success",
+        "host": host_name
+    }
+
+@router.get("/readiness/stats")
+async def get_readiness_stats(
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Readiness latency of deploys and example-cache reuse
+    """
+    manager = get_agent_manager()
+    return {
+        "status": "success",
+        "stats": {
+            **manager.readiness_stats.to_dict(),
+            "warmup_cache": manager.warmup_cache.stats()
+        }
+    }
+
+@router.get("/cold-starts/stats")
+async def get_cold_start_stats(
+    agent_id: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Idle stops and cold-start wake counts and durations, overall or for one agent
+    """
+    return {
+        "status": "success",
+        "stats": get_agent_manager().cold_start_stats.to_dict(agent_id)
+    }
+
+@router.get("/loaded/stats")
+async def get_loaded_agent_stats(
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Agents loaded into this API process, with their measured memory
+    """
+    return {
+        "status": "success",
+        "stats": get_agent_loader().stats()
+    }
+
+@router.post("/{agent_id}/unload")
+async def unload_agent(
+    agent_id: str,
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Stop an in-process agent's UI server and drop its module
+    """
+    if not await get_agent_loader().unload(agent_id):
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": {
+                    "message": f"Agent {agent_id} is not loaded",
+                    "code": "AGENT_NOT_LOADED"
+                },
+                "status": "error"
+            }
+        )
+    return {
+        "status": "success",
+        "agent_id": agent_id
+    }
+
+@router.post("/{agent_id}/predict")
+async def predict(
+    agent_id: str,
+    response: Response,
+    data: Dict[str, Any] = Body(...),
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Forward a prediction to the agent's running container
+
+    Repeated inputs are served from the result cache unless the agent opted
+    out. Single-item calls go through the micro-batcher so concurrent
+    requests can share one agent call; explicit batches are forwarded as-is.
+    Each agent call (a whole micro-batch counts once) passes the agent's
+    admission controller first; when its queue is full the callers are shed
+    with 429 and Retry-After. Queue wait and execution time are reported in
+    the Server-Timing header.
+    """
+    if "data" not in data or not isinstance(data["data"], list):
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": {
+                    "message": "Input must contain 'data' field with a list of strings",
+                    "code": "INVALID_INPUT"
+                },
+                "status": "error"
+            }
+        )
+
+    async def compute() -> Dict[str, Any]:
+        # Admission is per agent call: a micro-batch holds one slot for all of its items
+        timing = Admission()
+        try:
+            if len(data["data"]) == 1:
+                return await get_micro_batcher().submit(agent_id, data["data"][0], timing)
+            async with get_admission_controller().admit(agent_id) as timing:
+                return await get_agent_proxy().forward(agent_id, {"data": data["data"]})
+        finally:
+            response.headers["Server-Timing"] = (
+                f"queue;dur={timing.queue_wait * 1000:.1f}, exec;dur={timing.execution * 1000:.1f}"
+            )
+
+    metadata = lookup_agent_metadata(agent_id)
+    try:
+        return await get_result_cache().get_or_compute(
+            agent_id,
+            result_version(metadata),
+            data["data"],
+            compute,
+            cacheable=settings.RESULT_CACHE_ENABLED and metadata.get("cacheable", True)
+        )
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail={
+                "error": {
+                    "message": str(e),
+                    "code": e.code
+                },
+                "status": "error"
+            },
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except AgentProxyError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail={
+                "error": {
+                    "message": str(e),
+                    "code": e.code
+                },
+                "status": "error"
+            }
+        )
+
+@router.post("/{agent_id}/jobs", status_code=202)
+async def submit_prediction_job(
+    agent_id: str,
+    data: Dict[str, Any] = Body(...),
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Queue a prediction and return its job id right away
+
+    Poll the status endpoint for the result, or pass callback_url to have
+    the finished job POSTed there; callbacks to internal addresses are refused.
+    """
+    if "data" not in data or not isinstance(data["data"], list):
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": {
+                    "message": "Input must contain 'data' field with a list of strings",
+                    "code": "INVALID_INPUT"
+                },
+                "status": "error"
+            }
+        )
+    if not lookup_agent_metadata(agent_id):
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": {
+                    "message": f"Agent '{agent_id}' not found",
+                    "code": "AGENT_NOT_FOUND"
+                },
+                "status": "error"
+            }
+        )
+
+    try:
+        job = await get_prediction_jobs().submit(agent_id, data["data"], current_user.id, data.get("callback_url"))
+    except CallbackRejected as e:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": {
+                    "message": str(e),
+                    "code": e.code
+                },
+                "status": "error"
+            }
+        )
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail={
+                "error": {
+                    "message": str(e),
+                    "code": e.code
+                },
+                "status": "error"
+            },
+            headers={"Retry-After": "30"}
+        )
+
+    return {
+        "status": "accepted",
+        "job_id": job["job_id"],
+        "agent_id": agent_id,
+        "status_endpoint": f"/api/v1/jobs/{job['job_id']}"
+    }
+
+@router.get("/jobs/stats")
+async def get_prediction_job_stats(
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Queued and running prediction jobs per agent, outcomes and callback deliveries
+    """
+    return {
+        "status": "success",
+        "stats": get_prediction_jobs().stats()
+    }
+
+@router.get("/batching/stats")
+async def get_batching_stats(
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Micro-batches sent per agent and their average size
+    """
+    return {
+        "status": "success",
+        "stats": get_micro_batcher().stats()
+    }
+
+@router.get("/admission/stats")
+async def get_admission_stats(
+    agent_id: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    In-flight and queued calls per agent, shed counts, and queue-wait vs execution latency
+    """
+    return {
+        "status": "success",
+        "stats": get_admission_controller().stats(agent_id)
+    }
+
+@router.get("/cache/stats")
+async def get_result_cache_stats(
+    agent_id: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Prediction cache hit, miss and coalesce counts per agent
+    """
+    return {
+        "status": "success",
+        "stats": get_result_cache().stats(agent_id)
+    }
@@ -4,6 +4,7 @@ from supabase import create_client, Client
 from typing import Any
 
 from app.core.config import settings
+from app.core.security import TokenVerifier, InvalidToken
 from app.schemas.token import Token
 from app.schemas.user import User
 
@@ -11,6 +12,20 @@ router = APIRouter()
 supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+def _check_revocation(token: str) -> None:
+    """Ask Supabase whether the token is still valid (blocking)"""
+    response = supabase.auth.get_user(token)
+    if response is None or response.user is None:
+        raise InvalidToken("Unknown user")
+
+token_verifier = TokenVerifier(
+    secret=settings.SUPABASE_JWT_SECRET,
+    audience=settings.AUTH_JWT_AUDIENCE or None,
+    max_entries=settings.AUTH_CLAIMS_CACHE_SIZE,
+    revocation_interval=settings.AUTH_REVOCATION_CHECK_INTERVAL,
+    remote_check=_check_revocation
+)
+
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends()
@@ -55,11 +70,17 @@ async def signup(
 async def get_current_user(
     token: str = Depends(oauth2_scheme)
 ) -> User:
+    """
+    Resolve the bearer token to a user without a network round trip
+
+    Claims are verified locally and cached until the token expires; see
+    TokenVerifier for the periodic remote revocation check.
+    """
     try:
-        user = supabase.auth.get_user(token)
+        claims = await token_verifier.authenticate(token)
         return User(
-            id=user.id,
-            email=user.email,
+            id=claims["sub"],
+            email=claims.get("email"),
             is_active=True
         )
     except Exception as e:
@@ -10,13 +10,18 @@ backend_dir = Path(__file__).parent.parent.parent.parent.parent
 sys.path.append(str(backend_dir))
 
 from test import create_app, api_interface
+from app.core.ui_mounts import get_ui_mounts
 
 router = APIRouter()
 security = HTTPBearer()
 
-# Create and launch the Gradio app
+# Build the Gradio app; it is mounted on the main server at startup
 demo = create_app()
-app = demo.launch(prevent_thread_lock=True, server_port=7860)
+DEMO_ID = "text_analyzer"
+
+@router.on_event("startup")
+async def mount_demo():
+    get_ui_mounts().mount(DEMO_ID, demo)
 
 @router.post("/predict")
 async def predict(
@@ -64,7 +69,7 @@ async def get_gradio_app():
     """Get the Gradio app URL and status"""
     return {
         "message": "Gradio Text Analyzer is running",
-        "url": "http://localhost:7860",
-        "status": "active",
+        "url": get_ui_mounts().path_for(DEMO_ID),
+        "status": "active" if DEMO_ID in get_ui_mounts() else "inactive",
         "description": "Access the URL to use the text analyzer interface"
     } 
\ No newline at end of file
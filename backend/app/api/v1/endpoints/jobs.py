@@ -0,0 +1,34 @@
+from fastapi import APIRouter, HTTPException, Depends
+from typing import Dict, Any
+
+from app.api.v1.endpoints.auth import get_current_user
+from app.schemas.user import User
+from app.core.prediction_jobs import get_prediction_jobs, public_view
+
+router = APIRouter()
+
+@router.get("/{job_id}")
+async def get_prediction_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Status of an asynchronous prediction job, with its result once finished
+    """
+    job = await get_prediction_jobs().get(job_id)
+    if job is None or job["owner_id"] != current_user.id:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": {
+                    "message": f"Prediction job '{job_id}' not found",
+                    "code": "JOB_NOT_FOUND"
+                },
+                "status": "error"
+            }
+        )
+
+    return {
+        "status": "success",
+        "job": public_view(job)
+    }
@@ -0,0 +1,185 @@
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Deque, AsyncIterator, List
+from functools import lru_cache
+import asyncio
+import math
+import statistics
+import time
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+STATS_WINDOW = 500
+
+
+class AdmissionRejected(Exception):
+    """Request shed before reaching the agent"""
+    status_code = 429
+    code = "AGENT_OVERLOADED"
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AgentOverloaded(AdmissionRejected):
+    code = "AGENT_OVERLOADED"
+
+
+class QueueTimeout(AdmissionRejected):
+    code = "AGENT_QUEUE_TIMEOUT"
+
+
+@dataclass
+class Admission:
+    queue_wait: float = 0.0
+    execution: float = 0.0
+
+
+@dataclass
+class _AgentGate:
+    inflight: int = 0
+    waiters: Deque[asyncio.Future] = field(default_factory=deque)
+    admitted: int = 0
+    rejected: int = 0
+    timed_out: int = 0
+    avg_execution: float = 0.0
+    queue_waits: Deque[float] = field(default_factory=lambda: deque(maxlen=STATS_WINDOW))
+    executions: Deque[float] = field(default_factory=lambda: deque(maxlen=STATS_WINDOW))
+
+
+def _percentiles(values: Deque[float]) -> Dict[str, Optional[float]]:
+    ordered: List[float] = sorted(values)
+    if not ordered:
+        return {"p50_ms": None, "p95_ms": None}
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(ordered[max(int(len(ordered) * 0.95) - 1, 0)] * 1000, 2)
+    }
+
+
+class AdmissionController:
+    """
+    Per-agent limit on in-flight calls with a bounded FIFO wait queue
+
+    Up to max_inflight calls per agent run at once; up to max_queue more
+    wait, each for at most queue_timeout seconds. Anything beyond that is
+    shed immediately with a Retry-After estimate, so a slow agent only
+    holds a bounded share of the API's connections and workers. Time spent
+    queued and time spent executing are recorded separately.
+    """
+
+    def __init__(self, max_inflight: int, max_queue: int, queue_timeout: float):
+        self.max_inflight = max(max_inflight, 1)
+        self.max_queue = max(max_queue, 0)
+        self.queue_timeout = queue_timeout
+        self._gates: Dict[str, _AgentGate] = {}
+
+    def _gate(self, agent_id: str) -> _AgentGate:
+        gate = self._gates.get(agent_id)
+        if gate is None:
+            gate = self._gates[agent_id] = _AgentGate()
+        return gate
+
+    def _retry_after(self, gate: _AgentGate) -> int:
+        """
+        Seconds until a slot is likely free: queued rounds times the average call
+        """
+        rounds = math.ceil((len(gate.waiters) + 1) / self.max_inflight)
+        estimate = rounds * (gate.avg_execution or 1.0)
+        return int(min(max(math.ceil(estimate), 1), 60))
+
+    def _release(self, gate: _AgentGate) -> None:
+        # Hand the slot straight to the next live waiter
+        while gate.waiters:
+            waiter = gate.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        gate.inflight -= 1
+
+    async def _acquire(self, agent_id: str, gate: _AgentGate) -> None:
+        if gate.inflight < self.max_inflight and not gate.waiters:
+            gate.inflight += 1
+            return
+        if len(gate.waiters) >= self.max_queue:
+            gate.rejected += 1
+            raise AgentOverloaded(
+                f"Agent '{agent_id}' is at capacity, try again later",
+                self._retry_after(gate)
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        gate.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter in gate.waiters:
+                gate.waiters.remove(waiter)
+            gate.timed_out += 1
+            raise QueueTimeout(
+                f"Agent '{agent_id}' did not accept the request within {self.queue_timeout}s",
+                self._retry_after(gate)
+            )
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the caller went away
+                self._release(gate)
+            elif waiter in gate.waiters:
+                gate.waiters.remove(waiter)
+            raise
+
+    @asynccontextmanager
+    async def admit(self, agent_id: str) -> AsyncIterator[Admission]:
+        """
+        Hold one of the agent's execution slots; raises AdmissionRejected when shed
+        """
+        gate = self._gate(agent_id)
+        admission = Admission()
+        started = time.perf_counter()
+        await self._acquire(agent_id, gate)
+        admission.queue_wait = time.perf_counter() - started
+        gate.admitted += 1
+        gate.queue_waits.append(admission.queue_wait)
+        executing = time.perf_counter()
+        try:
+            yield admission
+        finally:
+            admission.execution = time.perf_counter() - executing
+            gate.executions.append(admission.execution)
+            gate.avg_execution = 0.8 * gate.avg_execution + 0.2 * admission.execution \
+                if gate.avg_execution else admission.execution
+            self._release(gate)
+
+    def stats(self, agent_id: Optional[str] = None) -> Dict[str, Any]:
+        def describe(gate: _AgentGate) -> Dict[str, Any]:
+            return {
+                "inflight": gate.inflight,
+                "queued": len(gate.waiters),
+                "admitted": gate.admitted,
+                "rejected": gate.rejected,
+                "timed_out": gate.timed_out,
+                "queue_wait": _percentiles(gate.queue_waits),
+                "execution": _percentiles(gate.executions)
+            }
+
+        limits = {
+            "max_inflight": self.max_inflight,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout
+        }
+        if agent_id is not None:
+            return {**limits, "agents": {agent_id: describe(self._gates.get(agent_id) or _AgentGate())}}
+        return {**limits, "agents": {agent_id: describe(gate) for agent_id, gate in self._gates.items()}}
+
+
+@lru_cache()
+def get_admission_controller() -> AdmissionController:
+    return AdmissionController(
+        max_inflight=settings.AGENT_MAX_INFLIGHT,
+        max_queue=settings.AGENT_MAX_QUEUE,
+        queue_timeout=settings.AGENT_QUEUE_TIMEOUT or settings.AGENT_DEFAULT_TIMEOUT
+    )
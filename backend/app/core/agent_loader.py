@@ -0,0 +1,169 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+from functools import lru_cache
+import asyncio
+import gc
+import importlib.util
+import sys
+import time
+import tracemalloc
+from app.core.ui_mounts import get_ui_mounts
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Module name prefix for in-process agents; each load gets a unique name
+AGENT_MODULE_PREFIX = "smart_minions_agent"
+
+
+class AgentLoadError(Exception):
+    """Raised when an agent module cannot be imported or exposes no Gradio app"""
+
+
+@dataclass
+class LoadedAgent:
+    agent_id: str
+    module_name: str
+    module: Any
+    demo: Any
+    url: Optional[str]
+    content_hash: Optional[str]
+    memory_bytes: int
+    loaded_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "agent_id": self.agent_id,
+            "module": self.module_name,
+            "url": self.url,
+            "content_hash": self.content_hash,
+            "memory_bytes": self.memory_bytes,
+            "loaded_at": self.loaded_at
+        }
+
+
+class AgentLoader:
+    """
+    Imports lightweight agents into the API process, one module namespace each
+
+    Agents are loaded from their file path under a unique module name rather
+    than through sys.path, so two agents both called agent.py never share a
+    cached module. The agent's Gradio UI is mounted on the main app rather
+    than served on its own port; unloading unmounts it and drops the module.
+    Memory is measured with tracemalloc while the agent loads, which counts
+    what the agent itself allocates on top of shared libraries.
+    """
+
+    def __init__(self):
+        self._agents: Dict[str, LoadedAgent] = {}
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    def get(self, agent_id: str) -> Optional[LoadedAgent]:
+        return self._agents.get(agent_id)
+
+    def __contains__(self, agent_id: str) -> bool:
+        return agent_id in self._agents
+
+    def _module_name(self, agent_id: str) -> str:
+        self._generation += 1
+        safe_id = "".join(c if c.isalnum() else "_" for c in agent_id)
+        return f"{AGENT_MODULE_PREFIX}_{safe_id}_{self._generation}"
+
+    def _import(self, module_name: str, code_path: Path) -> Any:
+        spec = importlib.util.spec_from_file_location(module_name, code_path)
+        if spec is None or spec.loader is None:
+            raise AgentLoadError(f"Cannot import agent from {code_path}")
+        module = importlib.util.module_from_spec(spec)
+        # Registered so pickling, dataclasses and typing can resolve the module
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            sys.modules.pop(module_name, None)
+            raise
+        return module
+
+    def _import_demo(self, agent_id: str, module_name: str, code_path: Path) -> Tuple[Any, Any]:
+        module = self._import(module_name, code_path)
+        demo = getattr(module, "demo", None)
+        if demo is None:
+            sys.modules.pop(module_name, None)
+            raise AgentLoadError(f"Agent {agent_id} does not define a Gradio `demo`")
+        return module, demo
+
+    def _release(self, loaded: LoadedAgent) -> None:
+        get_ui_mounts().unmount(loaded.agent_id)
+        sys.modules.pop(loaded.module_name, None)
+        gc.collect()
+
+    async def load(self, agent_id: str, code_path: Path, content_hash: Optional[str] = None) -> LoadedAgent:
+        """
+        Import (or re-import) an agent and mount its UI on the main app
+        """
+        async with self._lock:
+            previous = self._agents.pop(agent_id, None)
+            if previous is not None:
+                self._release(previous)
+
+            # Loads are serialized: tracemalloc is process-wide, so only one
+            # measurement can be in progress at a time
+            module_name = self._module_name(agent_id)
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            try:
+                baseline, _ = tracemalloc.get_traced_memory()
+                module, demo = await asyncio.to_thread(self._import_demo, agent_id, module_name, code_path)
+                try:
+                    path = get_ui_mounts().mount(agent_id, demo)
+                except BaseException:
+                    sys.modules.pop(module_name, None)
+                    raise
+                current, _ = tracemalloc.get_traced_memory()
+            finally:
+                if started_tracing:
+                    tracemalloc.stop()
+
+            loaded = LoadedAgent(
+                agent_id=agent_id,
+                module_name=module_name,
+                module=module,
+                demo=demo,
+                url=path,
+                content_hash=content_hash,
+                memory_bytes=max(current - baseline, 0)
+            )
+            self._agents[agent_id] = loaded
+            logger.info(f"Loaded agent {agent_id} as {module_name} ({loaded.memory_bytes} bytes)")
+            return loaded
+
+    async def unload(self, agent_id: str) -> bool:
+        """
+        Unmount an agent's UI and drop its module; False if it was not loaded
+        """
+        async with self._lock:
+            loaded = self._agents.pop(agent_id, None)
+            if loaded is None:
+                return False
+            self._release(loaded)
+            logger.info(f"Unloaded agent {agent_id}")
+            return True
+
+    async def close(self) -> None:
+        for agent_id in list(self._agents):
+            await self.unload(agent_id)
+
+    def stats(self) -> Dict[str, Any]:
+        agents = [loaded.to_dict() for loaded in self._agents.values()]
+        return {
+            "loaded": len(agents),
+            "total_memory_bytes": sum(agent["memory_bytes"] for agent in agents),
+            "agents": sorted(agents, key=lambda agent: agent["memory_bytes"], reverse=True)
+        }
+
+
+@lru_cache()
+def get_agent_loader() -> AgentLoader:
+    return AgentLoader()
@@ -1,111 +1,1015 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable, List, Deque, AsyncIterator, Tuple, Set, Awaitable
+from functools import lru_cache
+import asyncio
+import statistics
+import tempfile
+import time
 import docker
-import json
-import gradio as gr
-from app.core.config import Settings
+import httpx
+from app.core.config import Settings, settings
+from app.core.deploy_queue import DeployQueue, DeployJob, DeployStage
+from app.core.runtime_pool import RuntimePool, RUNTIME_IMAGE, RUNTIME_BASE_REQUIREMENTS, RUNTIME_LABEL
+from app.core.build_cache import BuildCache, BUILDER_IMAGE
+from app.core.replicas import ReplicaSet, Replica, ReplicaBackend
+from app.core.deployment_registry import DeploymentRegistry
+from app.core.container_status import ContainerStatusCache
+from app.core.telemetry import ResourceCollector
+from app.core.scheduler import HostScheduler, Host, NoCapacity, Placement, hosts_from_settings
+from app.core.image_gc import ImageCollector, ImageGarbageCollector
+from app.core.warmup_cache import WarmupCache, agent_version
+from app.core.result_cache import get_result_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
-class AgentManager:
-    def __init__(self, settings: Settings):
+AGENT_LABEL = "smart-minions.agent"
+AGENT_IMAGE_PREFIX = "smart-minions/agent-"
+READY_PATH = "/ready"
+
+class ColdStartStats:
+    """
+    Counts and recent durations of idle stops and cold-start wakes
+    """
+
+    def __init__(self, window: int = 200):
+        self.reaped = 0
+        self.cold_starts = 0
+        self.failures = 0
+        self._durations: Deque[float] = deque(maxlen=window)
+        self._per_agent: Dict[str, Dict[str, Any]] = {}
+
+    def _agent(self, agent_id: str) -> Dict[str, Any]:
+        return self._per_agent.setdefault(agent_id, {"reaped": 0, "cold_starts": 0, "failures": 0, "last_ms": None})
+
+    def record_reap(self, agent_id: str) -> None:
+        self.reaped += 1
+        self._agent(agent_id)["reaped"] += 1
+
+    def record_cold_start(self, agent_id: str, seconds: float) -> None:
+        self.cold_starts += 1
+        self._durations.append(seconds)
+        agent = self._agent(agent_id)
+        agent["cold_starts"] += 1
+        agent["last_ms"] = round(seconds * 1000, 1)
+
+    def record_failure(self, agent_id: str) -> None:
+        self.failures += 1
+        self._agent(agent_id)["failures"] += 1
+
+    def to_dict(self, agent_id: Optional[str] = None) -> Dict[str, Any]:
+        if agent_id is not None:
+            return {"agent_id": agent_id, **self._agent(agent_id)}
+        durations = sorted(self._durations)
+        return {
+            "reaped": self.reaped,
+            "cold_starts": self.cold_starts,
+            "failures": self.failures,
+            "p50_ms": round(statistics.median(durations) * 1000, 1) if durations else None,
+            "p95_ms": round(durations[max(int(len(durations) * 0.95) - 1, 0)] * 1000, 1) if durations else None,
+            "max_ms": round(durations[-1] * 1000, 1) if durations else None
+        }
+
+class ReadinessStats:
+    """
+    Time from container start to a passing readiness probe, per deploy
+    """
+
+    def __init__(self, window: int = 200):
+        self.deploys = 0
+        self.failures = 0
+        self._durations: Deque[float] = deque(maxlen=window)
+        self._per_agent: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, agent_id: str, seconds: float, warm: bool) -> None:
+        self.deploys += 1
+        self._durations.append(seconds)
+        self._per_agent[agent_id] = {"last_ms": round(seconds * 1000, 1), "warmup_cache": "hit" if warm else "miss"}
+
+    def record_failure(self, agent_id: str) -> None:
+        self.failures += 1
+        self._per_agent[agent_id] = {"last_ms": None, "warmup_cache": None, "failed": True}
+
+    def to_dict(self) -> Dict[str, Any]:
+        durations = sorted(self._durations)
+        return {
+            "deploys": self.deploys,
+            "failures": self.failures,
+            "p50_ms": round(statistics.median(durations) * 1000, 1) if durations else None,
+            "p95_ms": round(durations[max(int(len(durations) * 0.95) - 1, 0)] * 1000, 1) if durations else None,
+            "agents": self._per_agent
+        }
+
+class AgentManager(ReplicaBackend):
+    def __init__(
+        self,
+        settings: Settings,
+        docker_client: Optional[Any] = None,
+        registry: Optional[DeploymentRegistry] = None,
+        hosts: Optional[List[Host]] = None
+    ):
         self.settings = settings
+        self.registry = registry
         self.agents_dir = Path("agents")
         self.agents_dir.mkdir(exist_ok=True)
-        self.docker_client = docker.from_env()
+        # The first host is local: images are built and warm runtimes pooled there
+        self.docker_client = docker_client or (hosts[0].client if hosts else docker.from_env())
+        self.scheduler = HostScheduler(hosts or hosts_from_settings(settings, self.docker_client))
         self._running_agents: Dict[str, Any] = {}
+        self.deploy_queue = DeployQueue(
+            self._run_deploy_job,
+            max_size=settings.AGENT_DEPLOY_QUEUE_SIZE,
+            workers=settings.AGENT_MAX_CONCURRENT_BUILDS
+        )
+        self.runtime_pool = RuntimePool(settings, self.docker_client, self.agents_dir / ".runtime")
+        self.image_gc = ImageGarbageCollector(
+            {
+                name: ImageCollector(
+                    host.client,
+                    settings.AGENT_IMAGE_DISK_BUDGET_MB * 1024 * 1024,
+                    self.agents_dir / ".image-usage" / f"{name}.json",
+                    pinned=[RUNTIME_IMAGE, BUILDER_IMAGE]
+                )
+                for name, host in self.scheduler.hosts.items()
+            },
+            settings.AGENT_IMAGE_GC_INTERVAL
+        )
+        self.build_cache = BuildCache(
+            self.docker_client,
+            self.agents_dir / ".build-cache",
+            Path(settings.AGENT_WHEELHOUSE_DIR),
+            on_image_used=self.image_gc.collectors[self.scheduler.default.name].touch
+        )
+        self.cold_start_stats = ColdStartStats()
+        self.readiness_stats = ReadinessStats()
+        self.warmup_cache = WarmupCache(self.agents_dir / ".warmup")
+        self._agent_locks: Dict[str, asyncio.Lock] = {}
+        self._reaper_task: Optional[asyncio.Task] = None
+        self._replica_sets: Dict[str, ReplicaSet] = {}
+        self._autoscaler_task: Optional[asyncio.Task] = None
+        # One-off follow-up work (stale container removal, example cache capture); finished
+        # before shutdown stops containers
+        self._background: Set[asyncio.Task] = set()
+        self._draining = False
+        self.status_caches = {
+            name: ContainerStatusCache(host.client, RUNTIME_LABEL, settings.AGENT_STATUS_RESYNC_INTERVAL)
+            for name, host in self.scheduler.hosts.items()
+        }
+        self.telemetry = ResourceCollector(
+            self.scheduler.client_for,
+            self._managed_containers,
+            settings.AGENT_TELEMETRY_INTERVAL,
+            settings.AGENT_TELEMETRY_SAMPLES
+        )
+
+    async def start(self) -> None:
+        """
+        Restore deployments, then start background work (container status
+        cache, resource telemetry, image GC, warm runtime pool, idle reaper,
+        autoscaler)
+        """
+        await self.reconcile()
+        await asyncio.gather(*(cache.start() for cache in self.status_caches.values()))
+        await self.telemetry.start()
+        await self.image_gc.start()
+        self.runtime_pool.refill()
+        if self._reaper_task is None and self.settings.AGENT_IDLE_TIMEOUT > 0:
+            self._reaper_task = asyncio.create_task(self._reaper_loop())
+        if self._autoscaler_task is None and self.settings.AGENT_AUTOSCALE_INTERVAL > 0:
+            self._autoscaler_task = asyncio.create_task(self._autoscaler_loop())
+
+    def _spawn(self, work: Awaitable[None]) -> None:
+        task = asyncio.ensure_future(work)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def submit_deploy(self, agent_id: str, code_path: Path, metadata: Dict[str, Any]) -> DeployJob:
+        """
+        Queue a deploy and return the job immediately
+        """
+        return self.deploy_queue.submit(agent_id, code_path, metadata)
+
+    def get_deploy_job(self, job_id: str) -> Optional[DeployJob]:
+        """
+        Look up a deploy job by id
+        """
+        return self.deploy_queue.get(job_id)
+
+    async def _run_deploy_job(self, job: DeployJob) -> Dict[str, Any]:
+        return await self.deploy_agent(job.agent_id, job.code_path, job.metadata, on_stage=job.advance)
 
-    async def deploy_agent(self, agent_id: str, code_path: Path, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    async def deploy_agent(
+        self,
+        agent_id: str,
+        code_path: Path,
+        metadata: Dict[str, Any],
+        on_stage: Optional[Callable[[DeployStage], None]] = None
+    ) -> Dict[str, Any]:
         """
         Deploy an agent using Docker
+
+        Agents without extra requirements are loaded into a warm runtime from
+        the pool; the rest get their own image. The blocking docker SDK calls
+        run in worker threads so a build never stalls the event loop. The
+        agent only becomes routable once it passes its readiness probe; a
+        stored example cache for this version is copied in before it starts.
+        A redeploy drains and removes the previous containers once the new
+        one has taken over.
         """
         try:
-            # Build Docker image
-            dockerfile_content = f"""
-FROM python:3.9-slim
-WORKDIR /app
-COPY {code_path.name} /app/
-COPY requirements.txt /app/
-RUN pip install -r requirements.txt
-EXPOSE 7860
-CMD ["python", "{code_path.name}"]
-"""
-            docker_path = code_path.parent / "Dockerfile"
-            with open(docker_path, "w") as f:
-                f.write(dockerfile_content)
-
-            # Build and run container
-            image_name = f"smart-minions/agent-{agent_id}"
-            self.docker_client.images.build(
-                path=str(code_path.parent),
-                tag=image_name,
-                rm=True
-            )
-
-            container = self.docker_client.containers.run(
-                image_name,
-                detach=True,
-                ports={'7860/tcp': None},  # Random port
-                mem_limit=f"{self.settings.AGENT_MAX_MEMORY}m",
-                cpu_count=self.settings.AGENT_DEFAULT_CPU
-            )
+            requirements = metadata.get("requirements") or []
+            version = await self._version_of(code_path)
+            warmup = await asyncio.to_thread(self.warmup_cache.get, agent_id, version) if version else None
+            if not requirements and self.runtime_pool.size > 0:
+                if on_stage:
+                    on_stage(DeployStage.STARTING)
+                starting = time.monotonic()
+                runtime = await self.runtime_pool.acquire()
+                await self._load_runtime(runtime, agent_id, metadata, code_path, warmup)
+                deployment_info = {
+                    "container_id": runtime["container_id"],
+                    "image_name": RUNTIME_IMAGE,
+                    "host_port": runtime["host_port"],
+                    "status": "running",
+                    "url": runtime["url"],
+                    "host": self.scheduler.default.name,
+                    "runtime": "warm_pool"
+                }
+            else:
+                if on_stage:
+                    on_stage(DeployStage.BUILDING)
+                image_name = await asyncio.to_thread(self._build_image, agent_id, code_path, requirements)
 
-            # Get container info
-            container_info = container.attrs
-            host_port = list(container_info['NetworkSettings']['Ports']['7860/tcp'])[0]['HostPort']
+                if on_stage:
+                    on_stage(DeployStage.STARTING)
+                starting = time.monotonic()
+                deployment_info = await self._launch(image_name, agent_id, metadata, warmup)
 
-            deployment_info = {
-                "container_id": container.id,
-                "image_name": image_name,
-                "host_port": host_port,
-                "status": "running",
-                "url": f"http://localhost:{host_port}"
-            }
+            if on_stage:
+                on_stage(DeployStage.WARMING)
+            try:
+                await self._wait_until_ready(deployment_info["url"], starting + self.settings.AGENT_READY_TIMEOUT)
+            except Exception:
+                self.readiness_stats.record_failure(agent_id)
+                await asyncio.to_thread(self._remove_container, deployment_info["container_id"])
+                raise
+            readiness = time.monotonic() - starting
+            self.readiness_stats.record(agent_id, readiness, warmup is not None)
+            deployment_info["version"] = version
+            deployment_info["readiness_ms"] = round(readiness * 1000, 1)
+            deployment_info["warmup_cache"] = "hit" if warmup is not None else "miss"
+            if version and warmup is None:
+                self._spawn(self._capture_warmup(agent_id, deployment_info["container_id"], version))
 
             # Store deployment info
+            deployment_info["metadata"] = metadata
+            deployment_info["code_path"] = str(code_path)
+            deployment_info["last_used"] = time.monotonic()
             self._running_agents[agent_id] = deployment_info
-            
+            get_result_cache().invalidate(agent_id)
+
+            replica_set = self._new_replica_set(agent_id, metadata)
+            replica_set.add(Replica(
+                deployment_info["container_id"],
+                deployment_info["url"],
+                deployment_info["host_port"]
+            ))
+            previous = self._replica_sets.get(agent_id)
+            self._replica_sets[agent_id] = replica_set
+            if previous is not None:
+                await previous.drain_all()
+            if replica_set.min_replicas > 1:
+                await replica_set.autoscale()
+            await self._persist(agent_id)
+
             return deployment_info
 
         except Exception as e:
             logger.error(f"Failed to deploy agent {agent_id}: {str(e)}")
             raise
 
+    def _new_replica_set(self, agent_id: str, metadata: Dict[str, Any]) -> ReplicaSet:
+        return ReplicaSet(
+            agent_id,
+            self,
+            min_replicas=int(metadata.get("min_replicas") or 1),
+            max_replicas=int(metadata.get("max_replicas") or 1),
+            target_concurrency=self.settings.AGENT_REPLICA_TARGET_CONCURRENCY,
+            scale_down_delay=self.settings.AGENT_SCALE_DOWN_DELAY,
+            drain_timeout=self.settings.AGENT_REPLICA_DRAIN_TIMEOUT
+        )
+
+    async def _persist(self, agent_id: str) -> None:
+        """
+        Write an agent's deployment state to the registry (failures are only logged)
+        """
+        if self.registry is None:
+            return
+        try:
+            info = self._running_agents.get(agent_id)
+            if info is None:
+                await asyncio.to_thread(self.registry.remove, agent_id)
+                return
+            replica_set = self._replica_sets.get(agent_id)
+            replicas = [
+                {"container_id": replica.container_id, "host_port": replica.host_port, "url": replica.url}
+                for replica in (replica_set.replicas if replica_set else [])
+            ]
+            await asyncio.to_thread(self.registry.save, agent_id, info, replicas)
+        except Exception as e:
+            logger.error(f"Failed to persist deployment of {agent_id}: {str(e)}")
+
+    def _list_agent_containers(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Containers (running or stopped) created by this service on every host (blocking)
+        """
+        containers = {}
+        for host in self.scheduler.hosts.values():
+            try:
+                listing = host.client.containers.list(all=True, filters={"label": RUNTIME_LABEL})
+            except Exception as e:
+                logger.error(f"Failed to list containers on host {host.name}: {str(e)}")
+                continue
+            for container in listing:
+                # Read from the listing's attrs: container.image would cost an API call each
+                config = container.attrs.get("Config") or {}
+                limits = container.attrs.get("HostConfig") or {}
+                ports = (container.attrs.get("NetworkSettings") or {}).get("Ports") or {}
+                bindings = ports.get("7860/tcp") or []
+                containers[container.id] = {
+                    "status": container.status,
+                    "host": host.name,
+                    "host_port": bindings[0]["HostPort"] if bindings else None,
+                    "labels": config.get("Labels") or {},
+                    "image": config.get("Image") or "",
+                    "memory_mb": (limits.get("Memory") or 0) // (1024 * 1024) or self.settings.AGENT_MAX_MEMORY,
+                    "cpus": (limits.get("NanoCpus") or 0) / 1e9 or self.settings.AGENT_DEFAULT_CPU
+                }
+        return containers
+
+    @staticmethod
+    def _agent_id_for(container: Dict[str, Any]) -> Optional[str]:
+        agent_id = container["labels"].get(AGENT_LABEL)
+        if agent_id:
+            return agent_id
+        if container["image"].startswith(AGENT_IMAGE_PREFIX):
+            return container["image"][len(AGENT_IMAGE_PREFIX):].split(":")[0]
+        return None
+
+    async def reconcile(self) -> Dict[str, Any]:
+        """
+        Rebuild in-memory deployment state from the registry and live containers
+
+        Stored deployments whose primary container still exists are restored
+        as they are (stopped ones come back through a cold start). Agent
+        containers missing from the registry are adopted by their label or
+        image tag. Nothing is rebuilt, so this costs one docker listing per host.
+        Leftover idle warm-pool runtimes and replicas of lost deployments are
+        removed in the background.
+        """
+        started = time.monotonic()
+        summary = {"restored": 0, "adopted": 0, "dropped": 0, "removed_containers": 0}
+        records = await asyncio.to_thread(self.registry.load_all) if self.registry is not None else []
+        live = await asyncio.to_thread(self._list_agent_containers)
+        # Running containers occupy their host until removed, leftovers included;
+        # stopped ones are only located and get placed again when woken
+        for container_id, container in live.items():
+            if container["status"] != "running":
+                self.scheduler.locate(container["host"], container_id)
+                continue
+            self.scheduler.assign(
+                container["host"], container_id, self._agent_id_for(container) or "",
+                container["memory_mb"], container["cpus"]
+            )
+        claimed = set()
+        to_remove = []
+
+        def restore(agent_id: str, base: Dict[str, Any], members: List[Dict[str, Any]]) -> None:
+            primary, extras = members[0], members[1:]
+            running = live[primary["container_id"]]["status"] == "running"
+            replica_set = self._new_replica_set(agent_id, base.get("metadata") or {})
+            for member in [primary] + extras:
+                container = live[member["container_id"]]
+                if member is not primary and container["status"] != "running":
+                    to_remove.append(member["container_id"])
+                    continue
+                host_port = container["host_port"] or member.get("host_port")
+                replica_set.add(Replica(
+                    member["container_id"],
+                    self.scheduler.url_for(member["container_id"], host_port),
+                    host_port
+                ))
+                claimed.add(member["container_id"])
+            if not running:
+                # Extras cannot outlive a stopped primary
+                to_remove.extend(replica.container_id for replica in replica_set.replicas[1:])
+                del replica_set.replicas[1:]
+            head = replica_set.primary
+            self._running_agents[agent_id] = {
+                "container_id": head.container_id,
+                "image_name": base.get("image_name"),
+                "host_port": head.host_port,
+                "status": "running" if running else "stopped",
+                "url": head.url,
+                "host": self.scheduler.host_of(head.container_id).name,
+                **({"runtime": base["runtime"]} if base.get("runtime") else {}),
+                "metadata": base.get("metadata") or {},
+                "code_path": base.get("code_path"),
+                "last_used": time.monotonic()
+            }
+            self._replica_sets[agent_id] = replica_set
+
+        for record in records:
+            agent_id = record["agent_id"]
+            members = [member for member in record["replicas"] if member["container_id"] in live]
+            if not members or not members[0]["is_primary"]:
+                # The primary is gone; without it there is nothing to wake
+                to_remove.extend(member["container_id"] for member in members)
+                claimed.update(member["container_id"] for member in members)
+                await asyncio.to_thread(self.registry.remove, agent_id)
+                summary["dropped"] += 1
+                logger.warning(f"Deployment of {agent_id} lost its primary container, dropping it")
+                continue
+            restore(agent_id, record, members)
+            summary["restored"] += 1
+
+        # Labelled agent containers the registry does not know about
+        from app.core.catalog import get_agent_catalog
+
+        orphans: Dict[str, List[str]] = {}
+        for container_id, container in live.items():
+            agent_id = self._agent_id_for(container)
+            if container_id in claimed or agent_id is None:
+                continue
+            if agent_id in self._running_agents:
+                to_remove.append(container_id)
+                continue
+            orphans.setdefault(agent_id, []).append(container_id)
+        for agent_id, container_ids in orphans.items():
+            container_ids.sort(key=lambda container_id: live[container_id]["status"] != "running")
+            entry = get_agent_catalog().get(agent_id)
+            restore(agent_id, {
+                "image_name": f"{AGENT_IMAGE_PREFIX}{agent_id}",
+                "metadata": entry.metadata if entry else {},
+                "code_path": str(self.agents_dir / agent_id / "agent.py")
+            }, [{"container_id": container_id} for container_id in container_ids])
+            summary["adopted"] += 1
+
+        # Idle warm-pool runtimes from the previous process were never handed out
+        for container_id, container in live.items():
+            if container_id not in claimed and container["labels"].get(RUNTIME_LABEL) == "runtime":
+                to_remove.append(container_id)
+
+        for agent_id in self._running_agents:
+            await self._persist(agent_id)
+        if to_remove:
+            summary["removed_containers"] = len(to_remove)
+            self._spawn(self._remove_containers(to_remove))
+
+        summary["seconds"] = round(time.monotonic() - started, 3)
+        logger.info(f"Reconciled deployments with docker: {summary}")
+        return summary
+
+    async def _remove_containers(self, container_ids: List[str]) -> None:
+        for container_id in container_ids:
+            try:
+                await asyncio.to_thread(self._remove_container, container_id)
+            except Exception as e:
+                logger.warning(f"Failed to remove stale container {container_id}: {str(e)}")
+
+    def _build_image(self, agent_id: str, code_path: Path, requirements: List[str]) -> str:
+        """
+        Build the agent image on its cached dependency layer (blocking)
+        """
+        return self.build_cache.build_agent_image(
+            agent_id, code_path, RUNTIME_BASE_REQUIREMENTS + list(requirements)
+        )
+
+    def _resource_request(self, agent_id: str, metadata: Dict[str, Any]) -> Tuple[int, float]:
+        """
+        Memory (MB) and CPUs reserved for one container of an agent
+
+        Explicit metadata wins; otherwise measured usage when
+        AGENT_RIGHT_SIZE_LIMITS is on, else the configured defaults.
+        """
+        memory_mb = metadata.get("memory_mb")
+        cpus = metadata.get("cpus")
+        if self.settings.AGENT_RIGHT_SIZE_LIMITS and not (memory_mb and cpus):
+            recommendation = self.telemetry.recommend(
+                agent_id, self.settings.AGENT_MAX_MEMORY, self.settings.AGENT_DEFAULT_CPU
+            )["recommendation"]
+            if recommendation:
+                memory_mb = memory_mb or recommendation["mem_limit_mb"]
+                cpus = cpus or recommendation["cpus"]
+        return int(memory_mb or self.settings.AGENT_MAX_MEMORY), float(cpus or self.settings.AGENT_DEFAULT_CPU)
+
+    def _assign_local(self, container_id: str, agent_id: str, metadata: Dict[str, Any]) -> Tuple[int, float]:
+        """
+        Account a warm-pool runtime, which always lives on the local host
+        """
+        memory_mb, cpus = self._resource_request(agent_id, metadata)
+        self.scheduler.assign(self.scheduler.default.name, container_id, agent_id, memory_mb, cpus)
+        return memory_mb, cpus
+
+    async def _load_runtime(
+        self,
+        runtime: Dict[str, Any],
+        agent_id: str,
+        metadata: Dict[str, Any],
+        code_path: Path,
+        warmup: Optional[bytes] = None
+    ) -> None:
+        """
+        Size an acquired runtime like the agent's own container and load the agent into it
+
+        On failure the runtime is removed and its reservation released.
+        """
+        memory_mb, cpus = self._assign_local(runtime["container_id"], agent_id, metadata)
+        try:
+            await asyncio.to_thread(self.runtime_pool.apply_limits, runtime, memory_mb, cpus)
+            await asyncio.to_thread(self.runtime_pool.load_agent, runtime, code_path, warmup)
+        except Exception:
+            try:
+                await asyncio.to_thread(self._remove_container, runtime["container_id"])
+            except Exception as e:
+                self.scheduler.release(runtime["container_id"])
+                logger.warning(f"Failed to remove runtime {runtime['container_id'][:12]}: {str(e)}")
+            raise
+
+    async def _launch(
+        self,
+        image_name: str,
+        agent_id: str,
+        metadata: Dict[str, Any],
+        warmup: Optional[bytes] = None,
+        placement: Optional[Placement] = None
+    ) -> Dict[str, Any]:
+        """
+        Place a container for the agent on a host with room (unless already placed) and start it there
+        """
+        if placement is None:
+            placement = self.scheduler.place(agent_id, *self._resource_request(agent_id, metadata))
+        try:
+            container_info = await asyncio.to_thread(
+                self._start_container, image_name, agent_id, placement, warmup
+            )
+        except Exception:
+            self.scheduler.release(placement.container_id)
+            raise
+        self.scheduler.bind(placement, container_info["container_id"])
+        return container_info
+
+    def _ensure_image(self, host: Host, image_name: str) -> None:
+        """
+        Copy a locally built image to a remote host that does not have it yet (blocking)
+
+        Agent images run to gigabytes, so the tarball is spooled through a
+        temporary file and streamed to the remote daemon instead of held in memory.
+        """
+        if host is self.scheduler.default:
+            return
+        try:
+            host.client.images.get(image_name)
+            return
+        except Exception:
+            pass
+        image = self.docker_client.images.get(image_name)
+        with tempfile.TemporaryFile() as tarball:
+            for chunk in image.save(named=True):
+                tarball.write(chunk)
+            tarball.seek(0)
+            host.client.images.load(tarball)
+        logger.info(f"Copied image {image_name} to host {host.name}")
+
+    def _start_container(
+        self,
+        image_name: str,
+        agent_id: str,
+        placement: Placement,
+        warmup: Optional[bytes] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the agent container on its placed host and collect its connection info (blocking)
+        """
+        host = self.scheduler.hosts[placement.host]
+        self._ensure_image(host, image_name)
+        self.image_gc.collectors[host.name].touch(image_name)
+        container = host.client.containers.create(
+            image_name,
+            ports={'7860/tcp': None},  # Random port
+            mem_limit=f"{placement.memory_mb}m",
+            nano_cpus=int(placement.cpus * 1e9),
+            labels={RUNTIME_LABEL: "agent", AGENT_LABEL: agent_id}
+        )
+        try:
+            if warmup:
+                container.put_archive("/app", warmup)
+            container.start()
+        except Exception:
+            container.remove(force=True)
+            raise
+
+        # Get container info
+        container.reload()
+        container_info = container.attrs
+        host_port = list(container_info['NetworkSettings']['Ports']['7860/tcp'])[0]['HostPort']
+
+        return {
+            "container_id": container.id,
+            "image_name": image_name,
+            "host_port": host_port,
+            "host": host.name,
+            "status": "running",
+            "url": f"http://{host.address}:{host_port}"
+        }
+
+    async def start_replica(self, agent_id: str) -> Replica:
+        """
+        Start one more container for a deployed agent and wait until it is ready
+        """
+        info = self._running_agents[agent_id]
+        if not info.get("version"):
+            info["version"] = await self._version_of(info.get("code_path"))
+        warmup = await asyncio.to_thread(self.warmup_cache.get, agent_id, info["version"]) \
+            if info["version"] else None
+        if info.get("runtime") == "warm_pool":
+            runtime = await self.runtime_pool.acquire()
+            await self._load_runtime(runtime, agent_id, info.get("metadata") or {}, Path(info["code_path"]), warmup)
+            container_info = {**runtime}
+        else:
+            container_info = await self._launch(info["image_name"], agent_id, info.get("metadata") or {}, warmup)
+        try:
+            await self._wait_until_ready(
+                container_info["url"],
+                time.monotonic() + self.settings.AGENT_COLD_START_TIMEOUT
+            )
+        except Exception:
+            await asyncio.to_thread(self._remove_container, container_info["container_id"])
+            raise
+        return Replica(container_info["container_id"], container_info["url"], container_info["host_port"])
+
+    async def _version_of(self, code_path: Optional[Any]) -> Optional[str]:
+        """
+        Version key of the agent code, None when the code file is gone
+        """
+        if not code_path:
+            return None
+        try:
+            return await asyncio.to_thread(agent_version, Path(code_path))
+        except OSError:
+            return None
+
+    async def _capture_warmup(self, agent_id: str, container_id: str, version: str) -> None:
+        """
+        Keep a ready container's example cache for later containers of this version
+        """
+        try:
+            container = await asyncio.to_thread(self.scheduler.client_for(container_id).containers.get, container_id)
+            await asyncio.to_thread(self.warmup_cache.capture, container, agent_id, version)
+        except Exception as e:
+            logger.warning(f"Failed to store example cache of {agent_id}: {str(e)}")
+
+    async def stop_replica(self, agent_id: str, replica: Replica) -> None:
+        await asyncio.to_thread(self._remove_container, replica.container_id)
+        await self._discard_endpoint(replica.url)
+
     async def stop_agent(self, agent_id: str) -> bool:
         """
-        Stop a running agent
+        Stop a running agent and all of its replicas
         """
         try:
             if agent_id in self._running_agents:
-                container_id = self._running_agents[agent_id]["container_id"]
-                container = self.docker_client.containers.get(container_id)
-                container.stop()
-                container.remove()
+                replica_set = self._replica_sets.pop(agent_id, None)
+                container_ids = [replica.container_id for replica in replica_set.replicas] if replica_set \
+                    else [self._running_agents[agent_id]["container_id"]]
+                for container_id in container_ids:
+                    await asyncio.to_thread(self._remove_container, container_id)
                 del self._running_agents[agent_id]
+                get_result_cache().invalidate(agent_id)
+                await self._persist(agent_id)
                 return True
             return False
         except Exception as e:
             logger.error(f"Failed to stop agent {agent_id}: {str(e)}")
             return False
 
+    def _remove_container(self, container_id: str) -> None:
+        container = self.scheduler.client_for(container_id).containers.get(container_id)
+        container.stop(timeout=self.settings.AGENT_STOP_TIMEOUT)
+        container.remove()
+        self.scheduler.release(container_id)
+
+    def _cached_status(self, container_id: str) -> Optional[str]:
+        return self.status_caches[self.scheduler.host_of(container_id).name].get(container_id)
+
+    def _container_status(self, info: Dict[str, Any]) -> str:
+        """
+        Cached docker status of an agent's primary container (no docker call)
+        """
+        return self._cached_status(info["container_id"]) or info.get("status")
+
     async def get_agent_status(self, agent_id: str) -> Optional[Dict[str, Any]]:
         """
         Get the status of a running agent
+
+        Served from the events-driven status cache without calling docker.
+        """
+        info = self._running_agents.get(agent_id)
+        if info is None:
+            return None
+        replica_set = self._replica_sets.get(agent_id)
+        return {
+            "status": self._container_status(info),
+            "url": info["url"],
+            "container_id": info["container_id"],
+            "replicas": replica_set.stats() if replica_set else None
+        }
+
+    def _managed_containers(self) -> Dict[str, str]:
         """
-        if agent_id in self._running_agents:
+        Running agent containers (replicas included) mapped to their agent
+        """
+        managed = {}
+        for agent_id, info in self._running_agents.items():
+            replica_set = self._replica_sets.get(agent_id)
+            container_ids = [replica.container_id for replica in replica_set.replicas] if replica_set \
+                else [info["container_id"]]
+            for container_id in container_ids:
+                if (self._cached_status(container_id) or info.get("status")) == "running":
+                    managed[container_id] = agent_id
+        return managed
+
+    def get_agent_usage(self, agent_id: str, include_series: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Measured CPU, RSS and network usage of an agent's containers with a limit recommendation
+        """
+        if agent_id not in self._running_agents:
+            return None
+        return {
+            **self.telemetry.usage(agent_id, include_series),
+            "limits": self.telemetry.recommend(
+                agent_id, self.settings.AGENT_MAX_MEMORY, self.settings.AGENT_DEFAULT_CPU
+            )
+        }
+
+    def limit_recommendations(self) -> Dict[str, Any]:
+        """
+        Right-sized limits for every running agent and the memory they would free
+        """
+        recommendations = [
+            self.telemetry.recommend(agent_id, self.settings.AGENT_MAX_MEMORY, self.settings.AGENT_DEFAULT_CPU)
+            for agent_id in self._running_agents
+        ]
+        measured = [item for item in recommendations if item["recommendation"]]
+        return {
+            "agents": recommendations,
+            "measured": len(measured),
+            "memory_saved_mb": sum(item["memory_saved_mb"] for item in measured)
+        }
+
+    def get_agent_metadata(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Metadata an agent was deployed with
+        """
+        info = self._running_agents.get(agent_id)
+        return info.get("metadata") if info else None
+
+    async def resolve_endpoint(self, agent_id: str) -> Optional[str]:
+        """
+        Base URL of the least busy replica of an agent
+        """
+        async with self.lease_endpoint(agent_id) as url:
+            return url
+
+    @asynccontextmanager
+    async def lease_endpoint(self, agent_id: str) -> AsyncIterator[Optional[str]]:
+        """
+        Hold the least busy replica of an agent for one request; yields its URL
+
+        Counts as activity for the idle reaper. An agent stopped for being
+        idle is started again here, so the first request after a quiet
+        period waits for the cold start instead of failing.
+        """
+        info = self._running_agents.get(agent_id)
+        replica_set = self._replica_sets.get(agent_id)
+        if info is None or replica_set is None or self._draining:
+            yield None
+            return
+        info["last_used"] = time.monotonic()
+        if info.get("status") in ("stopped", "starting"):
+            replica_set.waiting += 1
+            replica_set.observe()
             try:
-                container_id = self._running_agents[agent_id]["container_id"]
-                container = self.docker_client.containers.get(container_id)
-                return {
-                    "status": container.status,
-                    "url": self._running_agents[agent_id]["url"],
-                    "container_id": container_id
-                }
+                url = await self._wake(agent_id)
+            finally:
+                replica_set.waiting -= 1
+            if url is None:
+                yield None
+                return
+        elif info.get("status") != "running":
+            yield None
+            return
+        async with replica_set.lease() as url:
+            yield url
+
+    def _agent_lock(self, agent_id: str) -> asyncio.Lock:
+        lock = self._agent_locks.get(agent_id)
+        if lock is None:
+            lock = self._agent_locks[agent_id] = asyncio.Lock()
+        return lock
+
+    async def _wake(self, agent_id: str) -> Optional[str]:
+        """
+        Start an idle-stopped agent and wait until it answers HTTP
+
+        The stopped container gave up its reservation, so it is placed again
+        first: it restarts in place when its host still has room, otherwise
+        a new container starts on the placed host. Concurrent requests for
+        the same agent share one wake.
+        """
+        async with self._agent_lock(agent_id):
+            info = self._running_agents.get(agent_id)
+            if info is None:
+                return None
+            if info["status"] == "running":
+                return info["url"]
+
+            started = time.monotonic()
+            info["status"] = "starting"
+            container_id = info["container_id"]
+            home = self.scheduler.host_of(container_id).name
+            try:
+                placement = self.scheduler.place(
+                    agent_id, *self._resource_request(agent_id, info.get("metadata") or {}), prefer=home
+                )
+            except NoCapacity as e:
+                info["status"] = "stopped"
+                self.cold_start_stats.record_failure(agent_id)
+                logger.error(f"Cannot wake agent {agent_id}: {str(e)}")
+                return None
+            try:
+                if placement.host == home:
+                    self.scheduler.bind(placement, container_id)
+                    host_port = await asyncio.to_thread(self._restart_container, container_id)
+                else:
+                    container_id, host_port = await self._relocate(agent_id, info, placement)
+                url = self.scheduler.url_for(container_id, host_port)
+                await self._wait_until_ready(url, started + self.settings.AGENT_COLD_START_TIMEOUT)
             except Exception as e:
-                logger.error(f"Failed to get agent status for {agent_id}: {str(e)}")
+                info["status"] = "stopped"
+                try:
+                    await asyncio.to_thread(self._stop_container, container_id)
+                except Exception:
+                    self.scheduler.park(container_id)
+                self.cold_start_stats.record_failure(agent_id)
+                logger.error(f"Cold start of agent {agent_id} failed: {str(e)}")
                 return None
-        return None
+
+            info.update({
+                "host_port": host_port,
+                "url": url,
+                "host": self.scheduler.host_of(container_id).name,
+                "status": "running",
+                "last_used": time.monotonic()
+            })
+            primary = self._replica_sets[agent_id].primary
+            primary.url, primary.host_port = url, host_port
+            elapsed = time.monotonic() - started
+            self.cold_start_stats.record_cold_start(agent_id, elapsed)
+            await self._persist(agent_id)
+            logger.info(f"Cold-started agent {agent_id} in {elapsed:.2f}s")
+            return url
+
+    async def _relocate(self, agent_id: str, info: Dict[str, Any], placement: Placement) -> Tuple[str, str]:
+        """
+        Replace a stopped primary whose host has no room with a new container on the placed host
+
+        Returns the new container id and host port.
+        """
+        if info.get("runtime") == "warm_pool":
+            # Warm-pool runtimes only exist on the local host
+            self.scheduler.release(placement.container_id)
+            raise NoCapacity(f"No room on host {self.scheduler.default.name} to wake {agent_id}")
+        if not info.get("version"):
+            info["version"] = await self._version_of(info.get("code_path"))
+        warmup = await asyncio.to_thread(self.warmup_cache.get, agent_id, info["version"]) \
+            if info["version"] else None
+        container_info = await self._launch(
+            info["image_name"], agent_id, info.get("metadata") or {}, warmup, placement=placement
+        )
+        self._spawn(self._remove_containers([info["container_id"]]))
+        info["container_id"] = container_info["container_id"]
+        self._replica_sets[agent_id].primary.container_id = container_info["container_id"]
+        logger.info(f"Moved stopped agent {agent_id} to host {placement.host}")
+        return container_info["container_id"], container_info["host_port"]
+
+    def _restart_container(self, container_id: str) -> str:
+        """
+        Start a stopped container and return its (possibly new) host port (blocking)
+        """
+        container = self.scheduler.client_for(container_id).containers.get(container_id)
+        container.start()
+        container.reload()
+        return list(container.attrs['NetworkSettings']['Ports']['7860/tcp'])[0]['HostPort']
+
+    async def _wait_until_ready(self, url: str, deadline: float) -> None:
+        """
+        Poll the agent's readiness probe until it passes or the deadline is reached
+
+        /ready answers once the agent has served a warm-up prediction.
+        """
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            while True:
+                try:
+                    response = await client.get(url + READY_PATH)
+                    if response.status_code == 200:
+                        return
+                    if response.status_code == 404:
+                        # Generated before the probe existed; the UI answering is all there is
+                        response = await client.get(url + "/")
+                        if response.status_code < 500:
+                            return
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"{url} did not pass its readiness probe in time")
+                await asyncio.sleep(0.25)
+
+    async def _reaper_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.settings.AGENT_IDLE_CHECK_INTERVAL)
+            try:
+                await self.reap_idle()
+            except Exception as e:
+                logger.error(f"Idle reaper pass failed: {str(e)}")
+
+    async def reap_idle(self) -> List[str]:
+        """
+        Stop containers that have had no requests for AGENT_IDLE_TIMEOUT
+
+        Containers are stopped rather than removed so a later request can
+        start them again; their reservation is released meanwhile. The timeout should stay well above the request
+        timeout: activity is recorded when a request starts.
+        """
+        cutoff = time.monotonic() - self.settings.AGENT_IDLE_TIMEOUT
+        reaped = []
+
+        def idle(agent_id: str, info: Dict[str, Any]) -> bool:
+            replica_set = self._replica_sets.get(agent_id)
+            return info.get("status") == "running" and info.get("last_used", 0) <= cutoff \
+                and (replica_set is None or replica_set.inflight == 0)
+
+        for agent_id, info in list(self._running_agents.items()):
+            if not idle(agent_id, info):
+                continue
+            async with self._agent_lock(agent_id):
+                if not idle(agent_id, info):
+                    continue
+                # New requests see "stopped" and queue on the lock to wake it
+                info["status"] = "stopped"
+                replica_set = self._replica_sets.get(agent_id)
+                if replica_set is not None:
+                    await replica_set.shrink_to_primary()
+                try:
+                    await asyncio.to_thread(self._stop_container, info["container_id"])
+                except Exception as e:
+                    logger.error(f"Failed to stop idle agent {agent_id}: {str(e)}")
+                    info["status"] = "running"
+                    continue
+            await self._discard_endpoint(info["url"])
+            self.cold_start_stats.record_reap(agent_id)
+            await self._persist(agent_id)
+            reaped.append(agent_id)
+            logger.info(f"Stopped idle agent {agent_id}")
+        return reaped
+
+    async def _autoscaler_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.settings.AGENT_AUTOSCALE_INTERVAL)
+            for agent_id, replica_set in list(self._replica_sets.items()):
+                info = self._running_agents.get(agent_id)
+                if info is None or info.get("status") != "running":
+                    continue
+                try:
+                    if await replica_set.autoscale():
+                        await self._persist(agent_id)
+                except Exception as e:
+                    logger.error(f"Autoscaling {agent_id} failed: {str(e)}")
+
+    def _stop_container(self, container_id: str) -> None:
+        self.scheduler.client_for(container_id).containers.get(container_id).stop(
+            timeout=self.settings.AGENT_STOP_TIMEOUT
+        )
+        self.scheduler.park(container_id)
+
+    async def _discard_endpoint(self, url: str) -> None:
+        from app.core.agent_proxy import get_agent_proxy
+
+        if get_agent_proxy.cache_info().currsize:
+            await get_agent_proxy().discard(url)
 
     async def list_running_agents(self) -> Dict[str, Any]:
         """
@@ -115,15 +1019,178 @@ CMD ["python", "{code_path.name}"]
             "agents": [
                 {
                     "agent_id": agent_id,
-                    **info
+                    **info,
+                    "container_status": self._container_status(info),
+                    "replicas": len(self._replica_sets[agent_id].active()) if agent_id in self._replica_sets else 1
                 }
                 for agent_id, info in self._running_agents.items()
             ]
         }
 
-    async def cleanup(self) -> None:
+    async def drain_host(self, host_name: str) -> Dict[str, Any]:
+        """
+        Stop placing on a host and move its agent containers elsewhere
+
+        Each container gets a substitute on another host (placed like any
+        new replica) before it is drained and removed, so agents keep
+        serving throughout. A stopped agent comes back running on its new
+        host. Warm-pool runtimes cannot leave the local host and stay put.
+        """
+        started = time.monotonic()
+        summary = {"moved": 0, "pinned": 0, "failed": 0}
+
+        async def move(container_id: str, agent_id: str) -> str:
+            info = self._running_agents.get(agent_id)
+            replica_set = self._replica_sets.get(agent_id)
+            if info is None or replica_set is None:
+                return "pinned"
+            if info.get("runtime") == "warm_pool":
+                return "pinned"
+            async with self._agent_lock(agent_id):
+                replica = next(
+                    (member for member in replica_set.replicas if member.container_id == container_id), None
+                )
+                if replica is None:
+                    return "moved"
+                try:
+                    substitute = await replica_set.replace(replica)
+                except Exception as e:
+                    logger.error(f"Failed to move {container_id[:12]} of {agent_id} off {host_name}: {str(e)}")
+                    return "failed"
+                if replica_set.primary is substitute:
+                    info.update({
+                        "container_id": substitute.container_id,
+                        "host_port": substitute.host_port,
+                        "url": substitute.url,
+                        "host": self.scheduler.host_of(substitute.container_id).name,
+                        "status": "running",
+                        "last_used": time.monotonic()
+                    })
+            await self._persist(agent_id)
+            return "moved"
+
+        moving = [(placement.container_id, placement.agent_id) for placement in self.scheduler.drain(host_name)]
+        # Idle-stopped agents hold no reservation but still live on the host
+        moving.extend(
+            (info["container_id"], agent_id) for agent_id, info in self._running_agents.items()
+            if info.get("status") == "stopped" and self.scheduler.host_of(info["container_id"]).name == host_name
+        )
+        results = await asyncio.gather(*(move(container_id, agent_id) for container_id, agent_id in moving))
+        for result in results:
+            summary[result] += 1
+        summary["remaining"] = len(self.scheduler.hosts[host_name].placements)
+        summary["seconds"] = round(time.monotonic() - started, 3)
+        logger.info(f"Drained host {host_name}: {summary}")
+        return summary
+
+    def undrain_host(self, host_name: str) -> None:
+        self.scheduler.undrain(host_name)
+
+    async def _drain(self, deadline: float) -> int:
+        """
+        Wait for proxied requests to finish; returns how many were still in flight at the deadline
+        """
+        def inflight() -> int:
+            return sum(replica_set.inflight for replica_set in self._replica_sets.values())
+
+        while inflight() and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        return inflight()
+
+    async def _shutdown_agent(self, agent_id: str, remove: bool, executor: ThreadPoolExecutor) -> None:
+        info = self._running_agents.get(agent_id)
+        replica_set = self._replica_sets.get(agent_id)
+        if info is None:
+            return
+        container_ids = [replica.container_id for replica in replica_set.replicas] if replica_set \
+            else [info["container_id"]]
+        teardown = self._remove_container if remove else self._stop_container
+
+        async def one(container_id: str) -> None:
+            try:
+                await asyncio.get_running_loop().run_in_executor(executor, teardown, container_id)
+            except Exception as e:
+                logger.error(f"Failed to stop container {container_id} of {agent_id}: {str(e)}")
+
+        await asyncio.gather(*(one(container_id) for container_id in container_ids))
+        if remove:
+            self._running_agents.pop(agent_id, None)
+            self._replica_sets.pop(agent_id, None)
+        else:
+            info["status"] = "stopped"
+        await self._persist(agent_id)
+
+    async def cleanup(self, remove: bool = False) -> Dict[str, Any]:
         """
-        Clean up all running agents
+        Gracefully shut down all agents
+
+        New requests are refused while in-flight ones get up to
+        AGENT_DRAIN_TIMEOUT to finish. Containers are then stopped in parallel,
+        at most AGENT_SHUTDOWN_CONCURRENCY at a time; they are kept (and stay
+        in the registry) so the next start can restore them, unless remove is
+        set. Returns the seconds spent in each phase.
         """
-        for agent_id in list(self._running_agents.keys()):
-            await self.stop_agent(agent_id) 
\ No newline at end of file
+        timings: Dict[str, float] = {}
+        started = phase_started = time.monotonic()
+
+        def finish_phase(phase: str) -> None:
+            nonlocal phase_started
+            now = time.monotonic()
+            timings[phase] = round(now - phase_started, 3)
+            phase_started = now
+
+        self._draining = True
+        abandoned = await self._drain(started + self.settings.AGENT_DRAIN_TIMEOUT)
+        if abandoned:
+            logger.warning(f"Drain deadline passed with {abandoned} requests still in flight")
+        finish_phase("drain")
+
+        for task in (self._reaper_task, self._autoscaler_task):
+            if task is not None:
+                task.cancel()
+        self._reaper_task = self._autoscaler_task = None
+        for cache in self.status_caches.values():
+            await cache.close()
+        await self.telemetry.close()
+        await self.image_gc.close()
+        await self.deploy_queue.close()
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        finish_phase("background")
+
+        # A dedicated pool bounds the fan-out; the default executor is usually smaller
+        agent_ids = list(self._running_agents.keys())
+        with ThreadPoolExecutor(max_workers=max(self.settings.AGENT_SHUTDOWN_CONCURRENCY, 1)) as executor:
+            await asyncio.gather(
+                self.runtime_pool.close(),
+                *(self._shutdown_agent(agent_id, remove, executor) for agent_id in agent_ids)
+            )
+        finish_phase("containers")
+
+        timings["total"] = round(time.monotonic() - started, 3)
+        logger.info(f"Agent manager shut down {len(agent_ids)} agents: {timings}")
+        return {"agents": len(agent_ids), "abandoned_requests": abandoned, "timings": timings}
+
+@lru_cache()
+def get_agent_manager() -> AgentManager:
+    """
+    Shared AgentManager, created on first use so the API can start without Docker
+    """
+    from app.db.database import SessionLocal
+
+    return AgentManager(settings, registry=DeploymentRegistry(SessionLocal))
+
+def lookup_agent_metadata(agent_id: str) -> Dict[str, Any]:
+    """
+    Deployed metadata for an agent, falling back to the catalog; {} when unknown
+    """
+    from app.core.catalog import get_agent_catalog
+
+    try:
+        metadata = get_agent_manager().get_agent_metadata(agent_id)
+    except Exception:
+        metadata = None
+    if metadata is None:
+        entry = get_agent_catalog().get(agent_id)
+        metadata = entry.metadata if entry else {}
+    return metadata
@@ -0,0 +1,123 @@
+from contextlib import AsyncExitStack
+from typing import Dict, Any, Optional, Callable, AsyncContextManager
+from functools import lru_cache
+import httpx
+from app.core.config import Settings, settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Holds an agent endpoint for one request, so replicas can track in-flight calls
+EndpointLease = Callable[[str], AsyncContextManager[Optional[str]]]
+
+
+class AgentProxyError(Exception):
+    """Base error for forwarding a call to an agent container"""
+    status_code = 502
+    code = "AGENT_ERROR"
+
+
+class AgentUnavailable(AgentProxyError):
+    status_code = 503
+    code = "AGENT_UNAVAILABLE"
+
+
+class AgentTimeout(AgentProxyError):
+    status_code = 504
+    code = "AGENT_TIMEOUT"
+
+
+class AgentProxy:
+    """
+    Forwards predictions to agent containers over pooled keep-alive connections
+
+    One AsyncClient is kept per agent endpoint so repeated calls reuse warm
+    connections instead of paying a TCP handshake each time. Connection
+    failures are retried by the transport; timeouts use AGENT_DEFAULT_TIMEOUT.
+    """
+
+    def __init__(self, settings: Settings, lease: EndpointLease):
+        self.settings = settings
+        self._lease = lease
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def _client_for(self, base_url: str) -> httpx.AsyncClient:
+        client = self._clients.get(base_url)
+        if client is None or client.is_closed:
+            limits = httpx.Limits(
+                max_connections=self.settings.AGENT_PROXY_MAX_CONNECTIONS,
+                max_keepalive_connections=self.settings.AGENT_PROXY_MAX_KEEPALIVE,
+                keepalive_expiry=self.settings.AGENT_PROXY_KEEPALIVE_EXPIRY
+            )
+            client = httpx.AsyncClient(
+                base_url=base_url,
+                timeout=httpx.Timeout(self.settings.AGENT_DEFAULT_TIMEOUT),
+                transport=httpx.AsyncHTTPTransport(
+                    limits=limits,
+                    retries=self.settings.AGENT_PROXY_RETRIES
+                )
+            )
+            self._clients[base_url] = client
+        return client
+
+    async def forward(
+        self,
+        agent_id: str,
+        payload: Dict[str, Any],
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        POST a prediction payload to the agent's /predict route
+
+        timeout overrides AGENT_DEFAULT_TIMEOUT for this call.
+        """
+        timeout = timeout or self.settings.AGENT_DEFAULT_TIMEOUT
+        async with AsyncExitStack() as stack:
+            try:
+                base_url = await stack.enter_async_context(self._lease(agent_id))
+            except Exception as e:
+                logger.error(f"Failed to resolve endpoint for agent {agent_id}: {str(e)}")
+                raise AgentUnavailable(f"Agent '{agent_id}' is not available")
+            if base_url is None:
+                raise AgentUnavailable(f"Agent '{agent_id}' is not running")
+
+            try:
+                response = await self._client_for(base_url).post(
+                    "/predict", json=payload, timeout=httpx.Timeout(timeout)
+                )
+                response.raise_for_status()
+                return response.json()
+            except httpx.TimeoutException:
+                raise AgentTimeout(
+                    f"Agent '{agent_id}' did not respond within {timeout}s"
+                )
+            except httpx.HTTPStatusError as e:
+                raise AgentProxyError(f"Agent '{agent_id}' returned HTTP {e.response.status_code}")
+            except (httpx.TransportError, ValueError) as e:
+                raise AgentProxyError(f"Agent '{agent_id}' request failed: {str(e)}")
+
+    async def discard(self, base_url: str) -> None:
+        """
+        Close the pool for an endpoint that went away
+        """
+        client = self._clients.pop(base_url, None)
+        if client is not None:
+            await client.aclose()
+
+    async def aclose(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+
+@lru_cache()
+def get_agent_proxy() -> AgentProxy:
+    """
+    Shared AgentProxy leasing replica endpoints from the AgentManager
+    """
+    from app.core.agent_manager import get_agent_manager
+
+    def lease(agent_id: str) -> AsyncContextManager[Optional[str]]:
+        return get_agent_manager().lease_endpoint(agent_id)
+
+    return AgentProxy(settings, lease)
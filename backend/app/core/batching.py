@@ -0,0 +1,167 @@
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Tuple, Callable, Awaitable, Optional, Set, AsyncContextManager
+from functools import lru_cache
+import asyncio
+from app.core.admission import Admission
+import logging
+
+logger = logging.getLogger(__name__)
+
+BatchForward = Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+BatchLimits = Callable[[str], Awaitable[Tuple[int, int]]]
+AdmissionGate = Callable[[str], AsyncContextManager[Admission]]
+
+
+@dataclass
+class _Batch:
+    items: List[Any] = field(default_factory=list)
+    futures: List[asyncio.Future] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class MicroBatcher:
+    """
+    Groups concurrent single-item predictions for the same agent
+
+    A batch is flushed when it reaches the agent's max_batch_size or when its
+    oldest item has waited max_batch_wait_ms. The agent receives one call
+    with every item and each caller gets back its own slice of the response.
+    With an admission gate, each agent call (not each item) holds one slot,
+    so a batch can grow past the agent's in-flight limit.
+    """
+
+    def __init__(self, forward: BatchForward, limits: BatchLimits, admit: Optional[AdmissionGate] = None):
+        self._forward = forward
+        self._limits = limits
+        self._admit = admit
+        self._pending: Dict[str, _Batch] = {}
+        self._flushes: Set[asyncio.Task] = set()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    async def submit(self, agent_id: str, item: Any, timing: Optional[Admission] = None) -> Dict[str, Any]:
+        """
+        Predict one item as part of a batch; timing receives the batch call's queue and execution time
+        """
+        max_size, max_wait_ms = await self._limits(agent_id)
+        if max_size <= 1:
+            response, admission = await self._call(agent_id, {"data": [item]})
+            self._report(admission, timing)
+            return response
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.get(agent_id)
+        if batch is None:
+            batch = _Batch()
+            self._pending[agent_id] = batch
+            batch.timer = loop.call_later(max_wait_ms / 1000, self._flush_now, agent_id, batch)
+        batch.items.append(item)
+        batch.futures.append(future)
+        if len(batch.items) >= max_size:
+            self._flush_now(agent_id, batch)
+        response, admission = await future
+        self._report(admission, timing)
+        return response
+
+    async def _call(self, agent_id: str, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Admission]]:
+        if self._admit is None:
+            return await self._forward(agent_id, payload), None
+        async with self._admit(agent_id) as admission:
+            response = await self._forward(agent_id, payload)
+        return response, admission
+
+    @staticmethod
+    def _report(admission: Optional[Admission], timing: Optional[Admission]) -> None:
+        if admission is not None and timing is not None:
+            timing.queue_wait = admission.queue_wait
+            timing.execution = admission.execution
+
+    def _flush_now(self, agent_id: str, batch: _Batch) -> None:
+        if self._pending.get(agent_id) is not batch:
+            return
+        del self._pending[agent_id]
+        if batch.timer is not None:
+            batch.timer.cancel()
+        task = asyncio.create_task(self._flush(agent_id, batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, agent_id: str, batch: _Batch) -> None:
+        stats = self._stats.setdefault(agent_id, {"batches": 0, "items": 0})
+        stats["batches"] += 1
+        stats["items"] += len(batch.items)
+        try:
+            response, admission = await self._call(agent_id, {"data": batch.items})
+        except Exception as e:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for index, future in enumerate(batch.futures):
+            if not future.done():
+                future.set_result((self._split(response, index, len(batch.items)), admission))
+
+    @staticmethod
+    def _split(response: Dict[str, Any], index: int, size: int) -> Dict[str, Any]:
+        """
+        Cut one caller's single-item response out of a batch response
+        """
+        data = response.get("data")
+        if not isinstance(data, list) or len(data) != size:
+            # The agent did not honour the batch contract; fail every caller the same way
+            error = response.get("error") or {
+                "message": "Agent returned a malformed batch response",
+                "code": "PROCESSING_ERROR"
+            }
+            return {"data": [None], "status": "error", "error": error}
+
+        errors = [
+            {**error, "index": 0}
+            for error in response.get("errors", [])
+            if error.get("index") == index
+        ]
+        item_response = {
+            "data": [data[index]],
+            "status": "error" if errors else "success",
+            "duration": response.get("duration"),
+            "batch_size": size
+        }
+        if errors:
+            item_response["errors"] = errors
+            item_response["error"] = {"message": errors[0].get("message"), "code": errors[0].get("code")}
+        return item_response
+
+    async def close(self) -> None:
+        """
+        Send batches still waiting for their timer and wait for every in-flight flush
+        """
+        for agent_id, batch in list(self._pending.items()):
+            self._flush_now(agent_id, batch)
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            agent_id: {
+                **counts,
+                "avg_batch_size": float(f"{counts['items'] / counts['batches']:.2f}") if counts["batches"] else 0.0
+            }
+            for agent_id, counts in self._stats.items()
+        }
+
+
+@lru_cache()
+def get_micro_batcher() -> MicroBatcher:
+    """
+    Shared MicroBatcher forwarding through admission control and the AgentProxy
+    """
+    from app.core.admission import get_admission_controller
+    from app.core.agent_manager import lookup_agent_metadata
+    from app.core.agent_proxy import get_agent_proxy
+
+    async def limits(agent_id: str) -> Tuple[int, int]:
+        metadata = lookup_agent_metadata(agent_id)
+        return int(metadata.get("max_batch_size", 1)), int(metadata.get("max_batch_wait_ms", 10))
+
+    return MicroBatcher(get_agent_proxy().forward, limits, get_admission_controller().admit)
@@ -0,0 +1,202 @@
+from pathlib import Path
+from typing import Dict, Any, List, Iterable, Optional, Callable
+import hashlib
+import re
+import shutil
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEPS_IMAGE_REPO = "smart-minions/deps"
+BUILDER_IMAGE = "python:3.9-slim"
+
+_NAME_RE = re.compile(r"^([A-Za-z0-9][A-Za-z0-9._-]*)(.*)$")
+
+
+def normalize_requirements(requirements: Iterable[str]) -> List[str]:
+    """
+    Canonical, sorted, de-duplicated form of a requirements list
+
+    Comments and blank lines are dropped, whitespace is removed and project
+    names are normalized as in PEP 503, so "NumPy == 1.26.0" and
+    "numpy==1.26.0" hash the same.
+    """
+    normalized = set()
+    for line in requirements:
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        line = "".join(line.split())
+        match = _NAME_RE.match(line)
+        if match:
+            name = re.sub(r"[-_.]+", "-", match.group(1)).lower()
+            line = name + match.group(2)
+        normalized.add(line)
+    return sorted(normalized)
+
+
+def requirements_hash(requirements: Iterable[str]) -> str:
+    return hashlib.sha256("\n".join(normalize_requirements(requirements)).encode()).hexdigest()
+
+
+class BuildCache:
+    """
+    Dependency-layer cache for agent images
+
+    The dependency layer is built once per normalized requirements set and
+    tagged with its hash, so agents sharing a dependency set only add their
+    own code on top. Wheels are resolved into a local wheelhouse first and
+    installed with --no-index, which keeps rebuilds working offline.
+    """
+
+    def __init__(
+        self,
+        docker_client,
+        cache_dir: Path,
+        wheelhouse_dir: Path,
+        on_image_used: Optional[Callable[[str], None]] = None
+    ):
+        self.docker_client = docker_client
+        self._on_image_used = on_image_used or (lambda tag: None)
+        self.cache_dir = cache_dir
+        self.wheelhouse = wheelhouse_dir
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        # Builds of different keys run concurrently; counters are shared
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "dependency_builds": 0,
+            "dependency_build_seconds": 0.0,
+            "agent_builds": 0,
+            "agent_build_seconds": 0.0
+        }
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _count(self, **increments: float) -> None:
+        with self._stats_lock:
+            for name, value in increments.items():
+                self._stats[name] += value
+
+    def dependency_image(self, requirements: List[str]) -> str:
+        """
+        Return the dependency image for a requirements set, building it on a miss (blocking)
+        """
+        normalized = normalize_requirements(requirements)
+        key = requirements_hash(normalized)
+        tag = f"{DEPS_IMAGE_REPO}:{key[:16]}"
+
+        with self._lock_for(key):
+            try:
+                self.docker_client.images.get(tag)
+                self._count(hits=1)
+                self._on_image_used(tag)
+                return tag
+            except Exception:
+                self._count(misses=1)
+
+            started = time.time()
+            context = self.cache_dir / key[:16]
+            context.mkdir(parents=True, exist_ok=True)
+            with open(context / "requirements.txt", "w") as f:
+                f.write("\n".join(normalized) + "\n")
+            self._fill_wheelhouse(context)
+
+            dockerfile_content = """
+FROM python:3.9-slim
+WORKDIR /app
+COPY requirements.txt /tmp/requirements.txt
+COPY wheels /wheels
+RUN pip install --no-index --find-links /wheels -r /tmp/requirements.txt
+ENV GRADIO_SERVER_NAME=0.0.0.0
+EXPOSE 7860
+"""
+            with open(context / "Dockerfile", "w") as f:
+                f.write(dockerfile_content)
+            self.docker_client.images.build(path=str(context), tag=tag, rm=True)
+            shutil.rmtree(context / "wheels", ignore_errors=True)
+
+            self._on_image_used(tag)
+            self._count(dependency_builds=1, dependency_build_seconds=time.time() - started)
+            logger.info(f"Built dependency layer {tag} in {time.time() - started:.1f}s")
+            return tag
+
+    def _fill_wheelhouse(self, context: Path) -> None:
+        """
+        Resolve wheels into the build context, preferring the local wheelhouse (blocking)
+
+        pip runs inside the base image so the wheels match the agent runtime
+        platform. The offline attempt succeeds whenever every wheel is already
+        in the wheelhouse; otherwise missing wheels are downloaded and kept.
+        """
+        self.wheelhouse.mkdir(parents=True, exist_ok=True)
+        wheels_dir = context / "wheels"
+        wheels_dir.mkdir(exist_ok=True)
+        pip_wheel = "pip wheel --find-links /wheelhouse -w /out -r /req/requirements.txt"
+        self.docker_client.containers.run(
+            BUILDER_IMAGE,
+            command=["sh", "-c", f"{pip_wheel} --no-index || {pip_wheel}"],
+            volumes={
+                str(self.wheelhouse.resolve()): {"bind": "/wheelhouse", "mode": "ro"},
+                str(context.resolve()): {"bind": "/req", "mode": "ro"},
+                str(wheels_dir.resolve()): {"bind": "/out", "mode": "rw"}
+            },
+            remove=True
+        )
+        for wheel in wheels_dir.glob("*.whl"):
+            target = self.wheelhouse / wheel.name
+            if not target.exists():
+                shutil.copy2(wheel, target)
+
+    def build_agent_image(self, agent_id: str, code_path: Path, requirements: List[str]) -> str:
+        """
+        Build an agent image on top of its cached dependency layer (blocking)
+        """
+        base_image = self.dependency_image(requirements)
+        started = time.time()
+
+        dockerfile_content = f"""
+FROM {base_image}
+WORKDIR /app
+COPY {code_path.name} /app/
+CMD ["python", "{code_path.name}"]
+"""
+        with open(code_path.parent / "Dockerfile", "w") as f:
+            f.write(dockerfile_content)
+
+        image_name = f"smart-minions/agent-{agent_id}"
+        self.docker_client.images.build(
+            path=str(code_path.parent),
+            tag=image_name,
+            rm=True
+        )
+
+        self._on_image_used(image_name)
+        self._count(agent_builds=1, agent_build_seconds=time.time() - started)
+        return image_name
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = float(f"{stats['hits'] / lookups:.3f}") if lookups else 0.0
+        stats["avg_dependency_build_seconds"] = (
+            float(f"{stats['dependency_build_seconds'] / stats['dependency_builds']:.3f}")
+            if stats["dependency_builds"] else 0.0
+        )
+        stats["avg_agent_build_seconds"] = (
+            float(f"{stats['agent_build_seconds'] / stats['agent_builds']:.3f}")
+            if stats["agent_builds"] else 0.0
+        )
+        stats["dependency_build_seconds"] = float(f"{stats['dependency_build_seconds']:.3f}")
+        stats["agent_build_seconds"] = float(f"{stats['agent_build_seconds']:.3f}")
+        wheels = list(self.wheelhouse.glob("*.whl")) if self.wheelhouse.exists() else []
+        stats["wheelhouse_wheels"] = len(wheels)
+        stats["wheelhouse_bytes"] = sum(wheel.stat().st_size for wheel in wheels)
+        return stats
@@ -0,0 +1,320 @@
+from bisect import insort, bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set, Tuple, Iterable
+from functools import lru_cache
+import asyncio
+import json
+import os
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+SORT_FIELDS = ("token_price", "name")
+
+FilterKey = Tuple[str, Any]
+# Combined-filter results kept between catalog changes
+COMBINED_CACHE_SIZE = 256
+
+
+@dataclass
+class CatalogEntry:
+    id: str
+    metadata: Dict[str, Any]
+    mtime: float
+
+    @property
+    def price(self) -> float:
+        try:
+            return float(self.metadata.get("token_price", 0.0))
+        except (TypeError, ValueError):
+            return 0.0
+
+    @property
+    def name(self) -> str:
+        return str(self.metadata.get("name", self.id)).lower()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "metadata": self.metadata,
+            "api_endpoint": f"/api/v1/agents/{self.id}/predict"
+        }
+
+
+class _SortedIds:
+    """
+    Agent ids matching one filter value, as a set and in both sort orders
+    """
+
+    __slots__ = ("ids", "by_price", "by_name")
+
+    def __init__(self):
+        self.ids: Set[str] = set()
+        self.by_price: List[Tuple[float, str]] = []
+        self.by_name: List[Tuple[str, str]] = []
+
+    def add(self, entry: "CatalogEntry") -> None:
+        self.ids.add(entry.id)
+        insort(self.by_price, (entry.price, entry.id))
+        insort(self.by_name, (entry.name, entry.id))
+
+    def discard(self, entry: "CatalogEntry") -> None:
+        self.ids.discard(entry.id)
+        AgentCatalog._remove_sorted(self.by_price, (entry.price, entry.id))
+        AgentCatalog._remove_sorted(self.by_name, (entry.name, entry.id))
+
+    def ordered(self, sort_by: Optional[str]) -> List[Tuple[Any, str]]:
+        return self.by_price if sort_by == "token_price" else self.by_name
+
+
+class AgentCatalog:
+    """
+    In-memory index of agent metadata
+
+    The agents directory is read once and then kept current by upserts from
+    the upload endpoint and a periodic mtime rescan that only re-reads
+    metadata files that changed. Every filter value (a model_type, a tag,
+    is_public true or false) keeps its agents pre-sorted by price and by
+    name, so a filtered page is a slice of one list. Combined filters walk
+    the most selective list in order keeping ids present in the others; the
+    result is cached until the catalog next changes.
+    """
+
+    def __init__(self, agents_dir: Path, rescan_interval: float):
+        self.agents_dir = agents_dir
+        self.rescan_interval = rescan_interval
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._filters: Dict[FilterKey, _SortedIds] = {}
+        self._version = 0
+        self._combined: "OrderedDict[Tuple[Any, ...], Tuple[int, List[str]]]" = OrderedDict()
+        self._by_price: List[Tuple[float, str]] = []
+        self._by_name: List[Tuple[str, str]] = []
+        self._loaded = False
+        self._rescan_task: Optional[asyncio.Task] = None
+        self._listeners: List[Any] = []
+
+    def add_listener(self, listener: Any) -> None:
+        """
+        Register an index with upsert(entry) / discard(agent_id) hooks
+        """
+        self._listeners.append(listener)
+        for entry in self._entries.values():
+            listener.upsert(entry)
+
+    # Scanning runs off the event loop and only returns changes; they are
+    # applied on the loop so queries never see a half-updated index.
+
+    def _scan(self, known: Dict[str, float]) -> Tuple[List[CatalogEntry], List[str]]:
+        changed: List[CatalogEntry] = []
+        seen: Set[str] = set()
+        if self.agents_dir.exists():
+            with os.scandir(self.agents_dir) as it:
+                for dirent in it:
+                    if not dirent.is_dir() or dirent.name.startswith("."):
+                        continue
+                    metadata_file = Path(dirent.path) / "metadata.json"
+                    try:
+                        mtime = metadata_file.stat().st_mtime
+                    except FileNotFoundError:
+                        continue
+                    seen.add(dirent.name)
+                    if known.get(dirent.name) == mtime:
+                        continue
+                    try:
+                        with open(metadata_file, "r") as f:
+                            changed.append(CatalogEntry(dirent.name, json.load(f), mtime))
+                    except (OSError, ValueError) as e:
+                        logger.error(f"Failed to read metadata for agent {dirent.name}: {str(e)}")
+        removed = [agent_id for agent_id in known if agent_id not in seen]
+        return changed, removed
+
+    def _apply(self, changed: Iterable[CatalogEntry], removed: Iterable[str]) -> None:
+        for agent_id in removed:
+            self.remove(agent_id)
+        for entry in changed:
+            self._index(entry)
+
+    def load(self) -> None:
+        """
+        Synchronously read the whole agents directory
+        """
+        changed, removed = self._scan({})
+        self._apply(changed, removed)
+        self._loaded = True
+
+    async def refresh(self) -> None:
+        """
+        Pick up metadata files added, changed or removed on disk
+        """
+        known = {agent_id: entry.mtime for agent_id, entry in self._entries.items()}
+        changed, removed = await asyncio.to_thread(self._scan, known)
+        self._apply(changed, removed)
+        self._loaded = True
+
+    async def start(self) -> None:
+        await self.refresh()
+        if self._rescan_task is None and self.rescan_interval > 0:
+            self._rescan_task = asyncio.create_task(self._rescan_loop())
+
+    async def _rescan_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.rescan_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Agent catalog rescan failed: {str(e)}")
+
+    async def close(self) -> None:
+        if self._rescan_task is not None:
+            self._rescan_task.cancel()
+            self._rescan_task = None
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.load()
+
+    def upsert(self, agent_id: str, metadata: Dict[str, Any]) -> None:
+        """
+        Index an agent right after it is written by the API
+        """
+        metadata_file = self.agents_dir / agent_id / "metadata.json"
+        try:
+            mtime = metadata_file.stat().st_mtime
+        except FileNotFoundError:
+            mtime = 0.0
+        self._index(CatalogEntry(agent_id, metadata, mtime))
+
+    def _index(self, entry: CatalogEntry) -> None:
+        if entry.id in self._entries:
+            self._unindex(self._entries[entry.id])
+        self._entries[entry.id] = entry
+        self._version += 1
+        for key in self._filter_keys(entry):
+            sorted_ids = self._filters.get(key)
+            if sorted_ids is None:
+                sorted_ids = self._filters[key] = _SortedIds()
+            sorted_ids.add(entry)
+        insort(self._by_price, (entry.price, entry.id))
+        insort(self._by_name, (entry.name, entry.id))
+        for listener in self._listeners:
+            listener.upsert(entry)
+
+    def _unindex(self, entry: CatalogEntry) -> None:
+        self._version += 1
+        for key in self._filter_keys(entry):
+            sorted_ids = self._filters.get(key)
+            if sorted_ids is not None:
+                sorted_ids.discard(entry)
+                if not sorted_ids.ids:
+                    del self._filters[key]
+        self._remove_sorted(self._by_price, (entry.price, entry.id))
+        self._remove_sorted(self._by_name, (entry.name, entry.id))
+
+    def remove(self, agent_id: str) -> None:
+        entry = self._entries.pop(agent_id, None)
+        if entry is None:
+            return
+        self._unindex(entry)
+        for listener in self._listeners:
+            listener.discard(agent_id)
+
+    @staticmethod
+    def _tags(entry: CatalogEntry) -> Set[str]:
+        return {str(tag).strip().lower() for tag in entry.metadata.get("tags") or [] if str(tag).strip()}
+
+    @classmethod
+    def _filter_keys(cls, entry: CatalogEntry) -> List[FilterKey]:
+        keys: List[FilterKey] = [
+            ("model_type", str(entry.metadata.get("model_type", ""))),
+            ("is_public", bool(entry.metadata.get("is_public", True)))
+        ]
+        keys.extend(("tag", tag) for tag in cls._tags(entry))
+        return keys
+
+    @staticmethod
+    def _remove_sorted(items: List[Tuple[Any, str]], item: Tuple[Any, str]) -> None:
+        position = bisect_left(items, item)
+        if position < len(items) and items[position] == item:
+            del items[position]
+
+    def get(self, agent_id: str) -> Optional[CatalogEntry]:
+        self._ensure_loaded()
+        return self._entries.get(agent_id)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def query(
+        self,
+        model_type: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        is_public: Optional[bool] = None,
+        sort_by: Optional[str] = None,
+        descending: bool = False,
+        offset: int = 0,
+        limit: int = 50
+    ) -> Tuple[int, List[CatalogEntry]]:
+        """
+        Filter, sort and paginate the catalog; returns (total matches, page)
+        """
+        self._ensure_loaded()
+        keys: List[FilterKey] = []
+        if model_type is not None:
+            keys.append(("model_type", model_type))
+        keys.extend(("tag", tag.strip().lower()) for tag in tags or [])
+        if is_public is not None:
+            keys.append(("is_public", is_public))
+
+        if not keys:
+            return len(self._entries), self._page(
+                self._by_price if sort_by == "token_price" else self._by_name, descending, offset, limit
+            )
+        filters = [self._filters.get(key) for key in keys]
+        if any(sorted_ids is None for sorted_ids in filters):
+            return 0, []
+        filters.sort(key=lambda sorted_ids: len(sorted_ids.ids))
+        driver, others = filters[0], filters[1:]
+        ordered = driver.ordered(sort_by)
+        if not others:
+            return len(ordered), self._page(ordered, descending, offset, limit)
+
+        cache_key = (frozenset(keys), sort_by == "token_price")
+        cached = self._combined.get(cache_key)
+        if cached is not None and cached[0] == self._version:
+            self._combined.move_to_end(cache_key)
+            matched = cached[1]
+        else:
+            matches = driver.ids.intersection(*(sorted_ids.ids for sorted_ids in others))
+            matched = [agent_id for _, agent_id in ordered if agent_id in matches]
+            self._combined[cache_key] = (self._version, matched)
+            if len(self._combined) > COMBINED_CACHE_SIZE:
+                self._combined.popitem(last=False)
+        total = len(matched)
+        if descending:
+            page_ids = matched[max(total - offset - limit, 0):max(total - offset, 0)][::-1]
+        else:
+            page_ids = matched[offset:offset + limit]
+        return total, [self._entries[agent_id] for agent_id in page_ids]
+
+    def _page(
+        self,
+        ordered: List[Tuple[Any, str]],
+        descending: bool,
+        offset: int,
+        limit: int
+    ) -> List[CatalogEntry]:
+        total = len(ordered)
+        if descending:
+            start = max(total - offset - limit, 0)
+            stop = max(total - offset, 0)
+            window = ordered[start:stop][::-1]
+        else:
+            window = ordered[offset:offset + limit]
+        return [self._entries[agent_id] for _, agent_id in window]
+
+@lru_cache()
+def get_agent_catalog() -> AgentCatalog:
+    return AgentCatalog(Path("agents"), settings.AGENT_CATALOG_RESCAN_INTERVAL)
@@ -1,4 +1,5 @@
-from typing import List
+from typing import List, Dict, Any
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 from pydantic import AnyHttpUrl, validator
 
@@ -15,6 +16,9 @@ class Settings(BaseSettings):
             return v
         raise ValueError(v)
 
+    # Database
+    DATABASE_URL: str = "sqlite:///./smart_minions.db"
+
     # Security
     SECRET_KEY: str = "development_key"  # Default for development
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
@@ -23,6 +27,9 @@ class Settings(BaseSettings):
     SUPABASE_URL: str = ""
     SUPABASE_KEY: str = ""
     SUPABASE_JWT_SECRET: str = ""
+    AUTH_JWT_AUDIENCE: str = "authenticated"
+    AUTH_CLAIMS_CACHE_SIZE: int = 10000
+    AUTH_REVOCATION_CHECK_INTERVAL: int = 300
 
     # Stripe
     STRIPE_SECRET_KEY: str = ""
@@ -32,11 +39,74 @@ class Settings(BaseSettings):
     # Agent Runtime
     AGENT_CONTAINER_REGISTRY: str = "docker.io"
     AGENT_DEFAULT_TIMEOUT: int = 30
+    AGENT_MAX_INFLIGHT: int = 8  # concurrent calls per agent
+    AGENT_MAX_QUEUE: int = 32  # calls waiting per agent before shedding with 429
+    AGENT_QUEUE_TIMEOUT: float = 0  # max queue wait in seconds; 0 uses AGENT_DEFAULT_TIMEOUT
     AGENT_MAX_MEMORY: int = 512
     AGENT_DEFAULT_CPU: int = 1
+    AGENT_DEPLOY_QUEUE_SIZE: int = 32
+    AGENT_MAX_CONCURRENT_BUILDS: int = 2
+    AGENT_WARM_POOL_SIZE: int = 2
+    AGENT_WHEELHOUSE_DIR: str = "agents/.wheelhouse"
+    AGENT_PROXY_MAX_CONNECTIONS: int = 20
+    AGENT_PROXY_MAX_KEEPALIVE: int = 10
+    AGENT_PROXY_KEEPALIVE_EXPIRY: float = 60.0
+    AGENT_PROXY_RETRIES: int = 2
+    AGENT_CATALOG_RESCAN_INTERVAL: float = 10.0
+    AGENT_IDLE_TIMEOUT: int = 900  # seconds without requests before a container is stopped; 0 disables
+    AGENT_IDLE_CHECK_INTERVAL: float = 30.0
+    AGENT_COLD_START_TIMEOUT: float = 60.0
+    AGENT_READY_TIMEOUT: float = 180.0  # how long a new deploy may take to pass its readiness probe
+    AGENT_REPLICA_TARGET_CONCURRENCY: int = 4  # in-flight requests per replica before scaling up
+    AGENT_AUTOSCALE_INTERVAL: float = 5.0
+    AGENT_SCALE_DOWN_DELAY: float = 60.0
+    AGENT_REPLICA_DRAIN_TIMEOUT: float = 30.0
+    AGENT_STATUS_RESYNC_INTERVAL: float = 60.0
+    AGENT_TELEMETRY_INTERVAL: float = 10.0  # seconds between kept docker stats samples; 0 disables
+    AGENT_TELEMETRY_SAMPLES: int = 360  # ring buffer length per container (1h at the default interval)
+    AGENT_IMAGE_DISK_BUDGET_MB: int = 20480  # image store size per host above which unused images are evicted
+    AGENT_IMAGE_GC_INTERVAL: float = 600.0  # 0 disables
+    AGENT_RIGHT_SIZE_LIMITS: bool = False  # size new containers from measured usage instead of the defaults
+    AGENT_LOCAL_HOST_MEMORY: int = 0  # MB of agent containers the local docker host takes; 0 reads docker info
+    AGENT_LOCAL_HOST_CPUS: float = 0  # 0 reads docker info
+    AGENT_CPU_OVERCOMMIT: float = 4.0  # CPU limits are caps, so they may add up to this many times each host's CPUs
+    # Extra docker hosts: [{"name", "base_url", "address", "memory_mb", "cpus"}]
+    AGENT_HOSTS: List[Dict[str, Any]] = []
+    AGENT_DRAIN_TIMEOUT: float = 30.0  # how long shutdown waits for in-flight requests
+    AGENT_STOP_TIMEOUT: int = 5  # grace period docker gives a container before killing it
+    AGENT_SHUTDOWN_CONCURRENCY: int = 16
+    AGENT_JOB_WORKERS: int = 2  # jobs run at once per agent
+    AGENT_JOB_QUEUE_SIZE: int = 1000  # jobs waiting per agent before submissions get 429
+    AGENT_JOB_TIMEOUT: float = 600.0  # jobs' per-call agent timeout (not AGENT_DEFAULT_TIMEOUT) and admission wait cap
+    AGENT_JOB_TTL: int = 86400  # seconds finished jobs (inputs and results) are kept
+    AGENT_JOB_CLEANUP_INTERVAL: float = 300.0
+    AGENT_JOB_CALLBACK_RETRIES: int = 3
+    # Callbacks only to these hosts (internal ones included); empty: any host resolving to public addresses
+    AGENT_JOB_CALLBACK_HOSTS: List[str] = []
+    AGENT_JOB_MAX_ATTEMPTS: int = 3  # starts before a job that keeps getting interrupted is failed
+    AGENT_MAX_UPLOAD_BYTES: int = 5 * 1024 * 1024
+    AGENT_UPLOAD_CHUNK_SIZE: int = 64 * 1024
+    AGENT_VALIDATION_WORKERS: int = 2
+    AGENT_VALIDATION_MEMO_SIZE: int = 1024
+    AGENT_IMPORT_ALLOWLIST: List[str] = [
+        "__future__", "gradio", "numpy", "typing", "dataclasses", "enum", "abc",
+        "json", "re", "math", "random", "statistics", "time", "datetime",
+        "collections", "itertools", "functools", "operator", "string", "textwrap",
+        "unicodedata", "decimal", "fractions", "heapq", "bisect", "copy", "logging"
+    ]
+
+    # Prediction result cache
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_MAX_ENTRIES: int = 10000
+    RESULT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RESULT_CACHE_TTL: int = 300
 
     class Config:
         case_sensitive = True
         env_file = ".env"
 
-settings = Settings() 
\ No newline at end of file
+settings = Settings()
+
+@lru_cache()
+def get_settings() -> Settings:
+    return settings
@@ -0,0 +1,160 @@
+from typing import Dict, Any, Optional
+import asyncio
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# docker event action -> container status it leaves behind (None: forget the container)
+EVENT_STATUS = {
+    "create": "created",
+    "start": "running",
+    "restart": "running",
+    "unpause": "running",
+    "pause": "paused",
+    "die": "exited",
+    "stop": "exited",
+    "kill": "exited",
+    "destroy": None
+}
+
+
+class ContainerStatusCache:
+    """
+    Container statuses kept current from the docker events stream
+
+    One background thread follows the events for labelled containers and
+    a periodic full listing corrects anything missed (reconnects, dropped
+    events). Reads are dict lookups and never call docker.
+    """
+
+    def __init__(self, docker_client, label: str, resync_interval: float):
+        self.docker_client = docker_client
+        self.label = label
+        self.resync_interval = resync_interval
+        self._status: Dict[str, str] = {}
+        # Event sequence number, and the last one applied per container since the previous resync
+        self._seq = 0
+        self._touched: Dict[str, int] = {}
+        # Overlapping resyncs would clear each other's touched markers
+        self._resync_lock = asyncio.Lock()
+        self.synced_at: Optional[float] = None
+        self.events_seen = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stream = None
+        self._closed = threading.Event()
+        self._resync_task: Optional[asyncio.Task] = None
+
+    def get(self, container_id: str) -> Optional[str]:
+        return self._status.get(container_id)
+
+    def __len__(self) -> int:
+        return len(self._status)
+
+    def _apply(self, container_id: str, status: Optional[str]) -> None:
+        self._seq += 1
+        self._touched[container_id] = self._seq
+        if status is None:
+            self._status.pop(container_id, None)
+        else:
+            self._status[container_id] = status
+
+    def _list(self) -> Dict[str, str]:
+        containers = self.docker_client.containers.list(all=True, filters={"label": self.label})
+        return {container.id: container.status for container in containers}
+
+    async def resync(self) -> None:
+        """
+        Replace the statuses with a full listing, keeping events newer than the listing
+
+        The listing runs in a worker thread while events keep arriving; a
+        container whose event was applied after the listing started keeps
+        the status (or absence) the event left behind. Resyncs run one at a time.
+        """
+        async with self._resync_lock:
+            started = self._seq
+            listing = await asyncio.to_thread(self._list)
+            status = {
+                container_id: container_status
+                for container_id, container_status in listing.items()
+                if self._touched.get(container_id, 0) <= started
+            }
+            for container_id, seq in self._touched.items():
+                if seq > started and container_id in self._status:
+                    status[container_id] = self._status[container_id]
+            self._status = status
+            self._touched.clear()
+            self.synced_at = time.time()
+
+    async def start(self) -> None:
+        """
+        Subscribe to events, then take the initial listing
+        """
+        self._loop = asyncio.get_running_loop()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch_events, name="docker-events", daemon=True)
+            self._thread.start()
+        await self.resync()
+        if self._resync_task is None and self.resync_interval > 0:
+            self._resync_task = asyncio.create_task(self._resync_loop())
+
+    async def _resync_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.resync_interval)
+            try:
+                await self.resync()
+            except Exception as e:
+                logger.error(f"Container status resync failed: {str(e)}")
+
+    def _watch_events(self) -> None:
+        """
+        Follow the docker events stream, reconnecting on errors (runs in its own thread)
+        """
+        backoff = 1.0
+        while not self._closed.is_set():
+            try:
+                self._stream = self.docker_client.events(
+                    decode=True,
+                    filters={"type": "container", "label": self.label}
+                )
+                backoff = 1.0
+                for event in self._stream:
+                    action = (event.get("Action") or event.get("status") or "").split(":")[0]
+                    if action not in EVENT_STATUS:
+                        continue
+                    container_id = event.get("id") or (event.get("Actor") or {}).get("ID")
+                    if container_id:
+                        self.events_seen += 1
+                        self._loop.call_soon_threadsafe(self._apply, container_id, EVENT_STATUS[action])
+            except Exception as e:
+                if self._closed.is_set():
+                    break
+                logger.warning(f"Docker events stream failed, reconnecting in {backoff:.0f}s: {str(e)}")
+            if self._closed.wait(backoff):
+                break
+            backoff = min(backoff * 2, 30.0)
+            # Events may have been missed while disconnected
+            try:
+                asyncio.run_coroutine_threadsafe(self.resync(), self._loop)
+            except RuntimeError:
+                break
+
+    async def close(self) -> None:
+        self._closed.set()
+        if self._resync_task is not None:
+            self._resync_task.cancel()
+            self._resync_task = None
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "containers": len(self._status),
+            "events_seen": self.events_seen,
+            "synced_at": self.synced_at
+        }
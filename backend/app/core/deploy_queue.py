@@ -0,0 +1,166 @@
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Callable, Awaitable
+import asyncio
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class DeployStage(str, Enum):
+    QUEUED = "queued"
+    BUILDING = "building"
+    STARTING = "starting"
+    WARMING = "warming"
+    READY = "ready"
+    FAILED = "failed"
+
+
+TERMINAL_STAGES = (DeployStage.READY, DeployStage.FAILED)
+
+
+class DeployQueueFull(Exception):
+    """Raised when the deploy queue cannot accept another job"""
+
+
+@dataclass
+class StageTiming:
+    stage: DeployStage
+    started_at: float
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.finished_at if self.finished_at is not None else time.time()
+        return {
+            "stage": self.stage.value,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration": float(f"{end - self.started_at:.3f}")
+        }
+
+
+@dataclass
+class DeployJob:
+    agent_id: str
+    code_path: Path
+    metadata: Dict[str, Any]
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    stage: DeployStage = DeployStage.QUEUED
+    stages: List[StageTiming] = field(default_factory=list)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+
+    def __post_init__(self):
+        self.stages.append(StageTiming(DeployStage.QUEUED, self.created_at))
+
+    def advance(self, stage: DeployStage) -> None:
+        """
+        Close the current stage and open the next one
+        """
+        now = time.time()
+        if self.stages and self.stages[-1].finished_at is None:
+            self.stages[-1].finished_at = now
+        self.stage = stage
+        if stage in TERMINAL_STAGES:
+            self.stages.append(StageTiming(stage, now, now))
+        else:
+            self.stages.append(StageTiming(stage, now))
+
+    @property
+    def done(self) -> bool:
+        return self.stage in TERMINAL_STAGES
+
+    def to_dict(self) -> Dict[str, Any]:
+        finished = self.stages[-1].finished_at if self.done else None
+        return {
+            "job_id": self.job_id,
+            "agent_id": self.agent_id,
+            "stage": self.stage.value,
+            "stages": [timing.to_dict() for timing in self.stages],
+            "total_duration": float(f"{(finished or time.time()) - self.created_at:.3f}"),
+            "result": self.result,
+            "error": self.error
+        }
+
+
+DeployRunner = Callable[[DeployJob], Awaitable[Dict[str, Any]]]
+
+
+class DeployQueue:
+    """
+    Bounded queue of deploy jobs drained by a fixed pool of workers
+    """
+
+    def __init__(self, runner: DeployRunner, max_size: int, workers: int, history: int = 1000):
+        self._runner = runner
+        self._max_size = max_size
+        self._worker_count = max(1, workers)
+        self._history = history
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._jobs: Dict[str, DeployJob] = {}
+
+    def _ensure_started(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self._max_size)
+        self._workers = [task for task in self._workers if not task.done()]
+        while len(self._workers) < self._worker_count:
+            self._workers.append(asyncio.create_task(self._worker(len(self._workers))))
+
+    def submit(self, agent_id: str, code_path: Path, metadata: Dict[str, Any]) -> DeployJob:
+        """
+        Enqueue a deploy job without waiting for it to run
+        """
+        self._ensure_started()
+        job = DeployJob(agent_id=agent_id, code_path=code_path, metadata=metadata)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise DeployQueueFull(f"Deploy queue is full ({self._max_size} jobs pending)")
+        self._jobs[job.job_id] = job
+        self._trim_history()
+        return job
+
+    def get(self, job_id: str) -> Optional[DeployJob]:
+        return self._jobs.get(job_id)
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _trim_history(self) -> None:
+        if len(self._jobs) <= self._history:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.done]:
+            del self._jobs[job_id]
+            if len(self._jobs) <= self._history:
+                break
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                job.result = await self._runner(job)
+                job.advance(DeployStage.READY)
+            except asyncio.CancelledError:
+                job.error = "Deploy cancelled"
+                job.advance(DeployStage.FAILED)
+                raise
+            except Exception as e:
+                logger.error(f"Deploy job {job.job_id} for agent {job.agent_id} failed: {str(e)}")
+                job.error = str(e)
+                job.advance(DeployStage.FAILED)
+            finally:
+                self._queue.task_done()
+
+    async def close(self) -> None:
+        """
+        Cancel the workers; queued jobs are left in their current stage
+        """
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
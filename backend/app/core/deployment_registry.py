@@ -0,0 +1,94 @@
+from typing import Dict, Any, List, Callable
+import json
+from sqlalchemy.orm import Session
+from app.models.deployment import AgentDeployment, AgentReplica
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class DeploymentRegistry:
+    """
+    Deployment state persisted through SQLAlchemy so it survives API restarts
+
+    One row per deployed agent plus one row per replica container. Calls are
+    blocking; AgentManager runs them in worker threads.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        self._session_factory = session_factory
+
+    def save(self, agent_id: str, info: Dict[str, Any], replicas: List[Dict[str, Any]]) -> None:
+        """
+        Insert or replace an agent's deployment and its replica list
+        """
+        db = self._session_factory()
+        try:
+            deployment = db.get(AgentDeployment, agent_id)
+            if deployment is None:
+                deployment = AgentDeployment(agent_id=agent_id)
+                db.add(deployment)
+            deployment.image_name = info.get("image_name")
+            deployment.runtime = info.get("runtime")
+            deployment.code_path = info.get("code_path")
+            deployment.metadata_json = json.dumps(info.get("metadata") or {})
+            deployment.status = info.get("status")
+            deployment.replicas = [
+                AgentReplica(
+                    container_id=replica["container_id"],
+                    agent_id=agent_id,
+                    position=position,
+                    host_port=replica.get("host_port"),
+                    url=replica["url"],
+                    is_primary=position == 0
+                )
+                for position, replica in enumerate(replicas)
+            ]
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def remove(self, agent_id: str) -> None:
+        db = self._session_factory()
+        try:
+            deployment = db.get(AgentDeployment, agent_id)
+            if deployment is not None:
+                db.delete(deployment)
+                db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        """
+        Every stored deployment, replicas ordered with the primary first
+        """
+        db = self._session_factory()
+        try:
+            return [
+                {
+                    "agent_id": deployment.agent_id,
+                    "image_name": deployment.image_name,
+                    "runtime": deployment.runtime,
+                    "code_path": deployment.code_path,
+                    "metadata": json.loads(deployment.metadata_json or "{}"),
+                    "status": deployment.status,
+                    "replicas": [
+                        {
+                            "container_id": replica.container_id,
+                            "host_port": replica.host_port,
+                            "url": replica.url,
+                            "is_primary": replica.is_primary
+                        }
+                        for replica in deployment.replicas
+                    ]
+                }
+                for deployment in db.query(AgentDeployment).all()
+            ]
+        finally:
+            db.close()
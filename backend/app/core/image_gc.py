@@ -0,0 +1,202 @@
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable, Set
+import asyncio
+import json
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Images built by this service; anything else on the host is left alone
+MANAGED_PREFIXES = ("smart-minions/agent-", "smart-minions/deps:")
+# Images used this recently are kept even over budget (a build may be about to use them)
+GRACE_SECONDS = 600
+
+
+class ImageCollector:
+    """
+    Keeps a docker host's image store under a disk budget
+
+    Every use of an image (build, cache hit, container start) is recorded.
+    A pass prunes dangling images, then, while the store is over budget,
+    removes managed images least recently used first. Images referenced by
+    any container, running or stopped, and pinned images are never
+    removed. Reclaimed bytes are measured with `docker system df` before
+    and after the pass.
+    """
+
+    def __init__(
+        self,
+        docker_client,
+        budget_bytes: int,
+        usage_file: Path,
+        pinned: Iterable[str] = ()
+    ):
+        self.docker_client = docker_client
+        self.budget_bytes = budget_bytes
+        self.usage_file = usage_file
+        self.pinned = set(pinned)
+        self._last_used: Dict[str, float] = self._load_usage()
+        # Serializes GC passes
+        self._lock = threading.Lock()
+        # Guards _last_used, which deploy threads update while a pass reads it
+        self._usage_lock = threading.Lock()
+        self.passes = 0
+        self.reclaimed_bytes = 0
+        self.removed_images = 0
+        self.last_pass: Optional[Dict[str, Any]] = None
+
+    def _load_usage(self) -> Dict[str, float]:
+        try:
+            return json.loads(self.usage_file.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save_usage(self) -> None:
+        with self._usage_lock:
+            usage = dict(self._last_used)
+        try:
+            self.usage_file.parent.mkdir(parents=True, exist_ok=True)
+            self.usage_file.write_text(json.dumps(usage))
+        except OSError as e:
+            logger.warning(f"Failed to save image usage to {self.usage_file}: {str(e)}")
+
+    def touch(self, image_name: str) -> None:
+        """
+        Record that an image was just used (thread-safe, no docker call)
+        """
+        if ":" not in image_name.rsplit("/", 1)[-1]:
+            image_name += ":latest"
+        with self._usage_lock:
+            self._last_used[image_name] = time.time()
+
+    def _last_use(self, image: Dict[str, Any]) -> float:
+        tags = image.get("RepoTags") or []
+        with self._usage_lock:
+            used = [self._last_used[tag] for tag in tags if tag in self._last_used]
+        return max(used) if used else float(image.get("Created") or 0)
+
+    def _images_in_use(self) -> Set[str]:
+        return {
+            container.attrs.get("Image")
+            for container in self.docker_client.containers.list(all=True)
+        }
+
+    def collect(self) -> Dict[str, Any]:
+        """
+        One garbage collection pass (blocking)
+        """
+        with self._lock:
+            started = time.time()
+            before = self.docker_client.df().get("LayersSize") or 0
+            pruned = self.docker_client.images.prune(filters={"dangling": True}) or {}
+            usage = self.docker_client.df()
+            total = usage.get("LayersSize") or 0
+            removed: List[str] = []
+
+            if total > self.budget_bytes:
+                in_use = self._images_in_use()
+                candidates = [
+                    image for image in usage.get("Images") or []
+                    if image["Id"] not in in_use
+                    and image.get("Containers", 0) <= 0
+                    and (image.get("RepoTags") or [])
+                    and all(tag.startswith(MANAGED_PREFIXES) for tag in image["RepoTags"])
+                    and not self.pinned.intersection(image["RepoTags"])
+                    and started - self._last_use(image) > GRACE_SECONDS
+                ]
+                candidates.sort(key=self._last_use)
+                for image in candidates:
+                    if total <= self.budget_bytes:
+                        break
+                    tags = list(image["RepoTags"])
+                    try:
+                        for tag in tags:
+                            self.docker_client.images.remove(tag)
+                    except Exception as e:
+                        # Usually a dependency layer still under another image
+                        logger.info(f"Skipped evicting {tags[0]}: {str(e)}")
+                        continue
+                    with self._usage_lock:
+                        for tag in tags:
+                            self._last_used.pop(tag, None)
+                    total -= image.get("Size", 0) - max(image.get("SharedSize", 0), 0)
+                    removed.extend(tags)
+                self._save_usage()
+
+            after = (self.docker_client.df().get("LayersSize") or 0) if removed else total
+            reclaimed = max(before - after, 0)
+            self.passes += 1
+            self.reclaimed_bytes += reclaimed
+            self.removed_images += len(removed)
+            self.last_pass = {
+                "at": started,
+                "seconds": round(time.time() - started, 3),
+                "bytes_before": before,
+                "bytes_after": after,
+                "bytes_reclaimed": reclaimed,
+                "dangling_reclaimed": pruned.get("SpaceReclaimed") or 0,
+                "removed": removed,
+                "over_budget": after > self.budget_bytes
+            }
+            if reclaimed:
+                logger.info(f"Image GC reclaimed {reclaimed} bytes, removed {len(removed)} images")
+            return self.last_pass
+
+    def close(self) -> None:
+        self._save_usage()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "budget_bytes": self.budget_bytes,
+            "passes": self.passes,
+            "reclaimed_bytes": self.reclaimed_bytes,
+            "removed_images": self.removed_images,
+            "tracked_images": len(self._last_used),
+            "last_pass": self.last_pass
+        }
+
+
+class ImageGarbageCollector:
+    """
+    Runs an ImageCollector for every docker host on an interval
+    """
+
+    def __init__(self, collectors: Dict[str, ImageCollector], interval: float):
+        self.collectors = collectors
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.collect()
+
+    async def collect(self) -> Dict[str, Any]:
+        """
+        One pass on every host; hosts run in parallel and fail independently
+        """
+        async def one(name: str, collector: ImageCollector) -> Dict[str, Any]:
+            try:
+                return await asyncio.to_thread(collector.collect)
+            except Exception as e:
+                logger.error(f"Image GC on host {name} failed: {str(e)}")
+                return {"error": str(e)}
+
+        results = await asyncio.gather(*(one(name, collector) for name, collector in self.collectors.items()))
+        return dict(zip(self.collectors, results))
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for collector in self.collectors.values():
+            collector.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: collector.stats() for name, collector in self.collectors.items()}
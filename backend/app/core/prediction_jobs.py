@@ -0,0 +1,495 @@
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple, Set, Iterable
+from functools import lru_cache
+from urllib.parse import urlsplit
+import asyncio
+import ipaddress
+import json
+import socket
+import time
+import uuid
+import httpx
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.prediction_job import PredictionJob
+import logging
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+JobExecutor = Callable[[str, List[Any]], Awaitable[Dict[str, Any]]]
+
+
+class JobQueueFull(Exception):
+    """Raised when an agent's job queue cannot take another job"""
+    status_code = 429
+    code = "JOB_QUEUE_FULL"
+
+
+class CallbackRejected(ValueError):
+    """Callback URL the service refuses to POST to"""
+    code = "INVALID_CALLBACK_URL"
+
+
+async def check_callback_url(url: Any, allowed_hosts: Iterable[str] = ()) -> List[str]:
+    """
+    Reject callback URLs that are not http(s) or would reach internal addresses
+
+    Without an allowlist every address the host resolves to must be public,
+    so callbacks cannot target loopback, private networks, link-local
+    (cloud metadata) or other reserved ranges; the vetted addresses are
+    returned so the request can be pinned to them. With allowed_hosts set,
+    only those hosts are accepted, internal ones included, and nothing is
+    resolved (the result is empty).
+    """
+    parsed = urlsplit(url) if isinstance(url, str) else None
+    if parsed is None or parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise CallbackRejected("callback_url must be an http(s) URL")
+    allowed = {host.lower() for host in allowed_hosts}
+    if allowed:
+        if parsed.hostname.lower() not in allowed:
+            raise CallbackRejected(f"callback_url host '{parsed.hostname}' is not allowed")
+        return []
+
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            parsed.hostname, parsed.port or (443 if parsed.scheme == "https" else 80), type=socket.SOCK_STREAM
+        )
+    except (socket.gaierror, UnicodeError, ValueError):
+        raise CallbackRejected(f"callback_url host '{parsed.hostname}' cannot be resolved")
+    addresses = []
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%", 1)[0])
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        if not address.is_global or address.is_multicast:
+            raise CallbackRejected(f"callback_url host '{parsed.hostname}' resolves to a non-public address")
+        if str(address) not in addresses:
+            addresses.append(str(address))
+    return addresses
+
+
+def pin_address(url: str, address: str) -> Tuple[httpx.URL, Dict[str, str], Dict[str, Any]]:
+    """
+    Callback URL rewritten to connect to an already vetted address
+
+    Returns the URL, headers and request extensions to send it with. The
+    Host header and TLS server name keep the original host, so virtual
+    hosting and certificate checks are unchanged, but no second DNS lookup
+    can swap in an internal address (DNS rebinding).
+    """
+    original = httpx.URL(url)
+    extensions = {"sni_hostname": original.host} if original.scheme == "https" else {}
+    return original.copy_with(host=address), {"Host": original.netloc.decode("ascii")}, extensions
+
+
+class JobStore:
+    """
+    Prediction jobs persisted through SQLAlchemy, inputs and results included
+
+    Calls are blocking; PredictionJobs runs them in worker threads.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        self._session_factory = session_factory
+
+    @staticmethod
+    def _to_dict(row: PredictionJob) -> Dict[str, Any]:
+        return {
+            "job_id": row.job_id,
+            "agent_id": row.agent_id,
+            "owner_id": row.owner_id,
+            "status": row.status,
+            "data": json.loads(row.input_json),
+            "result": json.loads(row.result_json) if row.result_json else None,
+            "error": json.loads(row.error_json) if row.error_json else None,
+            "callback_url": row.callback_url,
+            "callback_status": row.callback_status,
+            "attempts": row.attempts,
+            "created_at": row.created_at,
+            "started_at": row.started_at,
+            "finished_at": row.finished_at,
+            "expires_at": row.expires_at
+        }
+
+    def create(self, job: Dict[str, Any]) -> None:
+        db = self._session_factory()
+        try:
+            db.add(PredictionJob(
+                job_id=job["job_id"],
+                agent_id=job["agent_id"],
+                owner_id=job["owner_id"],
+                status=job["status"],
+                input_json=json.dumps(job["data"]),
+                callback_url=job.get("callback_url"),
+                attempts=0,
+                created_at=job["created_at"],
+                expires_at=job["expires_at"]
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def update(self, job_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        """
+        Set fields on a job (result and error are stored as JSON); returns the job
+        """
+        db = self._session_factory()
+        try:
+            row = db.get(PredictionJob, job_id)
+            if row is None:
+                return None
+            for name, value in fields.items():
+                if name in ("result", "error"):
+                    setattr(row, f"{name}_json", json.dumps(value) if value is not None else None)
+                else:
+                    setattr(row, name, value)
+            db.commit()
+            return self._to_dict(row)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        db = self._session_factory()
+        try:
+            row = db.get(PredictionJob, job_id)
+            return self._to_dict(row) if row is not None else None
+        finally:
+            db.close()
+
+    def unfinished(self) -> List[Tuple[str, str]]:
+        """
+        (job_id, agent_id) of queued and interrupted jobs, oldest first
+        """
+        db = self._session_factory()
+        try:
+            rows = db.query(PredictionJob.job_id, PredictionJob.agent_id) \
+                .filter(PredictionJob.status.notin_(TERMINAL_STATUSES)) \
+                .order_by(PredictionJob.created_at).all()
+            return [(row.job_id, row.agent_id) for row in rows]
+        finally:
+            db.close()
+
+    def purge_expired(self, now: float) -> int:
+        db = self._session_factory()
+        try:
+            purged = db.query(PredictionJob) \
+                .filter(PredictionJob.status.in_(TERMINAL_STATUSES), PredictionJob.expires_at < now) \
+                .delete(synchronize_session=False)
+            db.commit()
+            return purged
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+class PredictionJobs:
+    """
+    Asynchronous predictions drained from per-agent queues
+
+    A submitted job is stored first and then queued under its agent, where
+    a fixed number of workers per agent run jobs in order. A burst of
+    submissions therefore waits in the queue instead of holding HTTP
+    connections or being shed; only a full queue (queue_size jobs) refuses
+    new ones. Jobs left unfinished by a restart are queued again on start.
+    A job that has already been started max_attempts times (it keeps taking
+    the process down) is failed instead of run again. Finished jobs keep
+    their input and result for ttl seconds, and an optional callback URL
+    receives the finished job.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        execute: JobExecutor,
+        workers: int,
+        queue_size: int,
+        ttl: float,
+        cleanup_interval: float,
+        callback_retries: int,
+        max_attempts: int = 3,
+        callback_hosts: Iterable[str] = ()
+    ):
+        self.store = store
+        self._execute = execute
+        self.workers = max(workers, 1)
+        self.queue_size = queue_size
+        self.ttl = ttl
+        self.cleanup_interval = cleanup_interval
+        self.callback_retries = callback_retries
+        self.max_attempts = max(max_attempts, 1)
+        self.callback_hosts = list(callback_hosts)
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, List[asyncio.Task]] = {}
+        self._running: Dict[str, int] = {}
+        self._callbacks: Set[asyncio.Task] = set()
+        self._cleanup_task: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._stats = {
+            "submitted": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "recovered": 0,
+            "purged": 0,
+            "callbacks_delivered": 0,
+            "callbacks_failed": 0
+        }
+
+    async def start(self) -> None:
+        """
+        Queue jobs interrupted by the last shutdown and start TTL cleanup
+        """
+        for job_id, agent_id in await asyncio.to_thread(self.store.unfinished):
+            self._queue_for(agent_id).put_nowait(job_id)
+            self._stats["recovered"] += 1
+        if self._stats["recovered"]:
+            logger.info(f"Re-queued {self._stats['recovered']} unfinished prediction jobs")
+        if self._cleanup_task is None and self.cleanup_interval > 0:
+            self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+
+    def _queue_for(self, agent_id: str) -> asyncio.Queue:
+        queue = self._queues.get(agent_id)
+        if queue is None:
+            queue = self._queues[agent_id] = asyncio.Queue()
+            self._running[agent_id] = 0
+            self._workers[agent_id] = [
+                asyncio.create_task(self._worker(agent_id, queue)) for _ in range(self.workers)
+            ]
+        return queue
+
+    async def submit(
+        self,
+        agent_id: str,
+        data: List[Any],
+        owner_id: str,
+        callback_url: Optional[str] = None
+    ) -> Dict[str, Any]:
+        if callback_url is not None:
+            await check_callback_url(callback_url, self.callback_hosts)
+        queue = self._queue_for(agent_id)
+        if queue.qsize() >= self.queue_size:
+            raise JobQueueFull(f"Agent '{agent_id}' already has {queue.qsize()} jobs waiting")
+        now = time.time()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "agent_id": agent_id,
+            "owner_id": owner_id,
+            "status": "queued",
+            "data": data,
+            "callback_url": callback_url,
+            "created_at": now,
+            "expires_at": now + self.ttl
+        }
+        await asyncio.to_thread(self.store.create, job)
+        queue.put_nowait(job["job_id"])
+        self._stats["submitted"] += 1
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def _worker(self, agent_id: str, queue: asyncio.Queue) -> None:
+        while True:
+            job_id = await queue.get()
+            self._running[agent_id] += 1
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"Prediction job {job_id} could not be processed: {str(e)}")
+            finally:
+                self._running[agent_id] -= 1
+                queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None or job["status"] in TERMINAL_STATUSES:
+            return
+        if job["attempts"] >= self.max_attempts:
+            logger.warning(f"Prediction job {job_id} was interrupted {job['attempts']} times, giving up")
+            await self._finish(job_id, None, {
+                "message": f"Job did not complete in {job['attempts']} attempts",
+                "code": "JOB_ATTEMPTS_EXCEEDED"
+            })
+            return
+        await asyncio.to_thread(
+            self.store.update, job_id, status="running", started_at=time.time(), attempts=job["attempts"] + 1
+        )
+
+        result, error = None, None
+        try:
+            result = await self._execute(job["agent_id"], job["data"])
+            if result.get("status") == "error":
+                error = result.get("error") or {"message": "Agent returned an error", "code": "PROCESSING_ERROR"}
+        except Exception as e:
+            error = {"message": str(e), "code": getattr(e, "code", "JOB_FAILED")}
+        await self._finish(job_id, result, error)
+
+    async def _finish(
+        self,
+        job_id: str,
+        result: Optional[Dict[str, Any]],
+        error: Optional[Dict[str, Any]]
+    ) -> None:
+        status = "failed" if error else "succeeded"
+        self._stats[status] += 1
+        finished = time.time()
+        job = await asyncio.to_thread(
+            self.store.update,
+            job_id,
+            status=status,
+            result=result,
+            error=error,
+            finished_at=finished,
+            expires_at=finished + self.ttl
+        )
+        if job is not None and job["callback_url"]:
+            task = asyncio.create_task(self._deliver(job))
+            self._callbacks.add(task)
+            task.add_done_callback(self._callbacks.discard)
+
+    async def _deliver(self, job: Dict[str, Any]) -> None:
+        """
+        POST the finished job to its callback URL, retrying with backoff
+
+        The URL is checked again before every attempt, since what its host
+        resolves to may have changed since submission, and the attempt
+        connects to the address that passed the check. Redirects are not
+        followed.
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=10.0, follow_redirects=False)
+        delay = 1.0
+        for attempt in range(self.callback_retries + 1):
+            try:
+                addresses = await check_callback_url(job["callback_url"], self.callback_hosts)
+            except CallbackRejected as e:
+                logger.warning(f"Callback for prediction job {job['job_id']} refused: {str(e)}")
+                break
+            url, headers, extensions = job["callback_url"], {}, {}
+            if addresses:
+                url, headers, extensions = pin_address(job["callback_url"], addresses[0])
+            try:
+                response = await self._client.post(url, json=public_view(job), headers=headers, extensions=extensions)
+                if response.status_code < 400:
+                    self._stats["callbacks_delivered"] += 1
+                    await asyncio.to_thread(self.store.update, job["job_id"], callback_status="delivered")
+                    return
+            except httpx.HTTPError:
+                pass
+            if attempt < self.callback_retries:
+                await asyncio.sleep(delay)
+                delay *= 2
+        self._stats["callbacks_failed"] += 1
+        logger.warning(f"Callback for prediction job {job['job_id']} failed")
+        await asyncio.to_thread(self.store.update, job["job_id"], callback_status="failed")
+
+    async def _cleanup_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            try:
+                purged = await asyncio.to_thread(self.store.purge_expired, time.time())
+                self._stats["purged"] += purged
+            except Exception as e:
+                logger.error(f"Prediction job cleanup failed: {str(e)}")
+
+    async def close(self) -> None:
+        """
+        Stop workers; running jobs stay in the store and are re-queued on the next start
+        """
+        tasks = [task for workers in self._workers.values() for task in workers] + list(self._callbacks)
+        if self._cleanup_task is not None:
+            tasks.append(self._cleanup_task)
+            self._cleanup_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._queues.clear()
+        self._workers.clear()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "workers_per_agent": self.workers,
+            "agents": {
+                agent_id: {"queued": queue.qsize(), "running": self._running.get(agent_id, 0)}
+                for agent_id, queue in self._queues.items()
+            }
+        }
+
+
+def public_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A job as returned to clients and callbacks
+    """
+    return {key: value for key, value in job.items() if key != "owner_id"}
+
+
+async def forward_when_admitted(agent_id: str, data: List[Any], timeout: float) -> Dict[str, Any]:
+    """
+    Forward one job's call once admission control lets it through
+
+    Jobs are not in a hurry: when the agent sheds the call the job waits for
+    the suggested Retry-After and tries again. Once the next retry would
+    land more than timeout seconds after the first try, the rejection is
+    raised and fails the job.
+    """
+    from app.core.admission import get_admission_controller, AdmissionRejected
+    from app.core.agent_proxy import get_agent_proxy
+
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            async with get_admission_controller().admit(agent_id):
+                return await get_agent_proxy().forward(agent_id, {"data": data}, timeout=timeout)
+        except AdmissionRejected as e:
+            if time.monotonic() + e.retry_after > deadline:
+                raise
+            await asyncio.sleep(e.retry_after)
+
+
+async def execute_prediction(agent_id: str, data: List[Any]) -> Dict[str, Any]:
+    """
+    Run one job's prediction through the result cache, admission control and proxy
+    """
+    from app.core.agent_manager import lookup_agent_metadata
+    from app.core.result_cache import get_result_cache, result_version
+
+    async def compute() -> Dict[str, Any]:
+        return await forward_when_admitted(agent_id, data, settings.AGENT_JOB_TIMEOUT)
+
+    metadata = lookup_agent_metadata(agent_id)
+    return await get_result_cache().get_or_compute(
+        agent_id,
+        result_version(metadata),
+        data,
+        compute,
+        cacheable=settings.RESULT_CACHE_ENABLED and metadata.get("cacheable", True)
+    )
+
+
+@lru_cache()
+def get_prediction_jobs() -> PredictionJobs:
+    from app.db.database import SessionLocal
+
+    return PredictionJobs(
+        JobStore(SessionLocal),
+        execute_prediction,
+        workers=settings.AGENT_JOB_WORKERS,
+        queue_size=settings.AGENT_JOB_QUEUE_SIZE,
+        ttl=settings.AGENT_JOB_TTL,
+        cleanup_interval=settings.AGENT_JOB_CLEANUP_INTERVAL,
+        callback_retries=settings.AGENT_JOB_CALLBACK_RETRIES,
+        max_attempts=settings.AGENT_JOB_MAX_ATTEMPTS,
+        callback_hosts=settings.AGENT_JOB_CALLBACK_HOSTS
+    )
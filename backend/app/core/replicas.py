@@ -0,0 +1,242 @@
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Callable, AsyncIterator
+import asyncio
+import math
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Replica:
+    container_id: str
+    url: str
+    host_port: Optional[str] = None
+    outstanding: int = 0
+    served: int = 0
+    draining: bool = False
+    started_at: float = field(default_factory=time.monotonic)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "container_id": self.container_id,
+            "url": self.url,
+            "outstanding": self.outstanding,
+            "served": self.served,
+            "draining": self.draining
+        }
+
+
+class ReplicaBackend(ABC):
+    """
+    What a ReplicaSet needs from the container runtime
+
+    AgentManager implements this with docker; tests use an in-memory fake.
+    """
+
+    @abstractmethod
+    async def start_replica(self, agent_id: str) -> Replica:
+        """
+        Start one more container of the agent and return it once it accepts requests
+        """
+
+    @abstractmethod
+    async def stop_replica(self, agent_id: str, replica: Replica) -> None:
+        """
+        Stop and remove a replica that has no requests left
+        """
+
+
+class ReplicaSet:
+    """
+    Replicas of one agent with least-outstanding-requests balancing
+
+    Each call leases the replica with the fewest requests in flight. The
+    autoscaler sizes the set from the peak of in-flight plus waiting
+    requests since its last pass, at target_concurrency requests per
+    replica, clamped to [min_replicas, max_replicas]. Scale-up is immediate;
+    scale-down waits until the set has been oversized for scale_down_delay
+    seconds and then drains one replica at a time. The first replica is the
+    primary and is never removed by the autoscaler.
+    """
+
+    def __init__(
+        self,
+        agent_id: str,
+        backend: ReplicaBackend,
+        min_replicas: int = 1,
+        max_replicas: int = 1,
+        target_concurrency: int = 4,
+        scale_down_delay: float = 60.0,
+        drain_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.agent_id = agent_id
+        self.backend = backend
+        self.min_replicas = max(min_replicas, 1)
+        self.max_replicas = max(max_replicas, self.min_replicas)
+        self.target_concurrency = max(target_concurrency, 1)
+        self.scale_down_delay = scale_down_delay
+        self.drain_timeout = drain_timeout
+        self._clock = clock
+        self.replicas: List[Replica] = []
+        self.waiting = 0
+        self._peak = 0
+        self._oversized_since: Optional[float] = None
+        self._scaling = asyncio.Lock()
+
+    @property
+    def primary(self) -> Optional[Replica]:
+        return self.replicas[0] if self.replicas else None
+
+    @property
+    def inflight(self) -> int:
+        return sum(replica.outstanding for replica in self.replicas)
+
+    def active(self) -> List[Replica]:
+        return [replica for replica in self.replicas if not replica.draining]
+
+    def add(self, replica: Replica) -> None:
+        self.replicas.append(replica)
+
+    def observe(self) -> None:
+        """
+        Fold the current load into the peak the autoscaler will see
+        """
+        self._peak = max(self._peak, self.inflight + self.waiting)
+
+    def pick(self) -> Optional[Replica]:
+        """
+        Replica with the fewest requests in flight (fewest served breaks ties)
+        """
+        candidates = self.active()
+        if not candidates:
+            return None
+        return min(candidates, key=lambda replica: (replica.outstanding, replica.served))
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[Optional[str]]:
+        """
+        Hold a replica for the duration of one request; yields its URL
+        """
+        replica = self.pick()
+        if replica is None:
+            yield None
+            return
+        replica.outstanding += 1
+        replica.served += 1
+        self.observe()
+        try:
+            yield replica.url
+        finally:
+            replica.outstanding -= 1
+
+    def desired(self) -> int:
+        load = max(self._peak, self.inflight + self.waiting)
+        wanted = math.ceil(load / self.target_concurrency)
+        return min(max(wanted, self.min_replicas), self.max_replicas)
+
+    async def autoscale(self) -> int:
+        """
+        One autoscaler pass; returns the change in replica count
+        """
+        async with self._scaling:
+            desired = self.desired()
+            self._peak = self.inflight + self.waiting
+            active = self.active()
+
+            if desired > len(active):
+                self._oversized_since = None
+                return await self._grow(desired - len(active))
+
+            if desired < len(active):
+                now = self._clock()
+                if self._oversized_since is None:
+                    self._oversized_since = now
+                if now - self._oversized_since < self.scale_down_delay:
+                    return 0
+                self._oversized_since = None
+                victim = min(active[1:], key=lambda replica: (replica.outstanding, -replica.started_at))
+                await self._drain(victim)
+                return -1
+
+            self._oversized_since = None
+            return 0
+
+    async def _grow(self, count: int) -> int:
+        results = await asyncio.gather(
+            *(self.backend.start_replica(self.agent_id) for _ in range(count)),
+            return_exceptions=True
+        )
+        added = 0
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.error(f"Failed to start replica for {self.agent_id}: {str(result)}")
+                continue
+            self.add(result)
+            added += 1
+        if added:
+            logger.info(f"Scaled {self.agent_id} up to {len(self.active())} replicas")
+        return added
+
+    async def _drain(self, replica: Replica) -> None:
+        """
+        Stop routing to a replica, wait for its requests to finish, then stop it
+        """
+        replica.draining = True
+        deadline = time.monotonic() + self.drain_timeout
+        while replica.outstanding > 0 and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        try:
+            await self.backend.stop_replica(self.agent_id, replica)
+        finally:
+            if replica in self.replicas:
+                self.replicas.remove(replica)
+        logger.info(f"Scaled {self.agent_id} down to {len(self.active())} replicas")
+
+    async def replace(self, replica: Replica) -> Replica:
+        """
+        Start a substitute in the replica's position, then drain the old one
+        """
+        async with self._scaling:
+            substitute = await self.backend.start_replica(self.agent_id)
+            self.replicas.insert(self.replicas.index(replica), substitute)
+            await self._drain(replica)
+            return substitute
+
+    async def shrink_to_primary(self) -> None:
+        """
+        Drain every replica except the primary
+        """
+        async with self._scaling:
+            extras = self.replicas[1:]
+            await asyncio.gather(*(self._drain(replica) for replica in extras), return_exceptions=True)
+            self._peak = 0
+            self._oversized_since = None
+
+    async def drain_all(self) -> None:
+        """
+        Drain every replica, the primary included, once a new set has taken over
+        """
+        async with self._scaling:
+            results = await asyncio.gather(
+                *(self._drain(replica) for replica in list(self.replicas)),
+                return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, BaseException):
+                    logger.error(f"Failed to stop replaced replica of {self.agent_id}: {str(result)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "replicas": len(self.active()),
+            "min_replicas": self.min_replicas,
+            "max_replicas": self.max_replicas,
+            "inflight": self.inflight,
+            "waiting": self.waiting,
+            "desired": self.desired(),
+            "members": [replica.to_dict() for replica in self.replicas]
+        }
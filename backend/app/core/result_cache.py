@@ -0,0 +1,166 @@
+from collections import OrderedDict
+from typing import Dict, Any, Tuple, Callable, Awaitable, Optional
+from functools import lru_cache
+import asyncio
+import hashlib
+import json
+import time
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str]
+
+
+class _LeaderCancelled(Exception):
+    """Set on an in-flight result whose computing caller was cancelled"""
+
+
+def result_version(metadata: Dict[str, Any]) -> str:
+    """
+    Cache version of an agent: its declared version plus the hash of its uploaded code
+    """
+    return f"{metadata.get('version', '')}:{metadata.get('content_hash', '')}"
+
+
+class ResultCache:
+    """
+    Content-addressed cache of successful agent predictions
+
+    Entries are keyed on (agent id, agent version, input hash) and evicted by
+    LRU order, TTL and a total memory budget. Identical requests that arrive
+    while the first one is still running wait for its result instead of
+    making their own upstream call.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[CacheKey, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._bytes = 0
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def make_key(agent_id: str, version: str, data: Any) -> CacheKey:
+        encoded = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+        return agent_id, version, hashlib.sha256(encoded.encode()).hexdigest()
+
+    def _agent_stats(self, agent_id: str) -> Dict[str, int]:
+        return self._stats.setdefault(agent_id, {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0})
+
+    def _lookup(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, size, value = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _remove(self, key: CacheKey) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _store(self, key: CacheKey, value: Dict[str, Any]) -> None:
+        size = len(json.dumps(value, default=str)) + len(key[2]) + len(key[0]) + len(key[1])
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, value)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            evicted = next(iter(self._entries))
+            self._remove(evicted)
+            self._agent_stats(evicted[0])["evictions"] += 1
+
+    async def get_or_compute(
+        self,
+        agent_id: str,
+        version: str,
+        data: Any,
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+        cacheable: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Serve a prediction from cache, an identical in-flight call, or compute()
+        """
+        if not cacheable:
+            return await compute()
+
+        key = self.make_key(agent_id, version, data)
+        stats = self._agent_stats(agent_id)
+        while True:
+            cached = self._lookup(key)
+            if cached is not None:
+                stats["hits"] += 1
+                return cached
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            try:
+                result = await asyncio.shield(inflight)
+            except _LeaderCancelled:
+                # The caller computing this result went away; the first waiter to wake takes over
+                continue
+            stats["coalesced"] += 1
+            return result
+
+        stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when no other caller was waiting
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        if result.get("status") == "success":
+            self._store(key, result)
+        future.set_result(result)
+        return result
+
+    def invalidate(self, agent_id: str) -> int:
+        """
+        Drop every cached result for an agent
+        """
+        keys = [key for key in self._entries if key[0] == agent_id]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def stats(self, agent_id: Optional[str] = None) -> Dict[str, Any]:
+        per_agent = {
+            agent: dict(counts)
+            for agent, counts in self._stats.items()
+            if agent_id is None or agent == agent_id
+        }
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "agents": per_agent
+        }
+
+
+@lru_cache()
+def get_result_cache() -> ResultCache:
+    return ResultCache(
+        max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+        max_bytes=settings.RESULT_CACHE_MAX_BYTES,
+        ttl=settings.RESULT_CACHE_TTL
+    )
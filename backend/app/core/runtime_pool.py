@@ -0,0 +1,171 @@
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+import asyncio
+import io
+import shutil
+import tarfile
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+RUNTIME_IMAGE = "smart-minions/runtime:latest"
+RUNTIME_BASE_REQUIREMENTS = ["gradio==4.7.1", "numpy==1.26.0"]
+RUNTIME_LABEL = "smart-minions.role"
+LOADER_TEMPLATE = Path(__file__).resolve().parents[2] / "templates" / "runtime_loader.py"
+
+
+class RuntimePool:
+    """
+    Pool of pre-started generic agent runtimes
+
+    Each idle runtime already has gradio and numpy imported and is waiting for
+    an agent to be copied in, so deploying an agent without extra
+    requirements skips the image build entirely.
+    """
+
+    def __init__(self, settings, docker_client, build_dir: Path):
+        self.settings = settings
+        self.docker_client = docker_client
+        self.size = settings.AGENT_WARM_POOL_SIZE
+        self.build_dir = build_dir
+        self._idle: List[Dict[str, Any]] = []
+        self._starting = 0
+        self._refill_task: Optional[asyncio.Task] = None
+        self._image_ready = False
+
+    def _ensure_image(self) -> None:
+        """
+        Build the runtime image once (blocking)
+        """
+        if self._image_ready:
+            return
+        try:
+            self.docker_client.images.get(RUNTIME_IMAGE)
+        except Exception:
+            self.build_dir.mkdir(parents=True, exist_ok=True)
+            shutil.copy(LOADER_TEMPLATE, self.build_dir / "runtime_loader.py")
+            dockerfile_content = f"""
+FROM python:3.9-slim
+WORKDIR /app
+RUN pip install {' '.join(RUNTIME_BASE_REQUIREMENTS)}
+COPY runtime_loader.py /opt/runtime_loader.py
+ENV GRADIO_SERVER_NAME=0.0.0.0
+EXPOSE 7860
+CMD ["python", "/opt/runtime_loader.py"]
+"""
+            with open(self.build_dir / "Dockerfile", "w") as f:
+                f.write(dockerfile_content)
+            logger.info(f"Building runtime image {RUNTIME_IMAGE}")
+            self.docker_client.images.build(path=str(self.build_dir), tag=RUNTIME_IMAGE, rm=True)
+        self._image_ready = True
+
+    def _start_runtime(self) -> Dict[str, Any]:
+        """
+        Start one idle runtime container (blocking)
+        """
+        self._ensure_image()
+        container = self.docker_client.containers.run(
+            RUNTIME_IMAGE,
+            detach=True,
+            ports={'7860/tcp': None},  # Random port
+            mem_limit=f"{self.settings.AGENT_MAX_MEMORY}m",
+            nano_cpus=int(self.settings.AGENT_DEFAULT_CPU * 1e9),
+            labels={RUNTIME_LABEL: "runtime"}
+        )
+        container.reload()
+        host_port = list(container.attrs['NetworkSettings']['Ports']['7860/tcp'])[0]['HostPort']
+        return {
+            "container_id": container.id,
+            "host_port": host_port,
+            "url": f"http://localhost:{host_port}",
+            "started_at": time.time()
+        }
+
+    def idle_count(self) -> int:
+        return len(self._idle)
+
+    def refill(self) -> Optional[asyncio.Task]:
+        """
+        Top the pool back up to its configured size in the background
+        """
+        if self.size <= 0:
+            return None
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill())
+        return self._refill_task
+
+    async def _refill(self) -> None:
+        while len(self._idle) + self._starting < self.size:
+            self._starting += 1
+            try:
+                runtime = await asyncio.to_thread(self._start_runtime)
+                self._idle.append(runtime)
+            except Exception as e:
+                logger.error(f"Failed to start warm runtime: {str(e)}")
+                return
+            finally:
+                self._starting -= 1
+
+    async def acquire(self) -> Dict[str, Any]:
+        """
+        Take an idle runtime, starting one on demand if the pool is empty
+        """
+        runtime = self._idle.pop(0) if self._idle else None
+        self.refill()
+        if runtime is None:
+            runtime = await asyncio.to_thread(self._start_runtime)
+        return runtime
+
+    def apply_limits(self, runtime: Dict[str, Any], memory_mb: int, cpus: float) -> None:
+        """
+        Resize a runtime to the memory and CPUs reserved for its agent (blocking)
+
+        Runtimes start with the default limits; an agent sized differently
+        gets its own reservation applied, as a dedicated container would.
+        """
+        if memory_mb == self.settings.AGENT_MAX_MEMORY and cpus == self.settings.AGENT_DEFAULT_CPU:
+            return
+        container = self.docker_client.containers.get(runtime["container_id"])
+        container.update(
+            mem_limit=f"{memory_mb}m",
+            memswap_limit=f"{memory_mb * 2}m",  # docker's default for a run with mem_limit
+            cpu_period=100000,
+            cpu_quota=int(cpus * 100000)
+        )
+
+    def load_agent(self, runtime: Dict[str, Any], code_path: Path, warmup: Optional[bytes] = None) -> None:
+        """
+        Copy the wrapped agent code into a runtime and release its loader (blocking)
+
+        A stored example cache (a tar of gradio_cached_examples) is copied in
+        first, so it is in place before the agent starts.
+        """
+        container = self.docker_client.containers.get(runtime["container_id"])
+        if warmup:
+            container.put_archive("/app", warmup)
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode="w") as tar:
+            # agent.py goes first so the marker only appears once the code is complete
+            tar.add(str(code_path), arcname="agent.py")
+            marker = tarfile.TarInfo("agent.ready")
+            marker.mtime = int(time.time())
+            tar.addfile(marker, io.BytesIO(b""))
+        container.put_archive("/app", archive.getvalue())
+
+    async def close(self) -> None:
+        """
+        Remove all idle runtimes
+        """
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+        idle, self._idle = self._idle, []
+
+        async def remove(runtime: Dict[str, Any]) -> None:
+            try:
+                container = await asyncio.to_thread(self.docker_client.containers.get, runtime["container_id"])
+                await asyncio.to_thread(container.remove, force=True)
+            except Exception as e:
+                logger.error(f"Failed to remove warm runtime {runtime['container_id']}: {str(e)}")
+
+        await asyncio.gather(*(remove(runtime) for runtime in idle))
@@ -0,0 +1,190 @@
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Iterable
+import itertools
+import logging
+
+logger = logging.getLogger(__name__)
+
+LOCAL_HOST = "local"
+
+
+class NoCapacity(Exception):
+    """No schedulable host has room for the requested resources"""
+    status_code = 503
+    code = "NO_HOST_CAPACITY"
+
+
+@dataclass
+class Placement:
+    container_id: str
+    agent_id: str
+    host: str
+    memory_mb: int
+    cpus: float
+
+
+@dataclass
+class Host:
+    name: str
+    client: Any
+    address: str
+    memory_mb: int
+    cpus: float
+    draining: bool = False
+    placements: Dict[str, Placement] = field(default_factory=dict)
+
+    @property
+    def used_memory_mb(self) -> int:
+        return sum(placement.memory_mb for placement in self.placements.values())
+
+    @property
+    def used_cpus(self) -> float:
+        return sum(placement.cpus for placement in self.placements.values())
+
+    def fits(self, memory_mb: int, cpus: float) -> bool:
+        return self.used_memory_mb + memory_mb <= self.memory_mb and self.used_cpus + cpus <= self.cpus + 1e-9
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "address": self.address,
+            "draining": self.draining,
+            "containers": len(self.placements),
+            "memory_mb": {"capacity": self.memory_mb, "used": self.used_memory_mb},
+            "cpus": {"capacity": self.cpus, "used": round(self.used_cpus, 2)}
+        }
+
+
+class HostScheduler:
+    """
+    Places agent containers on a pool of docker hosts
+
+    Placement is best-fit bin packing on the memory and CPU each container
+    requests: of the hosts that are not draining and have room, the one
+    left with the least free capacity wins, which keeps hosts full and
+    leaves whole hosts free for large agents. Hosts already running a
+    replica of the same agent are only used when nothing else fits.
+    Stopped containers keep their location but give up their reservation
+    until they are placed again. Pure bookkeeping; the caller runs the
+    containers.
+    """
+
+    def __init__(self, hosts: Iterable[Host]):
+        self.hosts: Dict[str, Host] = {host.name: host for host in hosts}
+        if not self.hosts:
+            raise ValueError("At least one docker host is required")
+        self.default = next(iter(self.hosts.values()))
+        self._where: Dict[str, str] = {}
+        self._pending = itertools.count(1)
+
+    def host_of(self, container_id: str) -> Host:
+        """
+        Host a container runs on; unknown containers are assumed local
+        """
+        return self.hosts.get(self._where.get(container_id, ""), self.default)
+
+    def client_for(self, container_id: str) -> Any:
+        return self.host_of(container_id).client
+
+    def url_for(self, container_id: str, host_port: Any) -> str:
+        return f"http://{self.host_of(container_id).address}:{host_port}"
+
+    def place(self, agent_id: str, memory_mb: int, cpus: float, prefer: Optional[str] = None) -> Placement:
+        """
+        Reserve room for a new container; bind() the reservation once it exists
+
+        A preferred host (where a stopped container already lives) wins
+        whenever it has room.
+        """
+        candidates = [
+            host for host in self.hosts.values()
+            if not host.draining and host.fits(memory_mb, cpus)
+        ]
+        if not candidates:
+            raise NoCapacity(f"No docker host has {memory_mb}MB and {cpus} CPUs free for {agent_id}")
+
+        def fit(host: Host) -> tuple:
+            colocated = any(placement.agent_id == agent_id for placement in host.placements.values())
+            free_memory = (host.memory_mb - host.used_memory_mb - memory_mb) / host.memory_mb
+            free_cpus = (host.cpus - host.used_cpus - cpus) / host.cpus
+            return (colocated, free_memory + free_cpus)
+
+        preferred = [host for host in candidates if host.name == prefer]
+        host = preferred[0] if preferred else min(candidates, key=fit)
+        return self.assign(host.name, f"pending-{next(self._pending)}", agent_id, memory_mb, cpus)
+
+    def assign(self, host_name: str, container_id: str, agent_id: str, memory_mb: int, cpus: float) -> Placement:
+        """
+        Record a container on a host without checking capacity
+        """
+        host = self.hosts[host_name]
+        placement = Placement(container_id, agent_id, host_name, memory_mb, cpus)
+        host.placements[container_id] = placement
+        self._where[container_id] = host_name
+        return placement
+
+    def bind(self, placement: Placement, container_id: str) -> None:
+        host = self.hosts[placement.host]
+        host.placements.pop(placement.container_id, None)
+        self._where.pop(placement.container_id, None)
+        placement.container_id = container_id
+        host.placements[container_id] = placement
+        self._where[container_id] = placement.host
+
+    def release(self, container_id: str) -> Optional[Placement]:
+        host_name = self._where.pop(container_id, None)
+        if host_name is None:
+            return None
+        return self.hosts[host_name].placements.pop(container_id, None)
+
+    def park(self, container_id: str) -> Optional[Placement]:
+        """
+        Free a stopped container's reservation; it stays on its host until removed
+        """
+        host_name = self._where.get(container_id)
+        if host_name is None:
+            return None
+        return self.hosts[host_name].placements.pop(container_id, None)
+
+    def locate(self, host_name: str, container_id: str) -> None:
+        """
+        Record where a stopped container lives without reserving room for it
+        """
+        self._where[container_id] = host_name
+
+    def drain(self, host_name: str) -> List[Placement]:
+        """
+        Stop placing on a host; returns the containers that have to move off it
+        """
+        host = self.hosts[host_name]
+        host.draining = True
+        return list(host.placements.values())
+
+    def undrain(self, host_name: str) -> None:
+        self.hosts[host_name].draining = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hosts": [host.to_dict() for host in self.hosts.values()]}
+
+
+def hosts_from_settings(settings, local_client) -> List[Host]:
+    """
+    The local docker host plus every entry of AGENT_HOSTS
+    """
+    import docker
+
+    memory_mb, cpus = settings.AGENT_LOCAL_HOST_MEMORY, settings.AGENT_LOCAL_HOST_CPUS
+    if not memory_mb or not cpus:
+        info = local_client.info()
+        memory_mb = memory_mb or info["MemTotal"] // (1024 * 1024)
+        cpus = cpus or info["NCPU"]
+    hosts = [Host(LOCAL_HOST, local_client, "localhost", memory_mb, cpus * settings.AGENT_CPU_OVERCOMMIT)]
+    for entry in settings.AGENT_HOSTS:
+        hosts.append(Host(
+            entry["name"],
+            docker.DockerClient(base_url=entry["base_url"]),
+            entry["address"],
+            int(entry["memory_mb"]),
+            float(entry["cpus"]) * settings.AGENT_CPU_OVERCOMMIT
+        ))
+    return hosts
@@ -0,0 +1,267 @@
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import AbstractSet, Dict, Any, Iterable, List, Optional, Set, Tuple
+from functools import lru_cache
+import heapq
+import math
+import re
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+FIELD_WEIGHTS = {"name": 3.0, "tags": 2.0, "description": 1.0}
+MAX_PREFIX_EXPANSION = 32
+PREFIX_CACHE_SIZE = 256
+# Rebuild a cached prefix group once the catalog size drifts this far from when it was scored
+PREFIX_IDF_DRIFT = 0.01
+EXHAUSTIVE_SCORING_LIMIT = 4096
+
+# (doc -> score, [(-score, doc)] sorted by impact, multiplier for both, doc set)
+_Group = Tuple[Dict[str, float], List[Tuple[float, str]], float, AbstractSet[str]]
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+class SearchIndex:
+    """
+    Incrementally maintained inverted index over agent name, description and tags
+
+    Each posting stores a field-weighted term frequency. Queries AND their
+    terms together, rank by idf-weighted impact and treat the last term as a
+    prefix for typeahead. Postings (and expanded prefixes) are kept sorted by
+    impact so top results are found without scoring every match. Writes patch
+    the sorted postings and any cached prefix groups covering the changed
+    agent in place, so steady traffic never rescans a whole expansion.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._ranked: Dict[str, List[Tuple[float, str]]] = {}
+        self._doc_terms: Dict[str, Set[str]] = {}
+        self._terms: List[str] = []
+        # prefix -> (doc count when scored, idf of each expanded term, group)
+        self._prefix_groups: "OrderedDict[str, Tuple[int, Dict[str, float], _Group]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def add(self, agent_id: str, metadata: Dict[str, Any]) -> None:
+        """
+        Index (or re-index) one agent
+        """
+        previous = self._drop(agent_id)
+        weights: Dict[str, float] = {}
+        fields = {
+            "name": str(metadata.get("name", "")),
+            "description": str(metadata.get("description", "")),
+            "tags": " ".join(str(tag) for tag in metadata.get("tags") or [])
+        }
+        for field_name, text in fields.items():
+            tokens = tokenize(text)
+            if not tokens:
+                continue
+            # Dampen long descriptions so they do not drown out name matches
+            weight = FIELD_WEIGHTS[field_name] / math.sqrt(len(tokens))
+            for token in tokens:
+                weights[token] = weights.get(token, 0.0) + weight
+
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._terms, term)
+            postings[agent_id] = weight
+            ranked = self._ranked.get(term)
+            if ranked is not None:
+                insort(ranked, (-weight, agent_id))
+        self._doc_terms[agent_id] = set(weights)
+        self._refresh_prefixes(agent_id, previous.union(weights))
+
+    def remove(self, agent_id: str) -> None:
+        self._refresh_prefixes(agent_id, self._drop(agent_id))
+
+    def _drop(self, agent_id: str) -> Set[str]:
+        """
+        Remove an agent's postings; returns the terms it had
+        """
+        terms = self._doc_terms.pop(agent_id, set())
+        for term in terms:
+            postings = self._postings[term]
+            weight = postings.pop(agent_id)
+            ranked = self._ranked.get(term)
+            if ranked is not None:
+                del ranked[bisect_left(ranked, (-weight, agent_id))]
+            if not postings:
+                del self._postings[term]
+                self._ranked.pop(term, None)
+                position = bisect_left(self._terms, term)
+                del self._terms[position]
+        return terms
+
+    def _refresh_prefixes(self, agent_id: str, terms: Iterable[str]) -> None:
+        """
+        Re-score one agent in the cached prefix groups that cover any of these terms
+        """
+        if not self._prefix_groups:
+            return
+        prefixes = {term[:end] for term in terms for end in range(1, len(term) + 1)}
+        for prefix in prefixes.intersection(self._prefix_groups):
+            _, term_idfs, (scores, ranked, _, _) = self._prefix_groups[prefix]
+            if len(term_idfs) < MAX_PREFIX_EXPANSION and any(
+                term.startswith(prefix) and term in self._postings and term not in term_idfs for term in terms
+            ):
+                # A new term joined a complete expansion; rebuild on next use
+                del self._prefix_groups[prefix]
+                continue
+            old = scores.pop(agent_id, None)
+            if old is not None:
+                del ranked[bisect_left(ranked, (-old, agent_id))]
+            new = 0.0
+            for term, idf in term_idfs.items():
+                weight = self._postings.get(term, {}).get(agent_id)
+                if weight is not None and weight * idf > new:
+                    new = weight * idf
+            if new > 0.0:
+                scores[agent_id] = new
+                insort(ranked, (-new, agent_id))
+
+    # Catalog listener hooks
+
+    def upsert(self, entry: Any) -> None:
+        self.add(entry.id, entry.metadata)
+
+    def discard(self, agent_id: str) -> None:
+        self.remove(agent_id)
+
+    def _idf(self, term: str) -> float:
+        return math.log(1 + len(self._doc_terms) / len(self._postings[term]))
+
+    def _ranked_postings(self, term: str) -> List[Tuple[float, str]]:
+        ranked = self._ranked.get(term)
+        if ranked is None:
+            ranked = sorted(((-weight, agent_id) for agent_id, weight in self._postings[term].items()))
+            self._ranked[term] = ranked
+        return ranked
+
+    def _expand(self, prefix: str) -> List[str]:
+        start = bisect_left(self._terms, prefix)
+        stop = bisect_left(self._terms, prefix + "\uffff")
+        terms = self._terms[start:stop]
+        if len(terms) > MAX_PREFIX_EXPANSION:
+            terms = heapq.nlargest(MAX_PREFIX_EXPANSION, terms, key=lambda term: len(self._postings[term]))
+        return terms
+
+    def _term_group(self, term: str) -> Optional[_Group]:
+        postings = self._postings.get(term)
+        if postings is None:
+            return None
+        return postings, self._ranked_postings(term), self._idf(term), postings.keys()
+
+    def _prefix_group(self, prefix: str) -> Optional[_Group]:
+        """
+        Scores for a typeahead prefix: each doc's best match among the expanded terms
+        """
+        cached = self._prefix_groups.get(prefix)
+        if cached is not None:
+            scored_at, _, group = cached
+            if abs(len(self._doc_terms) - scored_at) <= PREFIX_IDF_DRIFT * scored_at:
+                self._prefix_groups.move_to_end(prefix)
+                return group
+        terms = self._expand(prefix)
+        if not terms:
+            return None
+        if len(terms) == 1:
+            return self._term_group(terms[0])
+        scores: Dict[str, float] = {}
+        term_idfs = {term: self._idf(term) for term in terms}
+        for term, idf in term_idfs.items():
+            for agent_id, weight in self._postings[term].items():
+                if weight * idf > scores.get(agent_id, 0.0):
+                    scores[agent_id] = weight * idf
+        ranked = sorted((-score, agent_id) for agent_id, score in scores.items())
+        group = (scores, ranked, 1.0, scores.keys())
+        self._prefix_groups[prefix] = (len(self._doc_terms), term_idfs, group)
+        self._prefix_groups.move_to_end(prefix)
+        if len(self._prefix_groups) > PREFIX_CACHE_SIZE:
+            self._prefix_groups.popitem(last=False)
+        return group
+
+    def search(self, query: str, offset: int = 0, limit: int = 20, prefix: bool = True) -> Tuple[int, List[Tuple[str, float]]]:
+        """
+        Ranked (agent_id, score) matches for a query; returns (total, page)
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return 0, []
+        expand_last = prefix and not query[-1:].isspace()
+
+        groups: List[_Group] = []
+        for position, token in enumerate(dict.fromkeys(tokens)):
+            if expand_last and token == tokens[-1]:
+                group = self._prefix_group(token)
+            else:
+                group = self._term_group(token)
+            if group is None:
+                return 0, []
+            groups.append(group)
+
+        wanted = offset + limit
+        if len(groups) == 1:
+            # Postings are already ordered by impact
+            _, ranked, factor, _ = groups[0]
+            return len(ranked), [(agent_id, -score * factor) for score, agent_id in ranked[offset:wanted]]
+
+        # AND across terms. Small result sets are scored outright; for large
+        # ones the impact-ordered lists are walked in lockstep until no unseen
+        # document can beat the current top results.
+        groups.sort(key=lambda group: len(group[3]))
+        candidates = groups[0][3] & groups[1][3]
+        for group in groups[2:]:
+            candidates &= group[3]
+        total = len(candidates)
+        if total == 0:
+            return 0, []
+
+        def combined(agent_id: str) -> float:
+            return sum(scores[agent_id] * factor for scores, _, factor, _ in groups)
+
+        if total <= EXHAUSTIVE_SCORING_LIMIT:
+            top = heapq.nlargest(wanted, ((combined(agent_id), agent_id) for agent_id in candidates))
+        else:
+            top = []
+            seen: Set[str] = set()
+            depth = 0
+            longest = max(len(group[1]) for group in groups)
+            while depth < longest:
+                threshold = 0.0
+                for _, ranked, factor, _ in groups:
+                    if depth >= len(ranked):
+                        continue
+                    score, agent_id = ranked[depth]
+                    threshold -= score * factor
+                    if agent_id in seen or agent_id not in candidates:
+                        continue
+                    seen.add(agent_id)
+                    value = combined(agent_id)
+                    if len(top) < wanted:
+                        heapq.heappush(top, (value, agent_id))
+                    elif value > top[0][0]:
+                        heapq.heapreplace(top, (value, agent_id))
+                if len(top) >= min(wanted, total) and top[0][0] >= threshold:
+                    break
+                depth += 1
+
+        ordered = sorted(top, key=lambda item: (-item[0], item[1]))
+        return total, [(agent_id, score) for score, agent_id in ordered[offset:]]
+
+
+@lru_cache()
+def get_search_index() -> SearchIndex:
+    """
+    Shared SearchIndex fed by the agent catalog
+    """
+    from app.core.catalog import get_agent_catalog
+
+    index = SearchIndex()
+    get_agent_catalog().add_listener(index)
+    return index
@@ -0,0 +1,255 @@
+from array import array
+from typing import Dict, Any, List, Optional, Callable, Tuple
+import asyncio
+import math
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Headroom added on top of observed peaks when recommending limits
+MEMORY_HEADROOM = 1.25
+CPU_HEADROOM = 1.25
+MEMORY_STEP_MB = 64
+MIN_MEMORY_MB = 128
+CPU_STEP = 0.25
+
+
+class ResourceSeries:
+    """
+    Fixed-size ring buffer of resource samples for one container
+
+    Each field is a flat array of doubles, so a sample costs 40 bytes
+    however long the collector runs.
+    """
+
+    FIELDS = ("ts", "cpu", "mem", "rx", "tx")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = {name: array("d", bytes(8 * capacity)) for name in self.FIELDS}
+        self._next = 0
+        self.count = 0
+
+    def append(self, ts: float, cpu: float, mem: float, rx: float, tx: float) -> None:
+        position = self._next
+        for name, value in zip(self.FIELDS, (ts, cpu, mem, rx, tx)):
+            self._data[name][position] = value
+        self._next = (position + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def column(self, name: str) -> List[float]:
+        """
+        One field, oldest sample first
+        """
+        values = self._data[name]
+        if self.count < self.capacity:
+            return values[:self.count].tolist()
+        return (values[self._next:] + values[:self._next]).tolist()
+
+    def last_ts(self) -> float:
+        return self._data["ts"][(self._next - 1) % self.capacity] if self.count else 0.0
+
+
+def _quantile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(max(int(math.ceil(q * len(ordered))) - 1, 0), len(ordered) - 1)]
+
+
+def parse_stats(stats: Dict[str, Any]) -> Tuple[float, float, float, float]:
+    """
+    (cpu %, rss bytes, rx bytes, tx bytes) from one docker stats record
+    """
+    cpu_stats = stats.get("cpu_stats") or {}
+    precpu = stats.get("precpu_stats") or {}
+    cpu_delta = (cpu_stats.get("cpu_usage") or {}).get("total_usage", 0) \
+        - (precpu.get("cpu_usage") or {}).get("total_usage", 0)
+    system_delta = cpu_stats.get("system_cpu_usage", 0) - precpu.get("system_cpu_usage", 0)
+    online = cpu_stats.get("online_cpus") or len((cpu_stats.get("cpu_usage") or {}).get("percpu_usage") or []) or 1
+    cpu = cpu_delta / system_delta * online * 100 if cpu_delta > 0 and system_delta > 0 else 0.0
+
+    memory = stats.get("memory_stats") or {}
+    detail = memory.get("stats") or {}
+    # Page cache is reclaimable; cgroup v2 reports it as inactive_file, v1 as cache
+    rss = memory.get("usage", 0) - detail.get("inactive_file", detail.get("cache", 0))
+
+    rx = tx = 0
+    for network in (stats.get("networks") or {}).values():
+        rx += network.get("rx_bytes", 0)
+        tx += network.get("tx_bytes", 0)
+    return cpu, float(max(rss, 0)), float(rx), float(tx)
+
+
+class ResourceCollector:
+    """
+    Streams `docker stats` for managed containers into per-container ring buffers
+
+    A sync pass every interval starts a stats stream (one thread each) for
+    new containers and closes streams of containers that went away. Docker
+    pushes a record about once a second; one sample per interval is kept.
+    """
+
+    def __init__(
+        self,
+        client_for: Callable[[str], Any],
+        managed: Callable[[], Dict[str, str]],
+        interval: float,
+        capacity: int
+    ):
+        self._client_for = client_for
+        self._managed = managed
+        self.interval = interval
+        self.capacity = capacity
+        self._series: Dict[str, ResourceSeries] = {}
+        self._owners: Dict[str, str] = {}
+        self._streams: Dict[str, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._closed = threading.Event()
+
+    async def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._sync_loop())
+
+    async def _sync_loop(self) -> None:
+        while True:
+            try:
+                self.sync()
+            except Exception as e:
+                logger.error(f"Resource collector sync failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def sync(self) -> None:
+        managed = self._managed()
+        for container_id in list(self._streams):
+            if container_id not in managed:
+                self._stop_stream(container_id)
+        for container_id, agent_id in managed.items():
+            self._owners[container_id] = agent_id
+            if container_id not in self._streams:
+                self._streams[container_id] = None
+                threading.Thread(
+                    target=self._follow,
+                    args=(container_id,),
+                    name=f"docker-stats-{container_id[:12]}",
+                    daemon=True
+                ).start()
+        # Keep history for containers that are gone only while their agent is managed
+        agents = set(managed.values())
+        for container_id in list(self._series):
+            if container_id not in managed and self._owners.get(container_id) not in agents:
+                self._series.pop(container_id, None)
+                self._owners.pop(container_id, None)
+
+    def _follow(self, container_id: str) -> None:
+        """
+        Read one container's stats stream until it ends or is closed (own thread)
+        """
+        series = self._series.get(container_id)
+        if series is None:
+            series = self._series[container_id] = ResourceSeries(self.capacity)
+        stream = None
+        try:
+            container = self._client_for(container_id).containers.get(container_id)
+            stream = container.stats(stream=True, decode=True)
+            if container_id not in self._streams or self._closed.is_set():
+                stream.close()
+                return
+            self._streams[container_id] = stream
+            for stats in stream:
+                now = time.time()
+                if now - series.last_ts() < self.interval:
+                    continue
+                series.append(now, *parse_stats(stats))
+        except Exception as e:
+            if not self._closed.is_set():
+                logger.warning(f"Stats stream for {container_id[:12]} ended: {str(e)}")
+        finally:
+            # Let the next sync pass reconnect if the container is still managed
+            if self._streams.get(container_id) in (None, stream):
+                self._streams.pop(container_id, None)
+
+    def _stop_stream(self, container_id: str) -> None:
+        stream = self._streams.pop(container_id, None)
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    async def close(self) -> None:
+        self._closed.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for container_id in list(self._streams):
+            self._stop_stream(container_id)
+
+    def usage(self, agent_id: str, include_series: bool = False) -> Dict[str, Any]:
+        """
+        Per-container CPU, RSS and network usage for an agent, with summaries
+        """
+        containers = {}
+        for container_id, owner in self._owners.items():
+            series = self._series.get(container_id)
+            if owner != agent_id or series is None or series.count == 0:
+                continue
+            ts, cpu, mem = series.column("ts"), series.column("cpu"), series.column("mem")
+            rx, tx = series.column("rx"), series.column("tx")
+            span = ts[-1] - ts[0]
+            summary = {
+                "samples": series.count,
+                "cpu_percent": {
+                    "avg": round(sum(cpu) / len(cpu), 2),
+                    "p95": round(_quantile(cpu, 0.95), 2),
+                    "max": round(max(cpu), 2)
+                },
+                "rss_bytes": {"p95": int(_quantile(mem, 0.95)), "max": int(max(mem)), "last": int(mem[-1])},
+                "network_bytes_per_s": {
+                    "rx": round((rx[-1] - rx[0]) / span, 1) if span > 0 else 0.0,
+                    "tx": round((tx[-1] - tx[0]) / span, 1) if span > 0 else 0.0
+                }
+            }
+            if include_series:
+                summary["series"] = {"ts": ts, "cpu_percent": cpu, "rss_bytes": mem, "rx_bytes": rx, "tx_bytes": tx}
+            containers[container_id] = summary
+        return {"agent_id": agent_id, "containers": containers}
+
+    def peak_memory(self, agent_id: str) -> Optional[float]:
+        """
+        Highest observed RSS of any one replica of the agent, in bytes
+        """
+        peaks = [
+            max(self._series[container_id].column("mem"))
+            for container_id, owner in self._owners.items()
+            if owner == agent_id and container_id in self._series and self._series[container_id].count
+        ]
+        return max(peaks) if peaks else None
+
+    def recommend(self, agent_id: str, current_mem_mb: int, current_cpus: float) -> Dict[str, Any]:
+        """
+        Right-sized per-replica limits from observed peaks plus headroom
+        """
+        cpu_values: List[float] = []
+        mem_values: List[float] = []
+        for container_id, owner in self._owners.items():
+            series = self._series.get(container_id)
+            if owner == agent_id and series is not None:
+                cpu_values.extend(series.column("cpu"))
+                mem_values.extend(series.column("mem"))
+        if not mem_values:
+            return {"agent_id": agent_id, "samples": 0, "recommendation": None}
+
+        mem_mb = _quantile(mem_values, 0.99) / (1024 * 1024) * MEMORY_HEADROOM
+        mem_mb = max(MIN_MEMORY_MB, int(math.ceil(mem_mb / MEMORY_STEP_MB) * MEMORY_STEP_MB))
+        cpus = _quantile(cpu_values, 0.95) / 100 * CPU_HEADROOM
+        cpus = max(CPU_STEP, math.ceil(cpus / CPU_STEP) * CPU_STEP)
+        return {
+            "agent_id": agent_id,
+            "samples": len(mem_values),
+            "current": {"mem_limit_mb": current_mem_mb, "cpus": current_cpus},
+            "recommendation": {"mem_limit_mb": mem_mb, "cpus": cpus},
+            "memory_saved_mb": current_mem_mb - mem_mb
+        }
@@ -0,0 +1,93 @@
+from typing import Dict, Any, Optional
+from functools import lru_cache
+from starlette.routing import Mount
+import logging
+
+logger = logging.getLogger(__name__)
+
+UI_MOUNT_PREFIX = "/agents"
+
+
+class UIMountError(Exception):
+    """Raised when an agent UI cannot be mounted"""
+
+
+class UIMountRegistry:
+    """
+    Mounts agent Gradio apps as sub-applications of the main FastAPI app
+
+    Each agent's Blocks is served at /agents/{agent_id}/ui on the main ASGI
+    server, sharing its event loop and workers instead of starting a server
+    on its own port. Mounts are added and removed while the app is running.
+    """
+
+    def __init__(self, prefix: str = UI_MOUNT_PREFIX):
+        self.prefix = prefix
+        self._app = None
+        self._mounts: Dict[str, Mount] = {}
+        self._blocks: Dict[str, Any] = {}
+
+    def attach(self, app) -> None:
+        self._app = app
+
+    def path_for(self, agent_id: str) -> str:
+        return f"{self.prefix}/{agent_id}/ui"
+
+    def __contains__(self, agent_id: str) -> bool:
+        return agent_id in self._mounts
+
+    def mount(self, agent_id: str, blocks: Any) -> str:
+        """
+        Serve a Gradio Blocks under the agent's UI path; returns that path
+
+        Must run on the event loop: starting the Blocks queue schedules tasks.
+        """
+        if self._app is None:
+            raise UIMountError("No application attached to mount agent UIs on")
+        from gradio.routes import App
+
+        self.unmount(agent_id)
+        path = self.path_for(agent_id)
+        # Same preparation gr.mount_gradio_app does, minus the startup hook it
+        # registers on the parent app: that hook has already run (and would
+        # keep every unmounted Blocks alive), so the queue is started here
+        blocks.dev_mode = False
+        blocks.config = blocks.get_config_file()
+        blocks.validate_queue_settings()
+        gradio_app = App.create_app(blocks)
+        blocks.startup_events()
+
+        route = Mount(path, app=gradio_app)
+        self._app.router.routes.append(route)
+        self._mounts[agent_id] = route
+        self._blocks[agent_id] = blocks
+        logger.info(f"Mounted UI for {agent_id} at {path}")
+        return path
+
+    def unmount(self, agent_id: str) -> bool:
+        """
+        Remove an agent's UI route and stop its queue; False if it was not mounted
+        """
+        route = self._mounts.pop(agent_id, None)
+        blocks = self._blocks.pop(agent_id, None)
+        if route is None:
+            return False
+        try:
+            self._app.router.routes.remove(route)
+        except ValueError:
+            pass
+        if blocks is not None:
+            try:
+                blocks.close()
+            except Exception as e:
+                logger.warning(f"Error closing Gradio app for {agent_id}: {str(e)}")
+        logger.info(f"Unmounted UI for {agent_id}")
+        return True
+
+    def mounted(self) -> Dict[str, str]:
+        return {agent_id: route.path for agent_id, route in self._mounts.items()}
+
+
+@lru_cache()
+def get_ui_mounts() -> UIMountRegistry:
+    return UIMountRegistry()
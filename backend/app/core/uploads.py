@@ -0,0 +1,137 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+import asyncio
+import hashlib
+import json
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Room for the multipart framing and form fields around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload passes the configured size cap"""
+
+
+@dataclass
+class ReceivedUpload:
+    path: Path
+    sha256: str
+    size: int
+
+
+def _copy_and_hash(source: BinaryIO, dest: Path, max_bytes: int, chunk_size: int) -> ReceivedUpload:
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(dest, "wb") as out:
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds the {max_bytes} byte limit")
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        dest.unlink(missing_ok=True)
+        raise
+    return ReceivedUpload(dest, digest.hexdigest(), size)
+
+
+async def receive_upload(source: BinaryIO, spool_dir: Path, max_bytes: int, chunk_size: int) -> ReceivedUpload:
+    """
+    Stream an uploaded file to disk in chunks, hashing it on the way
+
+    Runs in a worker thread so large files never block the event loop, and
+    stops as soon as the size cap is crossed.
+    """
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    dest = spool_dir / f"{uuid.uuid4().hex}.upload"
+    return await asyncio.to_thread(_copy_and_hash, source, dest, max_bytes, chunk_size)
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject oversized upload requests before the multipart body is parsed
+
+    Requests announcing a larger Content-Length get a 413 straight away;
+    chunked bodies are counted as they arrive and cut off at the limit.
+    """
+
+    def __init__(self, app, path_suffix: str, max_bytes: int):
+        self.app = app
+        self.path_suffix = path_suffix
+        self.max_bytes = max_bytes
+        self.max_request_bytes = max_bytes + MULTIPART_OVERHEAD
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].endswith(self.path_suffix):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_request_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_request_bytes:
+                    exceeded = True
+                    raise UploadTooLarge(f"Upload exceeds the {self.max_bytes} byte limit")
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if exceeded:
+                # The app turned the aborted body into its own error response;
+                # answer with a 413 instead
+                if not response_started:
+                    response_started = True
+                    await self._reject(send)
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except UploadTooLarge:
+            if response_started:
+                return
+            await self._reject(send)
+
+    async def _reject(self, send) -> None:
+        body = json.dumps({
+            "detail": {
+                "error": {
+                    "message": f"Upload exceeds the {self.max_bytes} byte limit",
+                    "code": "UPLOAD_TOO_LARGE"
+                },
+                "status": "error"
+            }
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close")
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
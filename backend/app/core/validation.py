@@ -0,0 +1,156 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, List, Optional, Tuple, FrozenSet, Iterable
+from functools import lru_cache
+import asyncio
+import ast
+import re
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINTS = ("predict", "predict_batch")
+
+
+@dataclass
+class ValidationReport:
+    valid: bool = False
+    has_gradio_import: bool = False
+    has_interface: bool = False
+    entry_points: List[str] = field(default_factory=list)
+    imports: List[str] = field(default_factory=list)
+    disallowed_imports: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def analyze_code(code_content: str, allowlist: FrozenSet[str]) -> ValidationReport:
+    """
+    Static checks on uploaded agent code
+
+    Must stay a picklable top-level function: it runs in the process pool.
+    """
+    report = ValidationReport()
+    try:
+        tree = ast.parse(code_content)
+    except SyntaxError as e:
+        report.errors.append(f"Syntax error on line {e.lineno}: {e.msg}")
+        return report
+
+    imports = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for name in node.names:
+                imports.add(name.name.split(".")[0])
+                if name.name == 'gradio':
+                    report.has_gradio_import = True
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                report.errors.append("Relative imports are not supported")
+            elif node.module:
+                imports.add(node.module.split(".")[0])
+                if node.module == 'gradio':
+                    report.has_gradio_import = True
+        elif isinstance(node, ast.Call):
+            if isinstance(node.func, ast.Attribute):
+                if node.func.attr == 'Interface':
+                    report.has_interface = True
+            elif isinstance(node.func, ast.Name):
+                if node.func.id == 'Interface':
+                    report.has_interface = True
+
+    # Entry points have to be module-level so the wrapper can call them
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name in ENTRY_POINTS:
+            report.entry_points.append(node.name)
+
+    report.imports = sorted(imports)
+    report.disallowed_imports = sorted(module for module in imports if module not in allowlist)
+
+    if not report.has_gradio_import or not report.has_interface:
+        report.errors.append("Must contain a valid Gradio interface")
+    if not report.entry_points:
+        report.errors.append("Must define a predict or predict_batch function")
+    if report.disallowed_imports:
+        report.errors.append(f"Imports not allowed: {', '.join(report.disallowed_imports)}")
+    report.valid = not report.errors
+    return report
+
+
+def requirement_modules(requirements: Iterable[str]) -> FrozenSet[str]:
+    """
+    Best-guess import names for declared requirements ("scikit-learn" -> "scikit_learn")
+    """
+    modules = set()
+    for requirement in requirements:
+        match = re.match(r"\s*([A-Za-z0-9][A-Za-z0-9._-]*)", requirement)
+        if match:
+            modules.add(re.sub(r"[-.]", "_", match.group(1)).lower())
+    return frozenset(modules)
+
+
+class ValidationPipeline:
+    """
+    Runs static validation in a process pool with results memoized by content hash
+
+    Parsing and walking the AST is CPU-bound, so it is kept off the event
+    loop. With workers=0 validation runs inline, for environments where
+    subprocesses are unavailable.
+    """
+
+    def __init__(self, workers: int, allowlist: Iterable[str], memo_size: int):
+        self.workers = workers
+        self.allowlist = frozenset(allowlist)
+        self.memo_size = memo_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._memo: "OrderedDict[Tuple[str, FrozenSet[str]], ValidationReport]" = OrderedDict()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def validate(
+        self,
+        code_content: str,
+        content_hash: str,
+        requirements: Iterable[str] = ()
+    ) -> Tuple[ValidationReport, bool]:
+        """
+        Validate code; returns (report, served_from_memo)
+        """
+        allowlist = self.allowlist | requirement_modules(requirements)
+        key = (content_hash, allowlist)
+        report = self._memo.get(key)
+        if report is not None:
+            self._memo.move_to_end(key)
+            return report, True
+
+        if self.workers > 0:
+            loop = asyncio.get_running_loop()
+            report = await loop.run_in_executor(self._get_executor(), analyze_code, code_content, allowlist)
+        else:
+            report = analyze_code(code_content, allowlist)
+
+        self._memo[key] = report
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+        return report, False
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+@lru_cache()
+def get_validation_pipeline() -> ValidationPipeline:
+    return ValidationPipeline(
+        workers=settings.AGENT_VALIDATION_WORKERS,
+        allowlist=settings.AGENT_IMPORT_ALLOWLIST,
+        memo_size=settings.AGENT_VALIDATION_MEMO_SIZE
+    )
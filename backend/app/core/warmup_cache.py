@@ -0,0 +1,91 @@
+from pathlib import Path
+from typing import Dict, Any, Optional
+import hashlib
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Where gradio writes cached example outputs inside an agent container (cwd is /app)
+EXAMPLES_DIR = "/app/gradio_cached_examples"
+
+
+def agent_version(code_path: Path) -> str:
+    """
+    Version key of a deployed agent: hash of its generated code (blocking)
+    """
+    return hashlib.sha256(Path(code_path).read_bytes()).hexdigest()[:16]
+
+
+class WarmupCache:
+    """
+    Gradio example caches kept per agent version outside the containers
+
+    After an agent first becomes ready its cached examples are copied out
+    as a tar archive; later containers of the same version (replicas,
+    redeploys, restarts after a host drain) get the archive before they
+    start, so gradio finds the cache instead of recomputing every example.
+    A new version replaces the agent's previous archive.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._lock = threading.Lock()
+        # Counters are bumped from worker threads
+        self._stats_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "captured": 0}
+
+    def _count(self, **increments: int) -> None:
+        with self._stats_lock:
+            for name, value in increments.items():
+                self._stats[name] += value
+
+    def _path(self, agent_id: str, version: str) -> Path:
+        return self.root / agent_id / f"{version}.tar"
+
+    def get(self, agent_id: str, version: str) -> Optional[bytes]:
+        try:
+            data = self._path(agent_id, version).read_bytes()
+            self._count(hits=1)
+            return data
+        except OSError:
+            self._count(misses=1)
+            return None
+
+    def has(self, agent_id: str, version: str) -> bool:
+        return self._path(agent_id, version).exists()
+
+    def capture(self, container, agent_id: str, version: str) -> bool:
+        """
+        Copy a ready container's example cache into the store (blocking)
+
+        Returns False when the agent has nothing cached.
+        """
+        try:
+            chunks, _ = container.get_archive(EXAMPLES_DIR)
+            data = b"".join(chunks)
+        except Exception as e:
+            logger.info(f"No example cache to keep for {agent_id}: {str(e)}")
+            return False
+        path = self._path(agent_id, version)
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            for stale in path.parent.glob("*.tar"):
+                if stale != path:
+                    stale.unlink()
+            partial = path.with_suffix(".partial")
+            partial.write_bytes(data)
+            partial.replace(path)
+        self._count(captured=1)
+        logger.info(f"Stored example cache of {agent_id} version {version} ({len(data)} bytes)")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        archives = list(self.root.glob("*/*.tar")) if self.root.exists() else []
+        return {
+            **stats,
+            "archives": len(archives),
+            "bytes": sum(archive.stat().st_size for archive in archives)
+        }
@@ -1,5 +1,7 @@
 from app.db.database import Base, engine
 from app.models.item import Item  # Import all models here
+from app.models.deployment import AgentDeployment, AgentReplica
+from app.models.prediction_job import PredictionJob
 
 def init_db():
     """Initialize the database by creating all tables"""
@@ -7,6 +7,16 @@ import os
 from app.core.config import settings
 from app.api.v1.api import api_router
 from app.db.init_db import init_db
+from app.core.agent_manager import get_agent_manager
+from app.core.agent_proxy import get_agent_proxy
+from app.core.catalog import get_agent_catalog
+from app.core.search import get_search_index
+from app.core.uploads import UploadSizeLimitMiddleware
+from app.core.validation import get_validation_pipeline
+from app.core.agent_loader import get_agent_loader
+from app.core.ui_mounts import get_ui_mounts
+from app.core.prediction_jobs import get_prediction_jobs
+from app.core.batching import get_micro_batcher
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -24,6 +34,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Reject oversized agent uploads before the multipart body is parsed
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    path_suffix="/agents/upload",
+    max_bytes=settings.AGENT_MAX_UPLOAD_BYTES
+)
+
 # Ensure logs directory exists
 os.makedirs("logs", exist_ok=True)
 
@@ -39,6 +56,9 @@ logger.add(
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
+# Agent Gradio UIs are mounted on this app at /agents/{agent_id}/ui at runtime
+get_ui_mounts().attach(app)
+
 @app.on_event("startup")
 async def startup_event():
     """
@@ -48,6 +68,16 @@ async def startup_event():
     # Initialize the database
     init_db()
     logger.info("Database initialized")
+    get_search_index()  # subscribe before the catalog loads
+    await get_agent_catalog().start()
+    logger.info(f"Agent catalog loaded ({len(get_agent_catalog())} agents)")
+    try:
+        await get_agent_manager().start()
+        logger.info("Agent manager started")
+    except Exception as e:
+        logger.warning(f"Agent manager unavailable, container deploys disabled: {e}")
+    await get_prediction_jobs().start()
+    logger.info("Prediction job workers started")
 
 @app.on_event("shutdown")
 async def shutdown_event():
@@ -55,8 +85,24 @@ async def shutdown_event():
     Handle shutdown events
     """
     logger.info("Application shutting down...")
-    # Add any cleanup code here
-    pass
+    await get_agent_catalog().close()
+    # Unfinished jobs stay stored and are picked up again on the next start
+    if get_prediction_jobs.cache_info().currsize:
+        await get_prediction_jobs().close()
+    if get_micro_batcher.cache_info().currsize:
+        await get_micro_batcher().close()
+    # Drain and stop agents before closing the proxy their requests go through
+    if get_agent_manager.cache_info().currsize:
+        try:
+            await get_agent_manager().cleanup()
+        except Exception as e:
+            logger.error(f"Agent manager cleanup failed: {e}")
+    if get_agent_proxy.cache_info().currsize:
+        await get_agent_proxy().aclose()
+    if get_validation_pipeline.cache_info().currsize:
+        get_validation_pipeline().close()
+    if get_agent_loader.cache_info().currsize:
+        await get_agent_loader().close()
 
 @app.get("/")
 async def root():
@@ -69,6 +115,7 @@ async def http_exception_handler(request, exc):
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail},
+        headers=getattr(exc, "headers", None),
     )
 
 @app.exception_handler(Exception)
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+class AgentDeployment(Base):
+    __tablename__ = "agent_deployments"
+
+    agent_id = Column(String, primary_key=True, index=True)
+    image_name = Column(String)
+    runtime = Column(String, nullable=True)
+    code_path = Column(String)
+    metadata_json = Column(Text, default="{}")
+    status = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    replicas = relationship("AgentReplica", cascade="all, delete-orphan", order_by="AgentReplica.position")
+
+class AgentReplica(Base):
+    __tablename__ = "agent_replicas"
+
+    container_id = Column(String, primary_key=True)
+    agent_id = Column(String, ForeignKey("agent_deployments.agent_id"), index=True)
+    position = Column(Integer)
+    host_port = Column(String, nullable=True)
+    url = Column(String)
+    is_primary = Column(Boolean, default=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Text, Float
+from app.db.database import Base
+
+class PredictionJob(Base):
+    __tablename__ = "prediction_jobs"
+
+    job_id = Column(String, primary_key=True, index=True)
+    agent_id = Column(String, index=True)
+    owner_id = Column(String, index=True)
+    status = Column(String, index=True)
+    input_json = Column(Text)
+    result_json = Column(Text, nullable=True)
+    error_json = Column(Text, nullable=True)
+    callback_url = Column(String, nullable=True)
+    callback_status = Column(String, nullable=True)
+    attempts = Column(Integer, default=0)
+    created_at = Column(Float)
+    started_at = Column(Float, nullable=True)
+    finished_at = Column(Float, nullable=True)
+    expires_at = Column(Float, index=True)
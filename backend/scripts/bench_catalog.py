@@ -0,0 +1,75 @@
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.core.catalog import AgentCatalog, CatalogEntry
+
+CATALOG_SIZES = (1_000, 10_000, 50_000)
+TARGET_MS = 1.0
+
+MODEL_TYPES = ["text", "image", "audio", "video", "multimodal"]
+TAGS = ["nlp", "vision", "audio", "chatbot", "summarization", "classification", "generation", "ocr"]
+QUERIES = [
+    {},
+    {"is_public": True, "sort_by": "token_price"},
+    {"is_public": True, "sort_by": "token_price", "descending": True, "offset": 100},
+    {"tags": ["nlp"]},
+    {"model_type": "image", "sort_by": "token_price"},
+    {"model_type": "text", "tags": ["nlp", "chatbot"], "is_public": True, "sort_by": "token_price"},
+    {"is_public": False, "offset": 500}
+]
+
+
+def build_catalog(size: int) -> AgentCatalog:
+    rng = random.Random(42)
+    catalog = AgentCatalog(Path("does-not-exist"), rescan_interval=0)
+    catalog._loaded = True
+    for i in range(size):
+        catalog._index(CatalogEntry(f"agent_{i}", {
+            "name": f"Agent {i}",
+            "model_type": rng.choice(MODEL_TYPES),
+            "tags": rng.sample(TAGS, 2),
+            "is_public": rng.random() < 0.8,
+            "token_price": round(rng.uniform(0, 0.1), 4)
+        }, 0.0))
+    return catalog
+
+
+def run_benchmark(size: int, rounds: int = 50) -> dict:
+    catalog = build_catalog(size)
+    timings = []
+    for _ in range(rounds):
+        for query in QUERIES:
+            started = time.perf_counter()
+            catalog.query(limit=50, **query)
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "catalog_size": size,
+        "queries": len(timings),
+        "p50_ms": statistics.median(timings),
+        "p95_ms": timings[int(len(timings) * 0.95) - 1],
+        "max_ms": timings[-1]
+    }
+
+
+if __name__ == "__main__":
+    print("\nCatalog query benchmark (filtered and sorted listings)")
+    print("=" * 60)
+    failed = False
+    for size in CATALOG_SIZES:
+        results = run_benchmark(size)
+        print(
+            f"{results['catalog_size']:>7} agents: p50 {results['p50_ms']:.3f} ms, "
+            f"p95 {results['p95_ms']:.3f} ms, max {results['max_ms']:.3f} ms"
+        )
+        failed = failed or results["p95_ms"] >= TARGET_MS
+    print("=" * 60)
+    if failed:
+        print(f"FAIL: p95 is above the {TARGET_MS:.0f}ms target")
+        sys.exit(1)
+    print(f"OK: p95 stays under {TARGET_MS:.0f}ms as the catalog grows")
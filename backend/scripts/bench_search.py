@@ -0,0 +1,100 @@
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.core.search import SearchIndex
+
+CATALOG_SIZE = 50_000
+TARGET_MS = 10.0
+# One catalog write (publish or metadata edit) for every this many searches
+QUERIES_PER_UPSERT = 4
+
+WORDS = [
+    "text", "image", "audio", "video", "sentiment", "summarizer", "translator", "classifier",
+    "detector", "generator", "chatbot", "assistant", "vision", "speech", "language", "model",
+    "analysis", "keyword", "entity", "question", "answer", "code", "review", "legal", "medical",
+    "finance", "marketing", "email", "resume", "invoice", "receipt", "ocr", "caption", "emotion",
+    "toxicity", "spam", "search", "ranking", "recommendation", "forecast", "anomaly", "fraud",
+    "translation", "grammar", "style", "tone", "paraphrase", "outline", "essay", "poem"
+]
+TAGS = ["NLP", "vision", "audio", "chatbot", "summarization", "classification", "generation", "ocr"]
+QUERIES = [
+    "sentiment", "text summarizer", "sent", "im", "chatbot assistant", "legal rev",
+    "fraud detector", "nlp", "c", "speech translation", "medical question answer", "zzz"
+]
+
+
+def make_metadata(rng: random.Random, i: int) -> dict:
+    return {
+        "name": " ".join(rng.sample(WORDS, 2)).title() + f" {i}",
+        "description": " ".join(rng.choices(WORDS, k=rng.randint(8, 30))),
+        "tags": rng.sample(TAGS, 2)
+    }
+
+
+def build_index(size: int) -> SearchIndex:
+    rng = random.Random(42)
+    index = SearchIndex()
+    for i in range(size):
+        index.add(f"agent_{i}", make_metadata(rng, i))
+    return index
+
+
+def run_benchmark(size: int = CATALOG_SIZE, rounds: int = 50) -> dict:
+    started = time.perf_counter()
+    index = build_index(size)
+    build_seconds = time.perf_counter() - started
+
+    # Warm the per-term ranked postings the same way steady-state traffic would
+    for query in QUERIES:
+        index.search(query)
+
+    # Interleave upserts (existing agents edited, new ones published) with the
+    # searches so cache invalidation is part of what gets timed
+    rng = random.Random(7)
+    timings = []
+    upserts = 0
+    for _ in range(rounds):
+        for position, query in enumerate(QUERIES):
+            if position % QUERIES_PER_UPSERT == 0:
+                i = rng.randrange(size + size // 10)
+                metadata = make_metadata(rng, i)
+                started = time.perf_counter()
+                index.add(f"agent_{i}", metadata)
+                timings.append((time.perf_counter() - started) * 1000)
+                upserts += 1
+            started = time.perf_counter()
+            index.search(query, offset=0, limit=20)
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "catalog_size": size,
+        "build_seconds": build_seconds,
+        "queries": len(timings) - upserts,
+        "upserts": upserts,
+        "p50_ms": statistics.median(timings),
+        "p95_ms": timings[int(len(timings) * 0.95) - 1],
+        "max_ms": timings[-1]
+    }
+
+
+if __name__ == "__main__":
+    results = run_benchmark()
+    print("\nSearch index benchmark")
+    print("=" * 50)
+    print(f"Catalog size:   {results['catalog_size']} agents")
+    print(f"Index build:    {results['build_seconds']:.2f}s")
+    print(f"Queries timed:  {results['queries']}")
+    print(f"Upserts timed:  {results['upserts']}")
+    print(f"p50 latency:    {results['p50_ms']:.3f} ms")
+    print(f"p95 latency:    {results['p95_ms']:.3f} ms")
+    print(f"max latency:    {results['max_ms']:.3f} ms")
+    print("=" * 50)
+    if results["p95_ms"] >= TARGET_MS:
+        print(f"FAIL: p95 is above the {TARGET_MS:.0f}ms target")
+        sys.exit(1)
+    print(f"OK: p95 is under the {TARGET_MS:.0f}ms target")
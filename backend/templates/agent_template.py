@@ -26,6 +26,18 @@ def predict(text: str) -> str:
     
     return f"Sentiment: {sentiment} (Confidence: {confidence:.2f})"
 
+def predict_batch(texts: List[str]) -> List[str]:
+    """
+    Optional: handle a whole batch of inputs in one call.
+    When this is defined the platform sends batches here instead of calling
+    predict once per input. Return exactly one result per input, in order.
+    """
+    confidences = np.random.uniform(0.7, 1.0, size=len(texts))  # Replace with actual confidence
+    return [
+        predict(text).split(" (")[0] + f" (Confidence: {confidence:.2f})"
+        for text, confidence in zip(texts, confidences)
+    ]
+
 # Create Gradio interface
 demo = gr.Interface(
     fn=predict,
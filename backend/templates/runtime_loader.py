@@ -0,0 +1,23 @@
+"""
+Entrypoint of the generic SMART MINIONS agent runtime.
+
+The container starts idle with gradio and numpy already imported. Once the
+API copies an agent into /app (agent.py followed by the agent.ready marker)
+the agent is executed as __main__, which launches its Gradio server.
+"""
+import os
+import runpy
+import time
+
+import gradio  # noqa: F401  (preload so agent start-up skips the import)
+import numpy  # noqa: F401
+
+APP_DIR = "/app"
+AGENT_FILE = os.path.join(APP_DIR, "agent.py")
+READY_MARKER = os.path.join(APP_DIR, "agent.ready")
+POLL_INTERVAL = 0.1
+
+if __name__ == "__main__":
+    while not os.path.exists(READY_MARKER):
+        time.sleep(POLL_INTERVAL)
+    runpy.run_path(AGENT_FILE, run_name="__main__")
@@ -44,15 +44,16 @@ Keywords Found: {', '.join(keywords) if keywords else 'None'}"""
     return response
 
 def api_interface(text_list: List[str]) -> Dict[str, Any]:
-    """API endpoint function that handles list input"""
+    """API endpoint function that handles list input
+
+    Every text is analyzed and results come back in input order. Invalid
+    items get None in "data" and an entry in "errors" instead of failing
+    the whole batch.
+    """
+    start_time = time.time()
     try:
         if not isinstance(text_list, list) or not text_list:
             raise ValueError("Input must be a non-empty list of strings")
-            
-        # For demo, we'll just analyze the first text
-        result = analyze_text(text_list[0])
-        return result
-        
     except Exception as e:
         return {
             "error": {
@@ -62,6 +63,28 @@ def api_interface(text_list: List[str]) -> Dict[str, Any]:
             "status": "error"
         }
 
+    results = []
+    errors = []
+    for index, text in enumerate(text_list):
+        if not isinstance(text, str):
+            results.append(None)
+            errors.append({
+                "index": index,
+                "message": "Input must be a string",
+                "code": "INVALID_INPUT"
+            })
+            continue
+        results.append(analyze_text(text)["data"][0])
+
+    response = {
+        "data": results,
+        "status": "success" if not errors else ("error" if len(errors) == len(text_list) else "partial"),
+        "duration": float(f"{time.time() - start_time:.3f}")
+    }
+    if errors:
+        response["errors"] = errors
+    return response
+
 # Create Gradio interface with custom styling
 css = """
 .gradio-container {
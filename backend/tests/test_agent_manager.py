@@ -0,0 +1,241 @@
+import asyncio
+import itertools
+
+import pytest
+
+from app.core.agent_manager import AgentManager
+from app.core.config import Settings
+from app.core.scheduler import Host
+
+_ports = itertools.count(40000)
+
+# Each host fits two of these; the second replica avoids the first one's host
+TWO_REPLICAS = {"min_replicas": 2, "max_replicas": 2, "memory_mb": 512, "cpus": 1}
+
+
+class FakeContainer:
+    def __init__(self, client, image, labels):
+        self.client = client
+        self.id = f"{client.name}-{next(_ports)}"
+        self.image = image
+        self.status = "created"
+        self.attrs = {
+            "NetworkSettings": {"Ports": {"7860/tcp": [{"HostPort": self.id.rsplit("-", 1)[1]}]}},
+            "Config": {"Image": image, "Labels": labels}
+        }
+
+    def reload(self):
+        pass
+
+    def put_archive(self, path, data):
+        return True
+
+    def update(self, **limits):
+        self.limits = limits
+
+    def get_archive(self, path):
+        raise FileNotFoundError(path)
+
+    def start(self):
+        self.status = "running"
+
+    def stop(self, **kwargs):
+        self.status = "exited"
+
+    def remove(self, **kwargs):
+        self.client.containers.items.pop(self.id, None)
+
+
+class FakeImages:
+    def __init__(self, client):
+        self.client = client
+        self.tags = set()
+        self.loaded = []
+
+    def get(self, tag):
+        if tag not in self.tags:
+            raise LookupError(tag)
+        return self
+
+    def save(self, named=False):
+        # A chunked tarball, as the docker SDK yields it
+        return iter([b"layer-1", b"layer-2"])
+
+    def load(self, data):
+        assert hasattr(data, "read"), "image tarball should be streamed, not joined in memory"
+        self.loaded.append(data.read())
+        self.tags.add("smart-minions/agent-a")
+
+
+class FakeContainers:
+    def __init__(self, client):
+        self.client = client
+        self.items = {}
+
+    def create(self, image, labels=None, **kwargs):
+        container = FakeContainer(self.client, image, labels or {})
+        self.items[container.id] = container
+        return container
+
+    def run(self, image, labels=None, **kwargs):
+        container = self.create(image, labels=labels, **kwargs)
+        container.start()
+        return container
+
+    def get(self, container_id):
+        return self.items[container_id]
+
+    def list(self, all=False, filters=None, **kwargs):
+        return [c for c in self.items.values() if all or c.status == "running"]
+
+
+class FakeDocker:
+    def __init__(self, name):
+        self.name = name
+        self.images = FakeImages(self)
+        self.containers = FakeContainers(self)
+
+
+def make_cluster(**settings):
+    local, remote = FakeDocker("local"), FakeDocker("remote")
+    local.images.tags.update({"smart-minions/agent-a", "smart-minions/runtime:latest"})
+    manager = AgentManager(
+        Settings(**{"AGENT_WARM_POOL_SIZE": 0, "AGENT_TELEMETRY_INTERVAL": 0, **settings}),
+        hosts=[
+            Host("local", local, "localhost", memory_mb=1024, cpus=4),
+            Host("remote", remote, "10.0.0.2", memory_mb=1024, cpus=4)
+        ]
+    )
+    manager._build_image = lambda agent_id, code_path, requirements: f"smart-minions/agent-{agent_id}"
+
+    async def ready(url, deadline):
+        pass
+
+    manager._wait_until_ready = ready
+    return manager, local, remote
+
+
+@pytest.fixture
+def cluster(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return make_cluster()
+
+
+def test_replica_on_remote_host_streams_the_image_there(cluster):
+    manager, local, remote = cluster
+
+    async def scenario():
+        await manager.deploy_agent("a", "agent.py", TWO_REPLICAS)
+
+    asyncio.run(scenario())
+    urls = sorted(replica.url for replica in manager._replica_sets["a"].replicas)
+    assert urls[0].startswith("http://10.0.0.2:") and urls[1].startswith("http://localhost:")
+    assert remote.images.loaded == [b"layer-1layer-2"]
+
+
+def test_drain_host_moves_replicas_and_keeps_them_serving(cluster):
+    manager, local, remote = cluster
+
+    async def scenario():
+        await manager.deploy_agent("a", "agent.py", TWO_REPLICAS)
+        return await manager.drain_host("remote")
+
+    summary = asyncio.run(scenario())
+    assert summary["moved"] == 1 and summary["failed"] == 0
+    assert not remote.containers.items
+    replicas = manager._replica_sets["a"].replicas
+    assert len(replicas) == 2
+    assert all(replica.url.startswith("http://localhost:") for replica in replicas)
+    assert manager.scheduler.stats()["hosts"][1]["draining"] is True
+
+
+def test_failed_warm_runtime_load_removes_runtime_and_reservation(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    manager, local, remote = make_cluster(AGENT_WARM_POOL_SIZE=1)
+
+    def broken_load(runtime, code_path, warmup=None):
+        raise RuntimeError("copy failed")
+
+    manager.runtime_pool.load_agent = broken_load
+    manager.runtime_pool.refill = lambda: None
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await manager.deploy_agent("a", "agent.py", {"memory_mb": 256, "cpus": 0.5})
+
+    asyncio.run(scenario())
+    assert not local.containers.items
+    assert manager.scheduler.stats()["hosts"][0]["containers"] == 0
+
+
+def test_warm_runtime_gets_the_agents_reserved_limits(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "agent.py").write_text("print('agent')")
+    manager, local, remote = make_cluster(AGENT_WARM_POOL_SIZE=1)
+    manager.runtime_pool.refill = lambda: None
+
+    async def scenario():
+        return await manager.deploy_agent("a", "agent.py", {"memory_mb": 256, "cpus": 0.5})
+
+    info = asyncio.run(scenario())
+    container = local.containers.items[info["container_id"]]
+    assert container.limits["mem_limit"] == "256m" and container.limits["cpu_quota"] == 50000
+    assert manager.scheduler.stats()["hosts"][0]["memory_mb"]["used"] == 256
+
+
+def used_memory(manager):
+    return [host["memory_mb"]["used"] for host in manager.scheduler.stats()["hosts"]]
+
+
+def test_redeploy_removes_the_previous_replicas_and_their_reservations(cluster):
+    manager, local, remote = cluster
+
+    async def scenario():
+        await manager.deploy_agent("a", "agent.py", TWO_REPLICAS)
+        first = {replica.container_id for replica in manager._replica_sets["a"].replicas}
+        await manager.deploy_agent("a", "agent.py", TWO_REPLICAS)
+        return first
+
+    first = asyncio.run(scenario())
+    current = {replica.container_id for replica in manager._replica_sets["a"].replicas}
+    assert len(current) == 2 and not first & current
+    assert set(local.containers.items) | set(remote.containers.items) == current
+    assert sum(used_memory(manager)) == 1024
+
+
+def test_reaped_agent_frees_its_host_and_is_placed_again_on_wake(cluster):
+    manager, local, remote = cluster
+    local.images.tags.update({"smart-minions/agent-b", "smart-minions/agent-c"})
+    whole_host = {"memory_mb": 1024, "cpus": 1}
+
+    async def reap(agent_id):
+        manager._running_agents[agent_id]["last_used"] = 0
+        assert await manager.reap_idle() == [agent_id]
+
+    async def wake(agent_id):
+        async with manager.lease_endpoint(agent_id) as url:
+            return url
+
+    async def scenario():
+        await manager.deploy_agent("a", "agent.py", whole_host)
+        stopped = manager._running_agents["a"]["container_id"]
+        await reap("a")
+        assert used_memory(manager) == [0, 0]
+
+        # The freed host goes to the next deploy, so waking a has to move it
+        await manager.deploy_agent("b", "agent.py", whole_host)
+        assert used_memory(manager) == [1024, 0]
+        url = await wake("a")
+        await asyncio.gather(*manager._background)
+        assert url.startswith("http://10.0.0.2:")
+        assert stopped not in local.containers.items
+        assert used_memory(manager) == [1024, 1024]
+
+        # With every host full the wake fails cleanly and books nothing
+        await reap("a")
+        await manager.deploy_agent("c", "agent.py", whole_host)
+        assert await wake("a") is None
+        assert manager._running_agents["a"]["status"] == "stopped"
+        assert used_memory(manager) == [1024, 1024]
+
+    asyncio.run(scenario())
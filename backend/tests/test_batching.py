@@ -0,0 +1,32 @@
+import asyncio
+
+from app.core.admission import Admission, AdmissionController
+from app.core.batching import MicroBatcher
+
+
+def test_batch_larger_than_inflight_limit_fills_and_holds_one_slot():
+    async def scenario():
+        admission = AdmissionController(max_inflight=2, max_queue=0, queue_timeout=1)
+        calls = []
+
+        async def forward(agent_id, payload):
+            calls.append(len(payload["data"]))
+            await asyncio.sleep(0.01)
+            return {"data": [item * 2 for item in payload["data"]]}
+
+        async def limits(agent_id):
+            # A wait this long would time the test out; the batch must flush on size
+            return 16, 60_000
+
+        batcher = MicroBatcher(forward, limits, admission.admit)
+        timing = Admission()
+        results = await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit("agent", item, timing if item == 0 else None) for item in range(16))),
+            timeout=5
+        )
+        assert calls == [16]
+        assert [result["data"] for result in results] == [[item * 2] for item in range(16)]
+        assert admission.stats("agent")["agents"]["agent"]["admitted"] == 1
+        assert timing.execution > 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,66 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from app.core.catalog import AgentCatalog, CatalogEntry
+
+MODEL_TYPES = ["text", "image", "audio", "multimodal"]
+TAGS = ["nlp", "vision", "audio", "chatbot", "ocr", "finance"]
+
+
+def build_catalog(size):
+    rng = random.Random(7)
+    catalog = AgentCatalog(Path("does-not-exist"), rescan_interval=0)
+    catalog._loaded = True
+    for i in range(size):
+        catalog._index(CatalogEntry(f"agent_{i}", {
+            "name": f"Agent {rng.randint(0, size)}",
+            "model_type": rng.choice(MODEL_TYPES),
+            "tags": rng.sample(TAGS, rng.randint(0, 3)),
+            "is_public": rng.random() < 0.7,
+            "token_price": round(rng.uniform(0, 1), 2)
+        }, 0.0))
+    return catalog
+
+
+def brute_force(catalog, model_type=None, tags=None, is_public=None, sort_by=None, descending=False,
+                offset=0, limit=50):
+    entries = [
+        entry for entry in catalog._entries.values()
+        if (model_type is None or entry.metadata["model_type"] == model_type)
+        and all(tag in entry.metadata["tags"] for tag in tags or [])
+        and (is_public is None or entry.metadata["is_public"] == is_public)
+    ]
+    key = (lambda entry: (entry.price, entry.id)) if sort_by == "token_price" else (lambda entry: (entry.name, entry.id))
+    entries.sort(key=key, reverse=descending)
+    return len(entries), [entry.id for entry in entries[offset:offset + limit]]
+
+
+@pytest.fixture(scope="module")
+def large_catalog():
+    return build_catalog(10_000)
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"is_public": True, "sort_by": "token_price"},
+    {"is_public": False, "descending": True, "offset": 30},
+    {"tags": ["nlp"], "sort_by": "token_price", "descending": True},
+    {"model_type": "image", "tags": ["vision", "ocr"], "sort_by": "token_price", "offset": 5, "limit": 10},
+    {"model_type": "audio", "is_public": True, "offset": 2000},
+    {"tags": ["missing"]}
+])
+def test_indexed_query_matches_full_scan_at_10k(large_catalog, filters):
+    total, page = large_catalog.query(**filters)
+    assert (total, [entry.id for entry in page]) == brute_force(large_catalog, **filters)
+
+
+def test_reindexed_agent_moves_between_filters():
+    catalog = build_catalog(100)
+    catalog._index(CatalogEntry("agent_1", {"name": "Moved", "model_type": "video", "tags": ["NLP"],
+                                            "is_public": True, "token_price": 0.001}, 1.0))
+    total, page = catalog.query(model_type="video", tags=["nlp"], sort_by="token_price")
+    assert total == 1 and page[0].id == "agent_1"
+    catalog.remove("agent_1")
+    assert catalog.query(model_type="video") == (0, [])
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+
+from app.core.container_status import ContainerStatusCache
+
+
+class FakeContainer:
+    def __init__(self, container_id, status):
+        self.id = container_id
+        self.status = status
+
+
+class FakeContainers:
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.calls = 0
+        # The first listing snapshots the daemon, then blocks until released
+        self.listed = threading.Event()
+        self.release = threading.Event()
+
+    def list(self, all=False, filters=None):
+        self.calls += 1
+        snapshot = [FakeContainer(container_id, status) for container_id, status in self.statuses.items()]
+        if self.calls == 1:
+            self.listed.set()
+            self.release.wait(5)
+        return snapshot
+
+
+class FakeDocker:
+    def __init__(self, statuses):
+        self.containers = FakeContainers(statuses)
+
+
+async def wait_for(event):
+    while not event.is_set():
+        await asyncio.sleep(0.001)
+
+
+def test_events_during_a_listing_win_over_it():
+    docker = FakeDocker({"a": "running", "b": "running"})
+    cache = ContainerStatusCache(docker, "smart-minions.managed=true", 0)
+
+    async def scenario():
+        resync = asyncio.create_task(cache.resync())
+        await wait_for(docker.containers.listed)
+        # Docker moves on while the (now stale) listing is in flight
+        cache._apply("a", "exited")
+        cache._apply("b", None)
+        cache._apply("c", "running")
+        docker.containers.release.set()
+        await resync
+
+    asyncio.run(scenario())
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("exited", None, "running")
+
+
+def test_overlapping_resyncs_do_not_drop_newer_events():
+    statuses = {"a": "running"}
+    docker = FakeDocker(statuses)
+    cache = ContainerStatusCache(docker, "smart-minions.managed=true", 0)
+
+    async def scenario():
+        slow = asyncio.create_task(cache.resync())
+        await wait_for(docker.containers.listed)
+        statuses["a"] = "exited"
+        cache._apply("a", "exited")
+        # A reconnect triggers another resync while the first is still listing
+        fast = asyncio.create_task(cache.resync())
+        await asyncio.sleep(0.01)
+        docker.containers.release.set()
+        await asyncio.gather(slow, fast)
+
+    asyncio.run(scenario())
+    assert cache.get("a") == "exited"
+    assert docker.containers.calls == 2
@@ -0,0 +1,165 @@
+import asyncio
+import socket
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import admission
+from app.core.admission import AgentOverloaded
+from app.core.prediction_jobs import (
+    CallbackRejected, JobStore, PredictionJobs, check_callback_url, forward_when_admitted
+)
+from app.db.database import Base
+from app.models.prediction_job import PredictionJob
+
+
+def resolving_to(*addresses):
+    def getaddrinfo(host, port, *args, **kwargs):
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port)) for address in addresses]
+    return getaddrinfo
+
+
+@pytest.fixture
+def store(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[PredictionJob.__table__])
+    return JobStore(sessionmaker(bind=engine))
+
+
+def make_jobs(store, execute=None, **options):
+    async def never_called(agent_id, data):
+        raise AssertionError("job should not run")
+
+    return PredictionJobs(
+        store, execute or never_called, workers=1, queue_size=10, ttl=60, cleanup_interval=0,
+        callback_retries=0, **options
+    )
+
+
+def add_job(store, job_id, callback_url=None, **fields):
+    store.create({
+        "job_id": job_id, "agent_id": "a", "owner_id": "u", "status": "queued", "data": ["x"],
+        "callback_url": callback_url, "created_at": time.time(), "expires_at": time.time() + 60
+    })
+    if fields:
+        store.update(job_id, **fields)
+
+
+@pytest.mark.parametrize("url", [
+    "ftp://example.com/hook",
+    "not a url",
+    "http://127.0.0.1/hook",
+    "http://10.1.2.3/hook",
+    "http://192.168.0.10:8080/hook",
+    "http://169.254.169.254/latest/meta-data",
+    "http://[::1]/hook",
+    "http://[::ffff:127.0.0.1]/hook",
+    "http://[fe80::1]/hook",
+    "http://0.0.0.0/hook"
+])
+def test_callback_urls_to_internal_addresses_are_rejected(url):
+    with pytest.raises(CallbackRejected):
+        asyncio.run(check_callback_url(url))
+
+
+def test_host_resolving_to_any_internal_address_is_rejected(monkeypatch):
+    monkeypatch.setattr(socket, "getaddrinfo", resolving_to("93.184.216.34", "10.0.0.7"))
+    with pytest.raises(CallbackRejected):
+        asyncio.run(check_callback_url("https://hooks.example.com/done"))
+
+
+def test_public_callback_returns_its_vetted_addresses(monkeypatch):
+    monkeypatch.setattr(socket, "getaddrinfo", resolving_to("93.184.216.34", "93.184.216.34"))
+    assert asyncio.run(check_callback_url("https://hooks.example.com/done")) == ["93.184.216.34"]
+
+
+def test_allowlist_admits_only_listed_hosts_without_resolving():
+    allowed = ["hooks.internal"]
+    assert asyncio.run(check_callback_url("http://hooks.internal:9000/done", allowed)) == []
+    with pytest.raises(CallbackRejected):
+        asyncio.run(check_callback_url("http://other.internal/done", allowed))
+
+
+def test_callback_connects_to_the_address_that_passed_the_check(store, monkeypatch):
+    # Resolves to a public address for the check, then rebinds to loopback
+    answers = iter([resolving_to("93.184.216.34"), resolving_to("127.0.0.1")])
+    monkeypatch.setattr(socket, "getaddrinfo", lambda *args, **kwargs: next(answers)(*args, **kwargs))
+    sent = []
+
+    def handler(request):
+        sent.append(request)
+        return httpx.Response(200)
+
+    jobs = make_jobs(store)
+    jobs._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    add_job(store, "j1", callback_url="https://hooks.example.com:8443/done?job=1", status="succeeded")
+
+    async def scenario():
+        await jobs._deliver(store.get("j1"))
+        await jobs.close()
+
+    asyncio.run(scenario())
+    (request,) = sent
+    assert request.url.host == "93.184.216.34" and request.url.port == 8443
+    assert request.url.raw_path == b"/done?job=1"
+    assert request.headers["host"] == "hooks.example.com:8443"
+    assert request.extensions["sni_hostname"] == "hooks.example.com"
+    assert store.get("j1")["callback_status"] == "delivered"
+
+
+def test_job_started_max_attempts_times_is_failed_without_running(store):
+    jobs = make_jobs(store, max_attempts=3)
+    add_job(store, "j1", status="running", attempts=3)
+
+    asyncio.run(jobs._run("j1"))
+    job = store.get("j1")
+    assert job["status"] == "failed" and job["error"]["code"] == "JOB_ATTEMPTS_EXCEEDED"
+    assert job["attempts"] == 3
+
+
+def test_interrupted_job_below_the_cap_runs_again(store):
+    async def execute(agent_id, data):
+        return {"status": "success", "data": data}
+
+    jobs = make_jobs(store, execute, max_attempts=3)
+    add_job(store, "j1", status="running", attempts=2)
+
+    asyncio.run(jobs._run("j1"))
+    job = store.get("j1")
+    assert job["status"] == "succeeded" and job["attempts"] == 3
+
+
+class SheddingController:
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+        self.tries = 0
+
+    @asynccontextmanager
+    async def admit(self, agent_id):
+        self.tries += 1
+        raise AgentOverloaded("busy", self.retry_after)
+        yield
+
+
+def test_admission_retries_stop_at_the_job_timeout(monkeypatch):
+    controller = SheddingController(retry_after=0)
+    monkeypatch.setattr(admission, "get_admission_controller", lambda: controller)
+
+    started = time.monotonic()
+    with pytest.raises(AgentOverloaded):
+        asyncio.run(forward_when_admitted("a", ["x"], timeout=0.05))
+    assert controller.tries > 1 and time.monotonic() - started < 1
+
+
+def test_retry_after_past_the_timeout_fails_without_waiting(monkeypatch):
+    controller = SheddingController(retry_after=30)
+    monkeypatch.setattr(admission, "get_admission_controller", lambda: controller)
+
+    started = time.monotonic()
+    with pytest.raises(AgentOverloaded):
+        asyncio.run(forward_when_admitted("a", ["x"], timeout=10))
+    assert controller.tries == 1 and time.monotonic() - started < 1
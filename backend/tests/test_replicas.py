@@ -0,0 +1,106 @@
+import asyncio
+import itertools
+
+import pytest
+
+from app.core.replicas import Replica, ReplicaBackend, ReplicaSet
+
+
+class FakeBackend(ReplicaBackend):
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self.started = []
+        self.stopped = []
+
+    async def start_replica(self, agent_id):
+        replica = Replica(f"c{next(self._ids)}", f"http://replica-{len(self.started) + 1}")
+        self.started.append(replica.container_id)
+        return replica
+
+    async def stop_replica(self, agent_id, replica):
+        self.stopped.append(replica.container_id)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_set(backend, clock, **kwargs):
+    replica_set = ReplicaSet("agent", backend, target_concurrency=2, scale_down_delay=30, clock=clock, **kwargs)
+    replica_set.add(Replica("c0", "http://primary"))
+    return replica_set
+
+
+def test_lease_picks_least_outstanding_replica():
+    async def scenario():
+        replica_set = make_set(FakeBackend(), FakeClock())
+        replica_set.add(Replica("c1", "http://second"))
+        async with replica_set.lease() as first:
+            async with replica_set.lease() as second:
+                assert {first, second} == {"http://primary", "http://second"}
+                assert replica_set.inflight == 2
+        assert replica_set.inflight == 0
+
+    asyncio.run(scenario())
+
+
+def test_scales_up_with_concurrency_within_max():
+    async def scenario():
+        backend = FakeBackend()
+        replica_set = make_set(backend, FakeClock(), max_replicas=3)
+        leases = [replica_set.lease() for _ in range(9)]
+        for lease in leases:
+            await lease.__aenter__()
+        assert replica_set.desired() == 3
+        assert await replica_set.autoscale() == 2
+        assert len(replica_set.active()) == 3
+        for lease in leases:
+            await lease.__aexit__(None, None, None)
+
+    asyncio.run(scenario())
+
+
+def test_min_replicas_started_on_first_pass():
+    async def scenario():
+        backend = FakeBackend()
+        replica_set = make_set(backend, FakeClock(), min_replicas=2, max_replicas=4)
+        assert await replica_set.autoscale() == 1
+        assert len(backend.started) == 1
+
+    asyncio.run(scenario())
+
+
+def test_scale_down_waits_for_delay_and_keeps_primary():
+    async def scenario():
+        backend = FakeBackend()
+        clock = FakeClock()
+        replica_set = make_set(backend, clock, max_replicas=3)
+        replica_set.waiting = 6
+        await replica_set.autoscale()
+        replica_set.waiting = 0
+        await replica_set.autoscale()  # resets the peak
+        assert len(replica_set.active()) == 3
+
+        assert await replica_set.autoscale() == 0
+        clock.now += 31
+        assert await replica_set.autoscale() == -1
+        assert await replica_set.autoscale() == 0  # one replica per delay
+        clock.now += 31
+        assert await replica_set.autoscale() == -1
+        assert [replica.container_id for replica in replica_set.replicas] == ["c0"]
+        assert len(backend.stopped) == 2
+
+    asyncio.run(scenario())
+
+
+def test_incomplete_backend_cannot_be_constructed():
+    class StartOnly(ReplicaBackend):
+        async def start_replica(self, agent_id):
+            return Replica("c1", "http://replica")
+
+    with pytest.raises(TypeError):
+        StartOnly()
@@ -0,0 +1,52 @@
+import asyncio
+
+from app.core.result_cache import ResultCache
+
+
+def make_cache():
+    return ResultCache(max_entries=100, max_bytes=1_000_000, ttl=60)
+
+
+def test_concurrent_identical_requests_compute_once():
+    async def scenario():
+        cache = make_cache()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"status": "success", "data": ["out"]}
+
+        results = await asyncio.gather(*(cache.get_or_compute("agent", "v1", ["in"], compute) for _ in range(5)))
+        assert len(calls) == 1
+        assert all(result == {"status": "success", "data": ["out"]} for result in results)
+        assert cache.stats("agent")["agents"]["agent"] == {"hits": 0, "misses": 1, "coalesced": 4, "evictions": 0}
+        # Later identical requests are served from the cache
+        await cache.get_or_compute("agent", "v1", ["in"], compute)
+        assert len(calls) == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_leader_hands_the_computation_to_a_follower():
+    async def scenario():
+        cache = make_cache()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"status": "success", "data": [len(calls)]}
+
+        leader = asyncio.create_task(cache.get_or_compute("agent", "v1", ["in"], compute))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.create_task(cache.get_or_compute("agent", "v1", ["in"], compute)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        results = await asyncio.wait_for(asyncio.gather(*followers), timeout=2)
+        assert leader.cancelled()
+        assert len(calls) == 2
+        assert results == [{"status": "success", "data": [2]}] * 3
+
+    asyncio.run(scenario())
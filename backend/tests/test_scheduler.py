@@ -0,0 +1,50 @@
+import pytest
+
+from app.core.scheduler import Host, HostScheduler, NoCapacity
+
+
+def make_scheduler():
+    return HostScheduler([
+        Host("a", None, "host-a", memory_mb=2048, cpus=4),
+        Host("b", None, "host-b", memory_mb=2048, cpus=4)
+    ])
+
+
+def test_best_fit_fills_the_fullest_host_first():
+    scheduler = make_scheduler()
+    scheduler.assign("b", "existing", "other", 1024, 1)
+    placement = scheduler.place("agent", 512, 1)
+    assert placement.host == "b"
+    scheduler.bind(placement, "c1")
+    assert scheduler.host_of("c1").name == "b"
+    assert scheduler.url_for("c1", 4000) == "http://host-b:4000"
+
+
+def test_replicas_of_one_agent_spread_when_room_allows():
+    scheduler = make_scheduler()
+    first = scheduler.place("agent", 512, 1)
+    second = scheduler.place("agent", 512, 1)
+    assert {first.host, second.host} == {"a", "b"}
+
+
+def test_draining_host_takes_no_placements():
+    scheduler = make_scheduler()
+    scheduler.assign("a", "c1", "agent", 1024, 1)
+    assert [placement.container_id for placement in scheduler.drain("a")] == ["c1"]
+    assert scheduler.place("other", 1024, 1).host == "b"
+    with pytest.raises(NoCapacity):
+        scheduler.place("large", 2048, 1)
+    scheduler.release("c1")
+    scheduler.undrain("a")
+    assert scheduler.place("large", 2048, 1).host == "a"
+
+
+def test_parked_container_frees_room_but_keeps_its_host():
+    scheduler = make_scheduler()
+    scheduler.bind(scheduler.place("agent", 2048, 1), "c1")
+    parked = scheduler.park("c1")
+    assert parked.host == "a" and scheduler.host_of("c1").name == "a"
+    assert scheduler.stats()["hosts"][0]["memory_mb"]["used"] == 0
+    # Waking prefers the container's own host while it has room
+    assert scheduler.place("agent", 2048, 1, prefer="a").host == "a"
+    assert scheduler.place("agent", 2048, 1, prefer="a").host == "b"
@@ -0,0 +1,93 @@
+import random
+
+from app.core.search import SearchIndex
+
+
+def build_index():
+    index = SearchIndex()
+    index.add("summarizer", {
+        "name": "Text Summarizer",
+        "description": "Summarizes long articles into concise bullet points",
+        "tags": ["NLP", "summarization"]
+    })
+    index.add("sentiment", {
+        "name": "Sentiment Analyzer",
+        "description": "Scores the sentiment of short text",
+        "tags": ["NLP"]
+    })
+    index.add("captioner", {
+        "name": "Image Captioner",
+        "description": "Writes a caption for an image, no text input needed",
+        "tags": ["vision"]
+    })
+    return index
+
+
+def test_name_match_outranks_description_match():
+    total, results = build_index().search("text ", prefix=False)
+    assert total == 3
+    assert results[0][0] == "summarizer"
+
+
+def test_terms_are_anded():
+    total, results = build_index().search("text image", prefix=False)
+    assert total == 1
+    assert [agent_id for agent_id, _ in results] == ["captioner"]
+
+
+def test_last_term_matches_as_prefix():
+    index = build_index()
+    assert [agent_id for agent_id, _ in index.search("senti")[1]] == ["sentiment"]
+    assert index.search("senti", prefix=False) == (0, [])
+    assert index.search("nlp summ")[0] == 1
+
+
+def test_pagination_is_consistent_with_full_ranking():
+    index = build_index()
+    _, everything = index.search("text", limit=10)
+    pages = index.search("text", offset=0, limit=2)[1] + index.search("text", offset=2, limit=2)[1]
+    assert pages == everything
+
+
+def test_updates_and_removals_are_incremental():
+    index = build_index()
+    index.add("sentiment", {"name": "Mood Meter", "description": "Reads the mood of a message", "tags": []})
+    assert index.search("sentiment", prefix=False)[0] == 0
+    assert index.search("mood")[1][0][0] == "sentiment"
+    index.remove("captioner")
+    assert index.search("image")[0] == 0
+    assert len(index) == 2
+
+
+def test_cached_results_follow_upserts():
+    rng = random.Random(3)
+    words = ["text", "image", "sentiment", "summary", "summarizer", "speech", "spam", "search", "legal"]
+
+    def metadata():
+        return {"name": " ".join(rng.sample(words, 2)), "description": " ".join(rng.choices(words, k=6)), "tags": []}
+
+    docs = {f"agent_{i}": metadata() for i in range(200)}
+    index = SearchIndex()
+    for agent_id, meta in docs.items():
+        index.add(agent_id, meta)
+    queries = ["s", "su", "sum", "text s", "legal", "image spe"]
+    for query in queries:
+        index.search(query)
+
+    for agent_id in rng.sample(sorted(docs), 50):
+        docs[agent_id] = metadata()
+        index.add(agent_id, docs[agent_id])
+    index.add("agent_0", {"name": "Superb Summit", "description": "", "tags": []})
+    docs["agent_0"] = {"name": "Superb Summit", "description": "", "tags": []}
+
+    fresh = SearchIndex()
+    for agent_id, meta in docs.items():
+        fresh.add(agent_id, meta)
+    for query in queries + ["sup"]:
+        # Exact terms match a fresh index exactly; cached prefixes keep the idf
+        # they were scored with, so compare what they match
+        assert index.search(query, limit=50, prefix=False) == fresh.search(query, limit=50, prefix=False)
+        total, results = index.search(query, limit=1000)
+        assert (total, {agent_id for agent_id, _ in results}) == (
+            fresh.search(query, limit=1000)[0], {agent_id for agent_id, _ in fresh.search(query, limit=1000)[1]}
+        )
@@ -0,0 +1,142 @@
+import asyncio
+import time
+
+import pytest
+from jose import jwt
+
+from app.core import security
+from app.core.security import InvalidToken, TokenVerifier
+
+SECRET = "test-secret"
+# jose checks exp against the real clock, so tokens are minted relative to it
+NOW = float(int(time.time()))
+
+
+class Clock:
+    def __init__(self, now=NOW):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(security.time, "time", clock)
+    return clock
+
+
+def make_token(sub="user-1", exp=NOW + 3600, key=SECRET, algorithm="HS256", **claims):
+    return jwt.encode({"sub": sub, "exp": exp, "aud": "authenticated", **claims}, key, algorithm=algorithm)
+
+
+def make_verifier(secret=SECRET, max_entries=100, revocation_interval=300, remote_check=None):
+    return TokenVerifier(secret, "authenticated", max_entries, revocation_interval, remote_check)
+
+
+def test_valid_token_is_verified_and_cached(clock):
+    verifier = make_verifier()
+    token = make_token()
+    assert asyncio.run(verifier.authenticate(token))["sub"] == "user-1"
+    assert token in verifier._cache
+
+
+def test_expired_token_is_rejected_even_when_cached(clock):
+    verifier = make_verifier()
+    token = make_token(exp=NOW + 60)
+    asyncio.run(verifier.authenticate(token))
+
+    clock.now = NOW + 61
+    with pytest.raises(InvalidToken):
+        asyncio.run(verifier.authenticate(token))
+    assert token not in verifier._cache
+
+
+def test_cache_is_bounded_and_evicts_least_recently_used(clock):
+    verifier = make_verifier(max_entries=2)
+    first, second, third = (make_token(sub=f"user-{i}") for i in range(3))
+
+    async def scenario():
+        await verifier.authenticate(first)
+        await verifier.authenticate(second)
+        await verifier.authenticate(first)
+        await verifier.authenticate(third)
+
+    asyncio.run(scenario())
+    assert list(verifier._cache) == [first, third]
+
+
+def test_revocation_is_rechecked_after_the_interval(clock):
+    checked = []
+    revoked = set()
+
+    def remote_check(token):
+        checked.append(token)
+        if token in revoked:
+            raise RuntimeError("session revoked")
+
+    verifier = make_verifier(revocation_interval=300, remote_check=remote_check)
+    token = make_token()
+
+    async def scenario():
+        await verifier.authenticate(token)
+        clock.now = NOW + 299
+        await verifier.authenticate(token)
+        assert checked == []
+
+        clock.now = NOW + 300
+        await verifier.authenticate(token)
+        assert checked == [token]
+
+        revoked.add(token)
+        clock.now = NOW + 600
+        with pytest.raises(InvalidToken):
+            await verifier.authenticate(token)
+
+    asyncio.run(scenario())
+    assert token not in verifier._cache
+
+
+def test_without_secret_claims_are_read_unverified_and_checked_remotely(clock):
+    checked = []
+    verifier = make_verifier(secret="", remote_check=checked.append)
+    # Signed with a key the verifier has never seen
+    token = make_token(key="someone-elses-secret")
+
+    async def scenario():
+        claims = await verifier.authenticate(token)
+        await verifier.authenticate(token)
+        return claims
+
+    assert asyncio.run(scenario())["sub"] == "user-1"
+    assert checked == [token]
+
+
+def test_without_secret_remote_rejection_is_not_cached(clock):
+    def remote_check(token):
+        raise RuntimeError("unknown session")
+
+    verifier = make_verifier(secret="", remote_check=remote_check)
+    token = make_token()
+    with pytest.raises(InvalidToken):
+        asyncio.run(verifier.authenticate(token))
+    assert not verifier._cache
+
+
+def test_without_secret_or_remote_check_tokens_are_rejected(clock):
+    with pytest.raises(InvalidToken):
+        asyncio.run(make_verifier(secret="").authenticate(make_token()))
+
+
+@pytest.mark.parametrize("token", [
+    make_token(key="wrong-secret"),
+    make_token(algorithm="HS512"),
+    # alg "none": an unsigned header and an empty signature
+    "eyJhbGciOiJub25lIiwidHlwIjoiSldUIn0." + make_token().split(".")[1] + ".",
+])
+def test_wrong_signature_or_algorithm_is_rejected(clock, token):
+    verifier = make_verifier()
+    with pytest.raises(InvalidToken):
+        asyncio.run(verifier.authenticate(token))
+    assert not verifier._cache